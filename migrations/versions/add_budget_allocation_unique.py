@@ -0,0 +1,37 @@
+"""Make budget allocations unique per budget and subcategory
+
+Revision ID: add_budget_allocation_unique
+Revises: add_budget_period_overlap_idx
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_budget_allocation_unique'
+down_revision = 'add_budget_period_overlap_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the oldest allocation of each (budget, subcategory) pair, as
+    # cleanup_duplicate_allocations does, before enforcing uniqueness
+    op.execute(
+        "DELETE FROM budget_allocation WHERE id NOT IN ("
+        "SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM budget_allocation "
+        "GROUP BY budget_id, subcategory_id) AS kept)"
+    )
+    with op.batch_alter_table('budget_allocation', schema=None) as batch_op:
+        batch_op.create_index(
+            'uq_budget_allocation_budget_subcategory',
+            ['budget_id', 'subcategory_id'],
+            unique=True
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('budget_allocation', schema=None) as batch_op:
+        batch_op.drop_index('uq_budget_allocation_budget_subcategory')
@@ -0,0 +1,42 @@
+"""Add denormalized allocation, spending and income source totals to budget
+
+Revision ID: add_budget_denormalized_totals
+Revises: add_income_source_recur_uq
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_budget_denormalized_totals'
+down_revision = 'add_income_source_recur_uq'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('budget', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_allocated', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('total_spent', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('income_source_total', sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill from the rows each total summarizes
+    op.execute(
+        "UPDATE budget SET "
+        "total_allocated = COALESCE((SELECT SUM(allocated_amount) FROM budget_allocation "
+        "WHERE budget_allocation.budget_id = budget.id), 0), "
+        "total_spent = COALESCE((SELECT SUM(spent_total) FROM spending_rollup "
+        "WHERE spending_rollup.user_id = budget.user_id "
+        "AND spending_rollup.budget_period_id = budget.period_id), 0), "
+        "income_source_total = COALESCE((SELECT SUM(amount) FROM income_source "
+        "WHERE income_source.budget_id = budget.id), 0)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('budget', schema=None) as batch_op:
+        batch_op.drop_column('income_source_total')
+        batch_op.drop_column('total_spent')
+        batch_op.drop_column('total_allocated')
@@ -0,0 +1,32 @@
+"""Add composite index for budget period overlap checks
+
+Revision ID: add_budget_period_overlap_idx
+Revises: add_transaction_archive
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_budget_period_overlap_idx'
+down_revision = 'add_transaction_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs WHERE user_id = ? AND period_type = ? AND start_date <= ? AND end_date >= ?,
+    # so checking a new period for overlaps is a range scan instead of a per-user scan
+    with op.batch_alter_table('budget_period', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_budget_period_user_type_dates',
+            ['user_id', 'period_type', 'start_date', 'end_date'],
+            unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('budget_period', schema=None) as batch_op:
+        batch_op.drop_index('ix_budget_period_user_type_dates')
@@ -0,0 +1,44 @@
+"""Add categorization_rule table for automatic transaction categorization
+
+Revision ID: add_categorization_rules
+Revises: add_transaction_fingerprint
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_categorization_rules'
+down_revision = 'add_transaction_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'categorization_rule',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('subcategory_id', sa.Integer(), nullable=False),
+        sa.Column('match_type', sa.String(length=20), nullable=False),
+        sa.Column('pattern', sa.String(length=200), nullable=False),
+        sa.Column('min_amount', sa.Float(), nullable=True),
+        sa.Column('max_amount', sa.Float(), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['subcategory_id'], ['subcategory.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('categorization_rule', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_categorization_rule_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('categorization_rule', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_categorization_rule_user_id'))
+
+    op.drop_table('categorization_rule')
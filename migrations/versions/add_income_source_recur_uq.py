@@ -0,0 +1,38 @@
+"""Make recurring income sources unique per budget
+
+Revision ID: add_income_source_recur_uq
+Revises: add_budget_allocation_unique
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_income_source_recur_uq'
+down_revision = 'add_budget_allocation_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the oldest copy of each recurring source in a budget before enforcing
+    # uniqueness; one-off sources (recurring_source_id IS NULL) are untouched
+    op.execute(
+        "DELETE FROM income_source WHERE recurring_source_id IS NOT NULL AND id NOT IN ("
+        "SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM income_source "
+        "WHERE recurring_source_id IS NOT NULL "
+        "GROUP BY budget_id, recurring_source_id) AS kept)"
+    )
+    with op.batch_alter_table('income_source', schema=None) as batch_op:
+        batch_op.create_index(
+            'uq_income_source_budget_recurring',
+            ['budget_id', 'recurring_source_id'],
+            unique=True
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('income_source', schema=None) as batch_op:
+        batch_op.drop_index('uq_income_source_budget_recurring')
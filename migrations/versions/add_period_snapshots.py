@@ -0,0 +1,65 @@
+"""Add period_snapshot and period_snapshot_line tables for closed budget periods
+
+Revision ID: add_period_snapshots
+Revises: add_budget_denormalized_totals
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_period_snapshots'
+down_revision = 'add_budget_denormalized_totals'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('period_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('budget_period_id', sa.Integer(), nullable=False),
+    sa.Column('total_income', sa.Float(), nullable=False),
+    sa.Column('balance_brought_forward', sa.Float(), nullable=False),
+    sa.Column('total_allocated', sa.Float(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.Column('transaction_income', sa.Float(), nullable=False),
+    sa.Column('carry_forward', sa.Float(), nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_period_id'], ['budget_period.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('budget_period_id')
+    )
+    with op.batch_alter_table('period_snapshot', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_period_snapshot_user_id'), ['user_id'], unique=False)
+
+    op.create_table('period_snapshot_line',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('budget_period_id', sa.Integer(), nullable=False),
+    sa.Column('subcategory_id', sa.Integer(), nullable=False),
+    sa.Column('allocated', sa.Float(), nullable=False),
+    sa.Column('spent', sa.Float(), nullable=False),
+    sa.Column('income', sa.Float(), nullable=False),
+    sa.Column('remaining', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_period_id'], ['budget_period.id'], ),
+    sa.ForeignKeyConstraint(['subcategory_id'], ['subcategory.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('budget_period_id', 'subcategory_id', name='uq_period_snapshot_line_key')
+    )
+    with op.batch_alter_table('period_snapshot_line', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_period_snapshot_line_subcategory_id'), ['subcategory_id'], unique=False)
+
+    # Existing closed periods are snapshotted by `flask snapshot-periods`
+
+
+def downgrade():
+    with op.batch_alter_table('period_snapshot_line', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_period_snapshot_line_subcategory_id'))
+    op.drop_table('period_snapshot_line')
+
+    with op.batch_alter_table('period_snapshot', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_period_snapshot_user_id'))
+    op.drop_table('period_snapshot')
@@ -0,0 +1,58 @@
+"""Add spending_rollup table with per-period subcategory totals
+
+Revision ID: add_spending_rollup
+Revises: add_transaction_search
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_spending_rollup'
+down_revision = 'add_transaction_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('spending_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('budget_period_id', sa.Integer(), nullable=False),
+    sa.Column('subcategory_id', sa.Integer(), nullable=False),
+    sa.Column('spent_total', sa.Float(), nullable=False),
+    sa.Column('income_total', sa.Float(), nullable=False),
+    sa.Column('spent_count', sa.Integer(), nullable=False),
+    sa.Column('income_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_period_id'], ['budget_period.id'], ),
+    sa.ForeignKeyConstraint(['subcategory_id'], ['subcategory.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'budget_period_id', 'subcategory_id', name='uq_spending_rollup_key')
+    )
+    
+    # Backfill from existing transactions (same as `flask rebuild-spending-rollup`)
+    op.execute("""
+        INSERT INTO spending_rollup (
+            user_id, budget_period_id, subcategory_id,
+            spent_total, income_total, spent_count, income_count
+        )
+        SELECT t.user_id, p.id, t.subcategory_id,
+               SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END),
+               SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END),
+               SUM(CASE WHEN t.amount < 0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.amount > 0 THEN 1 ELSE 0 END)
+        FROM budget_period p
+        JOIN "transaction" t
+          ON t.user_id = p.user_id
+         AND t.transaction_date >= p.start_date
+         AND date(t.transaction_date) <= p.end_date
+        WHERE t.amount <> 0
+        GROUP BY t.user_id, p.id, t.subcategory_id
+    """)
+
+
+def downgrade():
+    op.drop_table('spending_rollup')
@@ -0,0 +1,45 @@
+"""Add transaction_archive table for archived transactions
+
+Revision ID: add_transaction_archive
+Revises: add_categorization_rules
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_transaction_archive'
+down_revision = 'add_categorization_rules'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transaction_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('description', sa.String(length=200), nullable=True),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('subcategory_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('transaction_date', sa.DateTime(), nullable=True),
+        sa.Column('fingerprint', sa.String(length=40), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['subcategory_id'], ['subcategory.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transaction_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_archive_user_date_id', ['user_id', 'transaction_date', 'id'], unique=False)
+        batch_op.create_index('ix_transaction_archive_user_fingerprint_date', ['user_id', 'fingerprint', 'transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_archive_user_fingerprint_date')
+        batch_op.drop_index('ix_transaction_archive_user_date_id')
+
+    op.drop_table('transaction_archive')
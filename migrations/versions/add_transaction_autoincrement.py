@@ -0,0 +1,69 @@
+"""Make transaction IDs AUTOINCREMENT on SQLite so archived IDs are never reused
+
+Revision ID: add_transaction_autoincrement
+Revises: add_period_snapshots
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_transaction_autoincrement'
+down_revision = 'add_period_snapshots'
+branch_labels = None
+depends_on = None
+
+
+# Kept in sync with SQLITE_SEARCH_DDL in src/models/transaction.py; rebuilding the
+# table drops its triggers, so they are created again afterwards
+SQLITE_SEARCH_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_ai AFTER INSERT ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "VALUES (new.id, 'u' || new.user_id, new.description, new.comment); END",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_ad AFTER DELETE ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(transaction_fts, rowid, owner, description, comment) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.comment); END",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_au AFTER UPDATE OF description, comment, user_id ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(transaction_fts, rowid, owner, description, comment) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.comment); "
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "VALUES (new.id, 'u' || new.user_id, new.description, new.comment); END",
+)
+
+
+def _rebuild_transaction_table(autoincrement):
+    with op.batch_alter_table(
+        'transaction', schema=None, recreate='always',
+        table_kwargs={'sqlite_autoincrement': autoincrement}
+    ):
+        pass
+    for statement in SQLITE_SEARCH_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade():
+    # PostgreSQL IDs come from a sequence, which never goes back: nothing to do
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _rebuild_transaction_table(True)
+    # Start the counter above every ID handed out so far, archived ones included
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'transaction', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'transaction')"
+    )
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, "
+        "COALESCE((SELECT MAX(id) FROM \"transaction\"), 0), "
+        "COALESCE((SELECT MAX(id) FROM transaction_archive), 0)) "
+        "WHERE name = 'transaction'"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _rebuild_transaction_table(False)
@@ -0,0 +1,75 @@
+"""Add content fingerprint to transaction for duplicate detection
+
+Revision ID: add_transaction_fingerprint
+Revises: add_user_data_version
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_transaction_fingerprint'
+down_revision = 'add_user_data_version'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def _fingerprint(user_id, amount, description):
+    # Mirrors src.utils.fingerprint.transaction_fingerprint at the time of this migration
+    normalized = re.sub(r'[^0-9a-z]+', ' ', (description or '').lower()).strip()
+    key = f'{user_id}|{float(amount):.2f}|{normalized}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=40), nullable=True))
+        batch_op.create_index(
+            'ix_transaction_user_fingerprint_date',
+            ['user_id', 'fingerprint', 'transaction_date'],
+            unique=False
+        )
+
+    # Backfill existing rows in id order, one chunk per round trip
+    connection = op.get_bind()
+    transaction = sa.table(
+        'transaction',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('amount', sa.Float),
+        sa.column('description', sa.String),
+        sa.column('fingerprint', sa.String),
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(transaction.c.id, transaction.c.user_id, transaction.c.amount, transaction.c.description)
+            .where(transaction.c.id > last_id)
+            .order_by(transaction.c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            transaction.update().where(transaction.c.id == sa.bindparam('row_id')).values(
+                fingerprint=sa.bindparam('row_fingerprint')
+            ),
+            [
+                {'row_id': row.id, 'row_fingerprint': _fingerprint(row.user_id, row.amount, row.description)}
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_user_fingerprint_date')
+        batch_op.drop_column('fingerprint')
@@ -0,0 +1,28 @@
+"""Add composite index for keyset-paginated transaction listing
+
+Revision ID: add_transaction_keyset_idx
+Revises: fix_password_hash_len
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_transaction_keyset_idx'
+down_revision = 'fix_password_hash_len'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs ORDER BY transaction_date DESC, id DESC with WHERE user_id = ? and the
+    # (transaction_date, id) < (cursor) page boundary, so every page is a range scan
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_user_date_id', ['user_id', 'transaction_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_user_date_id')
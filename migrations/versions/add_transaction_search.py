@@ -0,0 +1,67 @@
+"""Add full-text search index over transaction descriptions and comments
+
+Revision ID: add_transaction_search
+Revises: add_transaction_keyset_idx
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_transaction_search'
+down_revision = 'add_transaction_keyset_idx'
+branch_labels = None
+depends_on = None
+
+
+# Kept in sync with SQLITE_SEARCH_DDL / POSTGRESQL_SEARCH_DDL in src/models/transaction.py;
+# duplicated here so the migration does not change if the model does.
+SEARCH_VECTOR = "to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(comment, ''))"
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5("
+    "owner, description, comment, content='', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_ai AFTER INSERT ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "VALUES (new.id, 'u' || new.user_id, new.description, new.comment); END",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_ad AFTER DELETE ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(transaction_fts, rowid, owner, description, comment) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.comment); END",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_au AFTER UPDATE OF description, comment, user_id ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(transaction_fts, rowid, owner, description, comment) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.comment); "
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "VALUES (new.id, 'u' || new.user_id, new.description, new.comment); END",
+    # Index the rows that already exist
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "SELECT id, 'u' || user_id, description, comment FROM \"transaction\"",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS transaction_fts_au",
+    "DROP TRIGGER IF EXISTS transaction_fts_ad",
+    "DROP TRIGGER IF EXISTS transaction_fts_ai",
+    "DROP TABLE IF EXISTS transaction_fts",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_transaction_search ON \"transaction\" USING GIN ({SEARCH_VECTOR})"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_transaction_search")
@@ -6,6 +6,7 @@ from flask import Flask
 from .config import config
 from .extensions import init_extensions
 from .routes import main_bp, auth_bp, api_bp, admin_bp
+from .commands import register_commands
 
 
 def create_app(config_name='default'):
@@ -24,10 +25,13 @@ def create_app(config_name='default'):
     app.register_blueprint(api_bp)
     app.register_blueprint(admin_bp)
     
+    # Register maintenance CLI commands
+    register_commands(app)
+    
     # Ensure all API routes are exempt from CSRF (they use JWT tokens)
     # Exempt after registration to ensure all nested blueprints are covered
     from .extensions import csrf
-    from .routes.api import user_bp, categories_bp, transactions_bp, budget_bp, accounts_bp, recurring_bp, subscriptions_bp
+    from .routes.api import user_bp, categories_bp, transactions_bp, budget_bp, accounts_bp, recurring_bp, subscriptions_bp, analytics_bp, rules_bp, dashboard_bp
     
     # Exempt all nested API blueprints
     csrf.exempt(api_bp)
@@ -38,5 +42,8 @@ def create_app(config_name='default'):
     csrf.exempt(accounts_bp)
     csrf.exempt(recurring_bp)
     csrf.exempt(subscriptions_bp)
+    csrf.exempt(analytics_bp)
+    csrf.exempt(rules_bp)
+    csrf.exempt(dashboard_bp)
     
     return app
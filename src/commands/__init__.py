@@ -0,0 +1,93 @@
+"""
+Flask CLI commands for maintenance jobs.
+
+Run with the Flask CLI, e.g. `flask --app app rebuild-spending-rollup`.
+"""
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('rebuild-spending-rollup')
+@click.option('--user-id', type=int, default=None, help='Only rebuild the periods of this user.')
+@with_appcontext
+def rebuild_spending_rollup_command(user_id):
+    """Recompute the spending rollup table from transactions."""
+    from ..services import SpendingRollupService
+    
+    count = SpendingRollupService.rebuild_all(user_id=user_id)
+    click.echo(f'Rebuilt spending rollup for {count} budget periods.')
+
+
+@click.command('archive-transactions')
+@click.option('--horizon-days', type=int, default=None,
+              help='Archive transactions older than this many days (default: TRANSACTION_ARCHIVE_AFTER_DAYS).')
+@click.option('--closed-periods', is_flag=True, default=False,
+              help='Also archive transactions of budget periods that have ended.')
+@click.option('--user-id', type=int, default=None, help='Only archive the transactions of this user.')
+@with_appcontext
+def archive_transactions_command(horizon_days, closed_periods, user_id):
+    """Move old transactions into the transaction_archive table."""
+    from ..services import TransactionArchiveService
+    
+    users, count = TransactionArchiveService.archive_all(
+        horizon_days=horizon_days,
+        user_id=user_id,
+        closed_periods=closed_periods
+    )
+    click.echo(f'Archived {count} transactions for {users} users.')
+
+
+@click.command('rollover-periods')
+@click.option('--carry-envelopes', is_flag=True, default=False,
+              help="Also carry each subcategory's unspent allocation into the new period.")
+@click.option('--user-id', type=int, default=None, help='Only roll over this user.')
+@with_appcontext
+def rollover_periods_command(carry_envelopes, user_id):
+    """Start the next budget period for users whose active period has ended."""
+    from ..services import BudgetRolloverService
+    
+    result = BudgetRolloverService.rollover_all(user_id=user_id, carry_envelopes=carry_envelopes)
+    click.echo(f"Created {result['periods']} budget periods; skipped {result['skipped']} users "
+               f"whose next period overlaps an existing one.")
+
+
+@click.command('check-budget-totals')
+@click.option('--fix', is_flag=True, default=False, help='Recompute the totals that disagree.')
+@click.option('--user-id', type=int, default=None, help="Only check this user's budgets.")
+@with_appcontext
+def check_budget_totals_command(fix, user_id):
+    """Compare budgets' denormalized totals with the rows they summarize."""
+    from ..utils.budget import check_budget_totals
+    
+    mismatches = check_budget_totals(user_id=user_id, fix=fix)
+    for mismatch in mismatches:
+        click.echo(f"Budget {mismatch['budget_id']} (user {mismatch['user_id']}): {mismatch['column']} "
+                   f"is {mismatch['stored']}, expected {mismatch['actual']}")
+    budgets = len({mismatch['budget_id'] for mismatch in mismatches})
+    if not mismatches:
+        click.echo('All budget totals are consistent.')
+    elif fix:
+        click.echo(f'Fixed {len(mismatches)} totals in {budgets} budgets.')
+    else:
+        click.echo(f'Found {len(mismatches)} inconsistent totals in {budgets} budgets; run with --fix to repair them.')
+
+
+@click.command('snapshot-periods')
+@click.option('--user-id', type=int, default=None, help="Only snapshot this user's periods.")
+@with_appcontext
+def snapshot_periods_command(user_id):
+    """Snapshot the figures of closed budget periods that have no snapshot yet."""
+    from ..services import PeriodSnapshotService
+    
+    count = PeriodSnapshotService.close_ended(user_id=user_id)
+    click.echo(f'Snapshotted {count} closed budget periods.')
+
+
+def register_commands(app):
+    """Register the maintenance commands on the Flask app."""
+    app.cli.add_command(rebuild_spending_rollup_command)
+    app.cli.add_command(archive_transactions_command)
+    app.cli.add_command(rollover_periods_command)
+    app.cli.add_command(check_budget_totals_command)
+    app.cli.add_command(snapshot_periods_command)
@@ -56,6 +56,9 @@ class Config:
     TRIAL_DAYS = int(os.environ.get('TRIAL_DAYS', 30))
     DEFAULT_CURRENCY = os.environ.get('DEFAULT_CURRENCY', 'ZAR')
 
+    # Transactions older than this are moved to transaction_archive by `flask archive-transactions`
+    TRANSACTION_ARCHIVE_AFTER_DAYS = int(os.environ.get('TRANSACTION_ARCHIVE_AFTER_DAYS', 730))
+
     # PayFast configuration
     PAYFAST_MERCHANT_ID = os.environ.get('PAYFAST_MERCHANT_ID', '')
     PAYFAST_MERCHANT_KEY = os.environ.get('PAYFAST_MERCHANT_KEY', '')
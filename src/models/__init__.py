@@ -4,22 +4,28 @@ Database models for the Wealth Wise application.
 
 from .user import User
 from .category import Category, Subcategory
-from .transaction import Transaction
+from .transaction import Transaction, ArchivedTransaction
 from .budget import Budget, BudgetPeriod, BudgetAllocation
 from .income import IncomeSource, RecurringIncomeSource
 from .account import Account
 from .auth import PasswordResetToken, EmailVerification
 from .recurring import RecurringBudgetAllocation
 from .subscription import SubscriptionPlan, Subscription, Payment
+from .rollup import SpendingRollup
+from .categorization import CategorizationRule
+from .snapshot import PeriodSnapshot, PeriodSnapshotLine
 
 __all__ = [
     'User',
     'Category', 'Subcategory',
-    'Transaction',
+    'Transaction', 'ArchivedTransaction',
     'Budget', 'BudgetPeriod', 'BudgetAllocation',
     'IncomeSource', 'RecurringIncomeSource',
     'Account',
     'PasswordResetToken', 'EmailVerification',
     'RecurringBudgetAllocation',
-    'SubscriptionPlan', 'Subscription', 'Payment'
+    'SubscriptionPlan', 'Subscription', 'Payment',
+    'SpendingRollup',
+    'CategorizationRule',
+    'PeriodSnapshot', 'PeriodSnapshotLine'
 ]
@@ -20,6 +20,11 @@ class BudgetPeriod(db.Model):
     is_active = db.Column(db.Boolean, default=False)  # Only one active budget period per user
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Overlap checks: periods of one type starting on or before a date are a range scan
+        db.Index('ix_budget_period_user_type_dates', 'user_id', 'period_type', 'start_date', 'end_date'),
+    )
+    
     # Relationships
     budgets = db.relationship('Budget', backref='period', lazy=True, cascade='all, delete-orphan')
     
@@ -36,6 +41,11 @@ class Budget(db.Model):
     period_id = db.Column(db.Integer, db.ForeignKey('budget_period.id'), nullable=False)
     total_income = db.Column(db.Float, default=0)
     balance_brought_forward = db.Column(db.Float, default=0)
+    # Denormalized totals, kept current by the services that write allocations,
+    # income sources and transactions (see utils.budget.refresh_budget_totals)
+    total_allocated = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    total_spent = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    income_source_total = db.Column(db.Float, nullable=False, default=0, server_default='0')
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -59,6 +69,11 @@ class BudgetAllocation(db.Model):
     is_recurring_allocation = db.Column(db.Boolean, default=False)
     recurring_allocation_id = db.Column(db.Integer, db.ForeignKey('recurring_budget_allocation.id'), nullable=True)
     
+    __table_args__ = (
+        # One allocation per subcategory per budget; the target of allocation upserts
+        db.Index('uq_budget_allocation_budget_subcategory', 'budget_id', 'subcategory_id', unique=True),
+    )
+    
     # Relationships
     subcategory = db.relationship('Subcategory', backref='budget_allocations', lazy=True)
     
@@ -0,0 +1,33 @@
+"""
+Categorization rule model for assigning subcategories to transactions automatically.
+"""
+
+from datetime import datetime
+from ..extensions import db
+
+
+class CategorizationRule(db.Model):
+    """
+    A user's rule mapping matching transactions to a subcategory.
+
+    'contains' rules match a substring of the normalized description (lowercase,
+    punctuation collapsed); 'regex' rules match the raw description, case
+    insensitively. Optional amount bounds restrict either kind. When several rules
+    match, the highest priority wins, then the longest pattern.
+    """
+
+    __tablename__ = 'categorization_rule'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id'), nullable=False)
+    match_type = db.Column(db.String(20), nullable=False, default='contains')  # 'contains' or 'regex'
+    pattern = db.Column(db.String(200), nullable=False)
+    min_amount = db.Column(db.Float)
+    max_amount = db.Column(db.Float)
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CategorizationRule {self.match_type}:{self.pattern}>'
@@ -19,6 +19,12 @@ class IncomeSource(db.Model):
     recurring_source_id = db.Column(db.Integer, db.ForeignKey('recurring_income_source.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # A recurring source is copied into a budget at most once (NULLs, i.e.
+        # one-off sources, never conflict)
+        db.Index('uq_income_source_budget_recurring', 'budget_id', 'recurring_source_id', unique=True),
+    )
+    
     def __repr__(self):
         return f'<IncomeSource {self.name}: {self.amount}>'
 
@@ -0,0 +1,33 @@
+"""
+Spending rollup model holding pre-aggregated transaction totals.
+"""
+
+from ..extensions import db
+
+
+class SpendingRollup(db.Model):
+    """
+    Per (user, budget period, subcategory) spending and income totals.
+    
+    Maintained by SpendingRollupService in the same database transaction as the
+    writes that affect it, so dashboard reads never have to scan transactions.
+    """
+    
+    __tablename__ = 'spending_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    budget_period_id = db.Column(db.Integer, db.ForeignKey('budget_period.id'), nullable=False)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id'), nullable=False)
+    spent_total = db.Column(db.Float, nullable=False, default=0)  # Sum of expenses, as a positive value
+    income_total = db.Column(db.Float, nullable=False, default=0)
+    spent_count = db.Column(db.Integer, nullable=False, default=0)
+    income_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Also the lookup index for every read (always filtered on user and period)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'budget_period_id', 'subcategory_id', name='uq_spending_rollup_key'),
+    )
+    
+    def __repr__(self):
+        return f'<SpendingRollup period={self.budget_period_id} subcategory={self.subcategory_id}>'
@@ -0,0 +1,53 @@
+"""
+Budget period snapshot models holding the frozen figures of closed periods.
+"""
+
+from datetime import datetime
+from ..extensions import db
+
+
+class PeriodSnapshot(db.Model):
+    """
+    Budget-level figures of a closed budget period.
+    
+    Written by PeriodSnapshotService when a period is deactivated, discarded when
+    it is re-opened and rebuilt when a late change touches it, so history reads
+    never have to aggregate transactions.
+    """
+    
+    __tablename__ = 'period_snapshot'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    budget_period_id = db.Column(db.Integer, db.ForeignKey('budget_period.id'), nullable=False, unique=True)
+    total_income = db.Column(db.Float, nullable=False, default=0)
+    balance_brought_forward = db.Column(db.Float, nullable=False, default=0)
+    total_allocated = db.Column(db.Float, nullable=False, default=0)
+    total_spent = db.Column(db.Float, nullable=False, default=0)
+    transaction_income = db.Column(db.Float, nullable=False, default=0)  # Sum of positive transactions
+    carry_forward = db.Column(db.Float, nullable=False, default=0)  # Income + brought forward - spent
+    closed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PeriodSnapshot period={self.budget_period_id}>'
+
+
+class PeriodSnapshotLine(db.Model):
+    """Per-subcategory figures of a closed budget period."""
+    
+    __tablename__ = 'period_snapshot_line'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    budget_period_id = db.Column(db.Integer, db.ForeignKey('budget_period.id'), nullable=False)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id'), nullable=False, index=True)
+    allocated = db.Column(db.Float, nullable=False, default=0)
+    spent = db.Column(db.Float, nullable=False, default=0)
+    income = db.Column(db.Float, nullable=False, default=0)
+    remaining = db.Column(db.Float, nullable=False, default=0)  # Allocated - spent
+    
+    __table_args__ = (
+        db.UniqueConstraint('budget_period_id', 'subcategory_id', name='uq_period_snapshot_line_key'),
+    )
+    
+    def __repr__(self):
+        return f'<PeriodSnapshotLine period={self.budget_period_id} subcategory={self.subcategory_id}>'
@@ -3,6 +3,7 @@ Transaction model for financial transactions.
 """
 
 from datetime import datetime
+from sqlalchemy import event, DDL
 from ..extensions import db
 
 
@@ -18,9 +19,85 @@ class Transaction(db.Model):
     subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     transaction_date = db.Column(db.DateTime, default=datetime.utcnow)
+    # Hash of user, amount and normalized description (see utils.fingerprint)
+    fingerprint = db.Column(db.String(40))
+    
+    __table_args__ = (
+        # Composite index backing keyset pagination (ORDER BY transaction_date DESC, id DESC per user)
+        db.Index('ix_transaction_user_date_id', 'user_id', 'transaction_date', 'id'),
+        # Duplicate lookups: same content within a date window is one range scan
+        db.Index('ix_transaction_user_fingerprint_date', 'user_id', 'fingerprint', 'transaction_date'),
+        # Archived rows keep their IDs, so SQLite must never hand out max(id) + 1 again
+        {'sqlite_autoincrement': True},
+    )
     
     # Relationships
     subcategory = db.relationship('Subcategory', backref='transactions')
     
     def __repr__(self):
         return f'<Transaction {self.id}: {self.amount}>'
+
+
+class ArchivedTransaction(db.Model):
+    """
+    Cold storage for old transactions, moved out of the transaction table by
+    TransactionArchiveService.
+    
+    Same columns and IDs as Transaction, so history reads can query both tables
+    with the same expressions and merge the results. Archived rows are read-only.
+    """
+    
+    __tablename__ = 'transaction_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    amount = db.Column(db.Float, nullable=False)
+    description = db.Column(db.String(200))
+    comment = db.Column(db.Text)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategory.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    transaction_date = db.Column(db.DateTime)
+    fingerprint = db.Column(db.String(40))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_transaction_archive_user_date_id', 'user_id', 'transaction_date', 'id'),
+        db.Index('ix_transaction_archive_user_fingerprint_date', 'user_id', 'fingerprint', 'transaction_date'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedTransaction {self.id}: {self.amount}>'
+
+
+# Full-text search over description/comment.
+# SQLite: contentless FTS5 table kept in sync by triggers. The owner column holds
+# 'u<user_id>' so searches are restricted to one user's doclist inside the index.
+# PostgreSQL: GIN index on the tsvector expression used by TransactionService.search_transactions.
+# Migration add_transaction_search creates the same objects on existing databases.
+TRANSACTION_SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(comment, ''))"
+)
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5("
+    "owner, description, comment, content='', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_ai AFTER INSERT ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "VALUES (new.id, 'u' || new.user_id, new.description, new.comment); END",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_ad AFTER DELETE ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(transaction_fts, rowid, owner, description, comment) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.comment); END",
+    "CREATE TRIGGER IF NOT EXISTS transaction_fts_au AFTER UPDATE OF description, comment, user_id ON \"transaction\" BEGIN "
+    "INSERT INTO transaction_fts(transaction_fts, rowid, owner, description, comment) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.comment); "
+    "INSERT INTO transaction_fts(rowid, owner, description, comment) "
+    "VALUES (new.id, 'u' || new.user_id, new.description, new.comment); END",
+)
+
+POSTGRESQL_SEARCH_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_transaction_search ON \"transaction\" USING GIN ({TRANSACTION_SEARCH_VECTOR})",
+)
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Transaction.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(Transaction.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
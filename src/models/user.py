@@ -52,6 +52,9 @@ class User(db.Model):
     # Admin fields
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     
+    # Incremented whenever any of the user's data changes (see utils/data_version.py)
+    data_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     # Relationships
     categories = db.relationship('Category', backref='user', lazy=True, cascade='all, delete-orphan')
     transactions = db.relationship('Transaction', backref='user', lazy=True, cascade='all, delete-orphan')
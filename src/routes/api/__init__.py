@@ -10,10 +10,15 @@ from .budget import budget_bp
 from .accounts import accounts_bp
 from .recurring import recurring_bp
 from .subscriptions import subscriptions_bp
+from .analytics import analytics_bp
+from .rules import rules_bp
+from .dashboard import dashboard_bp
 from ...auth import token_required, get_current_user
 from ...services import EmailService
 from ...extensions import limiter, csrf
 from ...utils.password import validate_password_strength
+from ...utils.data_version import conditional_get
+from ...utils.active_budget import ActiveBudgetContext
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -25,6 +30,9 @@ api_bp.register_blueprint(budget_bp)
 api_bp.register_blueprint(accounts_bp)
 api_bp.register_blueprint(recurring_bp)
 api_bp.register_blueprint(subscriptions_bp)
+api_bp.register_blueprint(analytics_bp)
+api_bp.register_blueprint(rules_bp)
+api_bp.register_blueprint(dashboard_bp)
 
 # Exempt all API routes from CSRF protection (they use JWT tokens)
 # Must be done after registering nested blueprints
@@ -325,39 +333,22 @@ def resend_verification():
 @api_bp.route('/budget/balance-check', methods=['GET'])
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
+@conditional_get
 def check_budget_balance(current_user):
     """Check if total income is sufficient for total allocated budget."""
     try:
-        from ...models import Budget, BudgetPeriod, BudgetAllocation
+        from ...services import BudgetService
         
         # Get active budget period
-        active_period = BudgetPeriod.query.filter_by(user_id=current_user.id, is_active=True).first()
+        active_period = ActiveBudgetContext.resolve(current_user.id)
         if not active_period:
             return jsonify({'message': 'No active budget period found'}), 404
         
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=current_user.id).first()
+        budget = active_period.budget()
         if not budget:
             return jsonify({'message': 'No budget found for active period'}), 404
         
-        # Calculate total available income (income sources + balance brought forward)
-        total_income = (budget.total_income or 0) + (budget.balance_brought_forward or 0)
-        
-        # Calculate total allocated
-        allocations = BudgetAllocation.query.filter_by(budget_id=budget.id).all()
-        total_allocated = sum(allocation.allocated_amount for allocation in allocations)
-        
-        # Check balance
-        balance = total_income - total_allocated
-        is_balanced = balance >= 0
-        
-        return jsonify({
-            'total_income': total_income,
-            'total_allocated': total_allocated,
-            'balance': balance,
-            'deficit': abs(balance) if balance < 0 else 0,  # Add deficit for dashboard compatibility
-            'is_balanced': is_balanced,
-            'message': 'Budget is balanced' if is_balanced else 'Budget allocation exceeds income'
-        }), 200
+        return jsonify(BudgetService.check_balance(budget)), 200
         
     except Exception as e:
         return jsonify({'message': f'Error checking budget balance: {str(e)}'}), 500
@@ -366,97 +357,27 @@ def check_budget_balance(current_user):
 @api_bp.route('/budget/overspending-check', methods=['GET'])
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
+@conditional_get
 def check_overspending(current_user):
     """Check for subcategories where spending exceeds allocation."""
     try:
-        from ...models import Budget, BudgetPeriod, BudgetAllocation, Transaction
-        from ...extensions import db
+        from ...services import BudgetService, SpendingAggregator
         
         # Get active budget period
-        active_period = BudgetPeriod.query.filter_by(user_id=current_user.id, is_active=True).first()
+        active_period = ActiveBudgetContext.resolve(current_user.id)
         if not active_period:
             return jsonify({'message': 'No active budget period found'}), 404
         
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=current_user.id).first()
+        budget = BudgetService.get_budget(current_user.id)
         if not budget:
             return jsonify({'message': 'No budget found for active period'}), 404
         
-        # Get all allocations for this budget
-        allocations = BudgetAllocation.query.filter_by(budget_id=budget.id).all()
-        
-        # Get all transactions in the active period
-        from ...models import Category, Subcategory
-        user_subcategory_ids = db.session.query(Subcategory.id).join(Category).filter(
-            Category.user_id == current_user.id
-        ).subquery()
-        
-        transactions = Transaction.query.filter(
-            Transaction.subcategory_id.in_(user_subcategory_ids),
-            Transaction.user_id == current_user.id,
-            Transaction.transaction_date >= active_period.start_date,
-            Transaction.transaction_date <= active_period.end_date
-        ).all()
-        
-        # Group transactions by subcategory
-        subcategory_spending = {}
-        for transaction in transactions:
-            if transaction.amount < 0:  # Only count expenses
-                subcategory_id = transaction.subcategory_id
-                if subcategory_id not in subcategory_spending:
-                    subcategory_spending[subcategory_id] = 0
-                subcategory_spending[subcategory_id] += abs(transaction.amount)
-        
-        # Check for overspending
-        overspending = []
-        checked_subcategories = set()
-        
-        # Check subcategories that have allocations
-        for allocation in allocations:
-            subcategory_id = allocation.subcategory_id
-            checked_subcategories.add(subcategory_id)
-            
-            total_spent = subcategory_spending.get(subcategory_id, 0)
-            allocated = allocation.allocated_amount or 0
-            
-            # Check if spending exceeds allocation
-            if total_spent > allocated:
-                overspent_amount = total_spent - allocated
-                overspent_percentage = (overspent_amount / allocated * 100) if allocated > 0 else 0
-                
-                overspending.append({
-                    'subcategory_id': subcategory_id,
-                    'subcategory_name': allocation.subcategory.name,
-                    'category_name': allocation.subcategory.category.name,
-                    'allocated': allocated,
-                    'spent': total_spent,
-                    'overspent_amount': overspent_amount,
-                    'overspent_percentage': overspent_percentage
-                })
-        
-        # Check subcategories with spending but no allocations (spending > 0 with allocated = 0 is overspending)
-        for subcategory_id, total_spent in subcategory_spending.items():
-            if subcategory_id not in checked_subcategories and total_spent > 0:
-                # Get subcategory info
-                subcategory = Subcategory.query.get(subcategory_id)
-                if subcategory and subcategory.category.user_id == current_user.id:
-                    overspending.append({
-                        'subcategory_id': subcategory_id,
-                        'subcategory_name': subcategory.name,
-                        'category_name': subcategory.category.name,
-                        'allocated': 0,
-                        'spent': total_spent,
-                        'overspent_amount': total_spent,
-                        'overspent_percentage': 0  # Can't calculate percentage when allocated is 0
-                    })
-        
-        return jsonify({
-            'overspent_categories': overspending,
-            'total_overspent_categories': len(overspending),
-            'has_overspending': len(overspending) > 0
-        }), 200
+        # Expenses per subcategory in the active period
+        period_totals = SpendingAggregator.period_totals(current_user.id, active_period.period_id)
+        return jsonify(BudgetService.find_overspending(current_user.id, budget, period_totals)), 200
         
     except Exception as e:
         return jsonify({'message': f'Error checking overspending: {str(e)}'}), 500
 
 
-__all__ = ['user_bp', 'categories_bp', 'transactions_bp', 'budget_bp', 'accounts_bp', 'recurring_bp', 'subscriptions_bp', 'api_bp']
+__all__ = ['user_bp', 'categories_bp', 'transactions_bp', 'budget_bp', 'accounts_bp', 'recurring_bp', 'subscriptions_bp', 'analytics_bp', 'rules_bp', 'dashboard_bp', 'api_bp']
@@ -8,6 +8,7 @@ from ...auth import token_required, subscription_required
 from ...services import AccountService
 from ...schemas import AccountSchema, AccountUpdateSchema
 from ...utils.validation import handle_validation_error
+from ...utils.data_version import conditional_get
 from ...extensions import limiter
 
 accounts_bp = Blueprint('accounts', __name__, url_prefix='/accounts')
@@ -17,6 +18,7 @@ accounts_bp = Blueprint('accounts', __name__, url_prefix='/accounts')
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
 @subscription_required
+@conditional_get
 def get_accounts(current_user):
     """Get all accounts for the current user."""
     accounts = AccountService.get_user_accounts(current_user.id)
@@ -92,6 +94,7 @@ def delete_account(current_user, account_id):
 @accounts_bp.route('/balance-summary', methods=['GET'])
 @token_required
 @subscription_required
+@conditional_get
 def get_balance_summary(current_user):
     """Get balance summary for all accounts."""
     summary = AccountService.get_balance_summary(current_user.id)
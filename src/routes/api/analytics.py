@@ -0,0 +1,78 @@
+"""
+Analytics API routes.
+"""
+
+from datetime import date, timedelta
+from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
+from ...auth import token_required, subscription_required
+from ...services import AnalyticsService, ForecastService
+from ...schemas import SpendingSeriesQuerySchema, PeriodComparisonQuerySchema
+from ...utils.validation import handle_validation_error
+from ...utils.data_version import conditional_get
+from ...extensions import limiter
+
+analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
+
+
+@analytics_bp.route('/spending-series', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def get_spending_series(current_user):
+    """Get spending/income per day, week or month grouped by category or subcategory."""
+    schema = SpendingSeriesQuerySchema()
+    
+    try:
+        params = schema.load(request.args)
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    # Default to a one year window, ending today when neither end is given
+    date_from = params['date_from']
+    date_to = params['date_to']
+    if date_to is None:
+        date_to = date_from + timedelta(days=364) if date_from else date.today()
+    if date_from is None:
+        date_from = date_to - timedelta(days=364)
+    
+    series = AnalyticsService.get_spending_series(
+        current_user.id,
+        params['bucket'],
+        date_from,
+        date_to,
+        group_by=params['group_by']
+    )
+    return jsonify(series), 200
+
+
+@analytics_bp.route('/periods', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def get_period_comparison(current_user):
+    """Compare allocated, spent and income per subcategory across the last N budget periods."""
+    schema = PeriodComparisonQuerySchema()
+    
+    try:
+        params = schema.load(request.args)
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    return jsonify(AnalyticsService.get_period_comparison(current_user.id, params['last'])), 200
+
+
+@analytics_bp.route('/forecast', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def get_forecast(current_user):
+    """Project each subcategory's spending at the end of the active budget period."""
+    forecast = ForecastService.get_period_forecast(current_user.id)
+    if forecast is None:
+        return jsonify({'message': 'No active budget period found'}), 404
+    
+    return jsonify(forecast), 200
@@ -2,15 +2,17 @@
 Budget API routes.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from marshmallow import ValidationError
 from ...auth import token_required, subscription_required
-from ...services import BudgetService
+from ...services import BudgetService, PeriodSnapshotService
 from ...schemas import (
-    BudgetPeriodSchema, BudgetPeriodUpdateSchema, BudgetUpdateSchema,
+    BudgetPeriodSchema, BudgetPeriodUpdateSchema, BudgetPeriodCloneSchema, BudgetUpdateSchema,
     BudgetAllocationsUpdateSchema, IncomeSourceSchema, IncomeSourceUpdateSchema
 )
 from ...utils.validation import handle_validation_error
+from ...utils.data_version import conditional_get
+from ...utils.active_budget import ActiveBudgetContext
 from ...extensions import limiter
 
 budget_bp = Blueprint('budget', __name__, url_prefix='/budget')
@@ -20,6 +22,7 @@ budget_bp = Blueprint('budget', __name__, url_prefix='/budget')
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
 @subscription_required
+@conditional_get
 def get_budget_periods(current_user):
     """Get all budget periods for the current user."""
     periods = BudgetService.get_budget_periods(current_user.id)
@@ -63,6 +66,48 @@ def create_budget_period(current_user):
     }), 201
 
 
+@budget_bp.route('/budget-periods/<int:period_id>/clone', methods=['POST'])
+@token_required
+@subscription_required
+def clone_budget_period(current_user, period_id):
+    """Create a new budget period with a copy of this period's allocations and income."""
+    schema = BudgetPeriodCloneSchema()
+    
+    try:
+        validated_data = schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    try:
+        period = BudgetService.clone_budget_period(
+            period_id=period_id,
+            user_id=current_user.id,
+            name=validated_data['name'],
+            start_date=validated_data['start_date'],
+            end_date=validated_data['end_date'],
+            period_type=validated_data['period_type'],
+            scale=validated_data['scale']
+        )
+    except ValueError as e:
+        # Handle overlap validation errors
+        return jsonify({
+            'message': str(e),
+            'errors': {'period_overlap': [str(e)]}
+        }), 400
+    
+    if not period:
+        return jsonify({'message': 'Budget period not found'}), 404
+    
+    return jsonify({
+        'id': period.id,
+        'name': period.name,
+        'period_type': period.period_type,
+        'start_date': period.start_date.isoformat(),
+        'end_date': period.end_date.isoformat(),
+        'is_active': period.is_active
+    }), 201
+
+
 @budget_bp.route('/budget-periods/<int:period_id>/activate', methods=['POST'])
 @token_required
 @subscription_required
@@ -75,6 +120,20 @@ def activate_budget_period(current_user, period_id):
     return jsonify({'message': 'Budget period activated successfully'}), 200
 
 
+@budget_bp.route('/budget-periods/<int:period_id>/summary', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def get_budget_period_summary(current_user, period_id):
+    """Get a budget period's figures, from its snapshot once the period is closed."""
+    summary = PeriodSnapshotService.get_period_summary(current_user.id, period_id)
+    if not summary:
+        return jsonify({'message': 'Budget period not found'}), 404
+    
+    return jsonify(summary), 200
+
+
 @budget_bp.route('/budget-periods/<int:period_id>', methods=['PUT'])
 @token_required
 @subscription_required
@@ -133,6 +192,7 @@ def delete_budget_period(current_user, period_id):
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
 @subscription_required
+@conditional_get
 def get_budget(current_user):
     """Get the active budget for the current user."""
     try:
@@ -142,7 +202,7 @@ def get_budget(current_user):
         
         return jsonify(budget), 200
     except Exception as e:
-        print(f"Error in get_budget API: {str(e)}")
+        current_app.logger.exception(f"Error in get_budget API: {str(e)}")
         return jsonify({'message': f'Error loading budget: {str(e)}'}), 500
 
 
@@ -249,31 +309,23 @@ def update_income_source(current_user, source_id):
     if not validated_data:
         return jsonify({'message': 'Name or amount is required'}), 400
     
-    # Get the income source
-    from ...models import IncomeSource, Budget, BudgetPeriod
-    active_period = BudgetPeriod.query.filter_by(user_id=current_user.id, is_active=True).first()
+    active_period = ActiveBudgetContext.resolve(current_user.id)
     if not active_period:
         return jsonify({'message': 'No active budget period found'}), 404
     
-    budget = Budget.query.filter_by(period_id=active_period.id, user_id=current_user.id).first()
+    budget = active_period.budget()
     if not budget:
         return jsonify({'message': 'No budget found'}), 404
     
-    income_source = IncomeSource.query.filter_by(id=source_id, budget_id=budget.id).first()
+    income_source = BudgetService.update_income_source(
+        current_user.id,
+        source_id,
+        name=validated_data.get('name'),
+        amount=validated_data.get('amount')
+    )
     if not income_source:
         return jsonify({'message': 'Income source not found'}), 404
     
-    if 'name' in validated_data:
-        income_source.name = validated_data['name']
-    if 'amount' in validated_data:
-        income_source.amount = validated_data['amount']
-    
-    from ...extensions import db
-    db.session.commit()
-    
-    # Recalculate total income from all sources
-    BudgetService.recalculate_total_income(current_user.id)
-    
     return jsonify({'message': 'Income source updated successfully'}), 200
 
 
@@ -283,28 +335,17 @@ def update_income_source(current_user, source_id):
 def delete_income_source(current_user, source_id):
     """Delete an income source."""
     try:
-        from ...models import IncomeSource, Budget, BudgetPeriod
-        from ...extensions import db
-        
-        active_period = BudgetPeriod.query.filter_by(user_id=current_user.id, is_active=True).first()
+        active_period = ActiveBudgetContext.resolve(current_user.id)
         if not active_period:
             return jsonify({'message': 'No active budget period found'}), 404
         
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=current_user.id).first()
+        budget = active_period.budget()
         if not budget:
             return jsonify({'message': 'No budget found'}), 404
         
-        income_source = IncomeSource.query.filter_by(id=source_id, budget_id=budget.id).first()
-        if not income_source:
+        if not BudgetService.delete_income_source(current_user.id, source_id):
             return jsonify({'message': 'Income source not found'}), 404
         
-        # Delete the income source
-        db.session.delete(income_source)
-        db.session.commit()
-        
-        # Recalculate total income from remaining sources
-        BudgetService.recalculate_total_income(current_user.id)
-        
         return jsonify({'message': 'Income source deleted successfully'}), 200
         
     except Exception as e:
@@ -11,6 +11,7 @@ from ...schemas import (
     SubcategorySchema, SubcategoryUpdateSchema
 )
 from ...utils.validation import handle_validation_error
+from ...utils.data_version import conditional_get
 from ...extensions import limiter
 
 categories_bp = Blueprint('categories', __name__, url_prefix='/categories')
@@ -20,6 +21,7 @@ categories_bp = Blueprint('categories', __name__, url_prefix='/categories')
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
 @subscription_required
+@conditional_get
 def get_categories(current_user):
     """Get all categories for the current user."""
     categories = CategoryService.get_user_categories(current_user.id)
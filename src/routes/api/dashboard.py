@@ -0,0 +1,24 @@
+"""
+Dashboard API routes.
+"""
+
+from flask import Blueprint, jsonify
+from ...auth import token_required, subscription_required
+from ...services import DashboardService
+from ...utils.data_version import conditional_get
+from ...extensions import limiter
+
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
+
+
+@dashboard_bp.route('', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def get_dashboard(current_user):
+    """Get the budget, categories, balance checks, account summary and settings in one response."""
+    try:
+        return jsonify(DashboardService.get_dashboard(current_user)), 200
+    except Exception as e:
+        return jsonify({'message': f'Error loading dashboard: {str(e)}'}), 500
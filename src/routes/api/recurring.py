@@ -6,12 +6,14 @@ from flask import Blueprint, request, jsonify
 from ...auth import token_required
 from ...extensions import db
 from ...models import RecurringIncomeSource, RecurringBudgetAllocation
+from ...utils.data_version import bump_data_version, conditional_get
 
 recurring_bp = Blueprint('recurring', __name__, url_prefix='/')
 
 
 @recurring_bp.route('/recurring-income-sources', methods=['GET'])
 @token_required
+@conditional_get
 def get_recurring_income_sources(current_user):
     """Get all recurring income sources for the user."""
     sources = RecurringIncomeSource.query.filter_by(user_id=current_user.id).all()
@@ -62,6 +64,7 @@ def create_recurring_income_source(current_user):
     )
     
     db.session.add(source)
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({
@@ -99,6 +102,7 @@ def update_recurring_income_source(current_user, source_id):
     if 'is_active' in data:
         source.is_active = bool(data['is_active'])
     
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({'message': 'Recurring income source updated successfully'}), 200
@@ -113,6 +117,7 @@ def delete_recurring_income_source(current_user, source_id):
         return jsonify({'message': 'Recurring income source not found'}), 404
     
     db.session.delete(source)
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({'message': 'Recurring income source deleted successfully'}), 200
@@ -120,6 +125,7 @@ def delete_recurring_income_source(current_user, source_id):
 
 @recurring_bp.route('/recurring-allocations', methods=['GET'])
 @token_required
+@conditional_get
 def get_recurring_allocations(current_user):
     """Get all recurring budget allocations for the user."""
     allocations = RecurringBudgetAllocation.query.filter_by(user_id=current_user.id).all()
@@ -174,6 +180,7 @@ def create_recurring_allocation(current_user):
     )
     
     db.session.add(allocation)
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({
@@ -211,6 +218,7 @@ def update_recurring_allocation(current_user, allocation_id):
     if 'is_active' in data:
         allocation.is_active = bool(data['is_active'])
     
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({'message': 'Recurring allocation updated successfully'}), 200
@@ -225,6 +233,7 @@ def delete_recurring_allocation(current_user, allocation_id):
         return jsonify({'message': 'Recurring allocation not found'}), 404
     
     db.session.delete(allocation)
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({'message': 'Recurring allocation deleted successfully'}), 200
@@ -234,7 +243,7 @@ def delete_recurring_allocation(current_user, allocation_id):
 @token_required
 def populate_current_budget_from_recurring(current_user):
     """Manually populate the current active budget with recurring sources."""
-    from ..services import BudgetService
+    from ...services import BudgetService
     
     success = BudgetService.populate_from_recurring(current_user.id)
     if not success:
@@ -0,0 +1,99 @@
+"""
+Categorization rule API routes.
+"""
+
+from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
+from ...auth import token_required, subscription_required
+from ...services import CategorizationService
+from ...schemas import CategorizationRuleSchema, CategorizationLearnSchema
+from ...utils.validation import handle_validation_error
+from ...utils.data_version import conditional_get
+from ...extensions import limiter
+
+rules_bp = Blueprint('rules', __name__, url_prefix='/rules')
+
+
+@rules_bp.route('', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def get_rules(current_user):
+    """Get the current user's categorization rules in precedence order."""
+    return jsonify(CategorizationService.get_rules(current_user.id)), 200
+
+
+@rules_bp.route('', methods=['POST'])
+@token_required
+@subscription_required
+def create_rule(current_user):
+    """Create a categorization rule."""
+    schema = CategorizationRuleSchema()
+    
+    try:
+        validated_data = schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    try:
+        rule = CategorizationService.create_rule(current_user.id, **validated_data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return jsonify(rule), 201
+
+
+@rules_bp.route('/<int:rule_id>', methods=['PUT'])
+@token_required
+@subscription_required
+def update_rule(current_user, rule_id):
+    """Update a categorization rule."""
+    schema = CategorizationRuleSchema()
+    
+    try:
+        validated_data = schema.load(request.get_json() or {}, partial=True)
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    if not validated_data:
+        return jsonify({'message': 'No valid fields to update'}), 400
+    
+    try:
+        rule = CategorizationService.update_rule(rule_id, current_user.id, **validated_data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if not rule:
+        return jsonify({'message': 'Rule not found'}), 404
+    
+    return jsonify(rule), 200
+
+
+@rules_bp.route('/<int:rule_id>', methods=['DELETE'])
+@token_required
+@subscription_required
+def delete_rule(current_user, rule_id):
+    """Delete a categorization rule."""
+    if not CategorizationService.delete_rule(rule_id, current_user.id):
+        return jsonify({'message': 'Rule not found'}), 404
+    
+    return jsonify({'message': 'Rule deleted successfully'}), 200
+
+
+@rules_bp.route('/learn', methods=['POST'])
+@token_required
+@subscription_required
+def learn_rules(current_user):
+    """Create rules from how the user has categorized past transactions."""
+    schema = CategorizationLearnSchema()
+    
+    try:
+        validated_data = schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    rules = CategorizationService.learn_rules(current_user.id, **validated_data)
+    return jsonify({
+        'rules': rules,
+        'created': 0 if validated_data['dry_run'] else len(rules)
+    }), 200
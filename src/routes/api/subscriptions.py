@@ -9,6 +9,7 @@ from ...services.subscription_service import SubscriptionService, MONTHLY_PRICE_
 from ...services.payfast_service import PayFastService
 from ...extensions import db
 from ...models.subscription import SubscriptionPlan, Subscription
+from ...utils.streaming import stream_json_response, STREAM_BATCH_SIZE
 
 
 subscriptions_bp = Blueprint('subscriptions', __name__, url_prefix='/subscriptions')
@@ -480,148 +481,161 @@ def toggle_enforcement(current_user):
 
 
 # Admin reporting endpoints
+def _safe_isoformat(dt):
+    """Serialize a datetime field that may be missing or stored as a string."""
+    if dt is None:
+        return None
+    if hasattr(dt, 'isoformat'):
+        return dt.isoformat()
+    return str(dt)
+
+
 @subscriptions_bp.route('/admin/subscriptions', methods=['GET'])
 @admin_required
 def admin_subscriptions(current_user):
-    """Admin endpoint to get all subscriptions with stats."""
+    """
+    Admin endpoint to get all subscriptions with stats.
+    
+    Subscriptions are streamed from a server-side cursor; stats are accumulated
+    while the list is written and follow it in the response object.
+    """
     try:
-        from ...models.subscription import Subscription
-        
-        subscriptions = Subscription.query.order_by(Subscription.created_at.desc()).all()
-        
-        # Calculate stats
-        stats = {
-            'total': len(subscriptions),
-            'by_status': {},
-            'by_plan': {},
-        }
-        
-        for sub in subscriptions:
-            # Count by status
-            status = sub.status or 'unknown'
-            stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
-            
-            # Count by plan
-            plan = sub.plan_code or 'unknown'
-            stats['by_plan'][plan] = stats['by_plan'].get(plan, 0) + 1
-        
-        # Serialize subscriptions
-        subscriptions_data = []
-        for sub in subscriptions:
-            try:
-                # Safely serialize datetime fields
-                def safe_isoformat(dt):
-                    if dt is None:
-                        return None
-                    if hasattr(dt, 'isoformat'):
-                        return dt.isoformat()
-                    return str(dt)
-                
-                subscriptions_data.append({
-                    'id': sub.id,
-                    'user_id': sub.user_id,
-                    'user_email': sub.user.email if sub.user else None,
-                    'plan_code': sub.plan_code,
-                    'status': sub.status,
-                    'started_at': safe_isoformat(sub.started_at),
-                    'current_period_start': safe_isoformat(sub.current_period_start),
-                    'current_period_end': safe_isoformat(sub.current_period_end),
-                    'payfast_subscription_id': sub.payfast_subscription_id,
-                    'cancel_at': safe_isoformat(sub.cancel_at),
-                    'cancelled_at': safe_isoformat(sub.cancelled_at),
-                    'created_at': safe_isoformat(sub.created_at),
-                })
-            except Exception as e:
-                current_app.logger.error(f"Error serializing subscription {sub.id}: {e}")
-                import traceback
-                current_app.logger.error(traceback.format_exc())
-                # Skip this subscription if there's an error
-                continue
+        from ...models import User
         
-        return jsonify({
-            'subscriptions': subscriptions_data,
-            'stats': stats
-        }), 200
+        rows = db.session.execute(
+            db.select(Subscription, User.email).outerjoin(
+                User, Subscription.user_id == User.id
+            ).order_by(
+                Subscription.created_at.desc()
+            ).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
     except Exception as e:
         current_app.logger.error(f"Error in admin_subscriptions: {e}")
         import traceback
         current_app.logger.error(traceback.format_exc())
         return jsonify({'message': f'Error loading subscriptions: {str(e)}'}), 500
+    
+    stats = {
+        'total': 0,
+        'by_status': {},
+        'by_plan': {},
+    }
+    
+    def serialize(row):
+        sub, user_email = row
+        
+        stats['total'] += 1
+        # Count by status
+        status = sub.status or 'unknown'
+        stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
+        # Count by plan
+        plan = sub.plan_code or 'unknown'
+        stats['by_plan'][plan] = stats['by_plan'].get(plan, 0) + 1
+        
+        try:
+            return {
+                'id': sub.id,
+                'user_id': sub.user_id,
+                'user_email': user_email,
+                'plan_code': sub.plan_code,
+                'status': sub.status,
+                'started_at': _safe_isoformat(sub.started_at),
+                'current_period_start': _safe_isoformat(sub.current_period_start),
+                'current_period_end': _safe_isoformat(sub.current_period_end),
+                'payfast_subscription_id': sub.payfast_subscription_id,
+                'cancel_at': _safe_isoformat(sub.cancel_at),
+                'cancelled_at': _safe_isoformat(sub.cancelled_at),
+                'created_at': _safe_isoformat(sub.created_at),
+            }
+        except Exception as e:
+            current_app.logger.error(f"Error serializing subscription {sub.id}: {e}")
+            import traceback
+            current_app.logger.error(traceback.format_exc())
+            # Skip this subscription if there's an error
+            return None
+    
+    return stream_json_response(
+        rows,
+        serialize,
+        key='subscriptions',
+        trailer=lambda: {'stats': stats}
+    )
 
 
 @subscriptions_bp.route('/admin/payments', methods=['GET'])
 @admin_required
 def admin_payments(current_user):
-    """Admin endpoint to get all payments with stats."""
+    """
+    Admin endpoint to get the latest payments with stats.
+    
+    Payments are streamed from a server-side cursor; stats are accumulated
+    while the list is written and follow it in the response object.
+    """
     try:
+        from ...models import User
         from ...models.subscription import Payment
         
-        payments = Payment.query.order_by(Payment.created_at.desc()).limit(500).all()
-        
-        # Calculate stats
-        stats = {
-            'total': len(payments),
-            'by_status': {},
-            'total_revenue_cents': 0,
-            'total_revenue_by_currency': {},
-            'by_gateway': {},
-        }
-        
-        for payment in payments:
-            # Count by status
-            status = payment.status or 'unknown'
-            stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
-            
-            # Sum revenue for paid payments
-            if payment.status == 'paid':
-                stats['total_revenue_cents'] += payment.amount_cents
-                currency = payment.currency or 'ZAR'
-                stats['total_revenue_by_currency'][currency] = stats['total_revenue_by_currency'].get(currency, 0) + payment.amount_cents
-            
-            # Count by gateway
-            gateway = payment.gateway or 'unknown'
-            stats['by_gateway'][gateway] = stats['by_gateway'].get(gateway, 0) + 1
-        
-        # Serialize payments
-        payments_data = []
-        for p in payments:
-            try:
-                # Safely serialize datetime fields
-                def safe_isoformat(dt):
-                    if dt is None:
-                        return None
-                    if hasattr(dt, 'isoformat'):
-                        return dt.isoformat()
-                    return str(dt)
-                
-                payments_data.append({
-                    'id': p.id,
-                    'user_id': p.user_id,
-                    'user_email': p.user.email if p.user else None,
-                    'subscription_id': p.subscription_id,
-                    'amount_cents': p.amount_cents,
-                    'currency': p.currency,
-                    'status': p.status,
-                    'gateway': p.gateway,
-                    'gateway_reference': p.gateway_reference,
-                    'paid_at': safe_isoformat(p.paid_at),
-                    'created_at': safe_isoformat(p.created_at),
-                })
-            except Exception as e:
-                current_app.logger.error(f"Error serializing payment {p.id}: {e}")
-                import traceback
-                current_app.logger.error(traceback.format_exc())
-                # Skip this payment if there's an error
-                continue
-        
-        return jsonify({
-            'payments': payments_data,
-            'stats': stats
-        }), 200
+        rows = db.session.execute(
+            db.select(Payment, User.email).outerjoin(
+                User, Payment.user_id == User.id
+            ).order_by(
+                Payment.created_at.desc()
+            ).limit(500).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
     except Exception as e:
         current_app.logger.error(f"Error in admin_payments: {e}")
         import traceback
         current_app.logger.error(traceback.format_exc())
         return jsonify({'message': f'Error loading payments: {str(e)}'}), 500
-
-
+    
+    stats = {
+        'total': 0,
+        'by_status': {},
+        'total_revenue_cents': 0,
+        'total_revenue_by_currency': {},
+        'by_gateway': {},
+    }
+    
+    def serialize(row):
+        p, user_email = row
+        
+        stats['total'] += 1
+        # Count by status
+        status = p.status or 'unknown'
+        stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
+        # Sum revenue for paid payments
+        if p.status == 'paid':
+            stats['total_revenue_cents'] += p.amount_cents
+            currency = p.currency or 'ZAR'
+            stats['total_revenue_by_currency'][currency] = stats['total_revenue_by_currency'].get(currency, 0) + p.amount_cents
+        # Count by gateway
+        gateway = p.gateway or 'unknown'
+        stats['by_gateway'][gateway] = stats['by_gateway'].get(gateway, 0) + 1
+        
+        try:
+            return {
+                'id': p.id,
+                'user_id': p.user_id,
+                'user_email': user_email,
+                'subscription_id': p.subscription_id,
+                'amount_cents': p.amount_cents,
+                'currency': p.currency,
+                'status': p.status,
+                'gateway': p.gateway,
+                'gateway_reference': p.gateway_reference,
+                'paid_at': _safe_isoformat(p.paid_at),
+                'created_at': _safe_isoformat(p.created_at),
+            }
+        except Exception as e:
+            current_app.logger.error(f"Error serializing payment {p.id}: {e}")
+            import traceback
+            current_app.logger.error(traceback.format_exc())
+            # Skip this payment if there's an error
+            return None
+    
+    return stream_json_response(
+        rows,
+        serialize,
+        key='payments',
+        trailer=lambda: {'stats': stats}
+    )
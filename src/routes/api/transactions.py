@@ -2,13 +2,20 @@
 Transactions API routes.
 """
 
+import io
 from flask import Blueprint, request, jsonify
 from marshmallow import ValidationError
 from ...auth import token_required, subscription_required
-from ...services import TransactionService
+from ...services import TransactionService, TransactionImportService, CategorizationService
 from ...extensions import csrf, limiter
-from ...schemas import TransactionSchema, TransactionUpdateSchema
+from ...schemas import (
+    TransactionSchema, TransactionUpdateSchema, TransactionListQuerySchema,
+    TransactionImportSchema, TransactionBatchSchema, TransactionSearchQuerySchema
+)
+from ...utils.statements import detect_format
 from ...utils.validation import handle_validation_error
+from ...utils.data_version import conditional_get
+from ...utils.streaming import stream_json_response
 
 transactions_bp = Blueprint('transactions', __name__, url_prefix='/transactions')
 
@@ -20,42 +27,180 @@ csrf.exempt(transactions_bp)
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
 @subscription_required
+@conditional_get
 def get_transactions(current_user):
-    """Get all transactions for the current user."""
-    transactions = TransactionService.get_user_transactions(current_user.id)
-    return jsonify(transactions), 200
+    """
+    Get transactions for the current user.
+    
+    Without query parameters this returns every transaction in the active period as a
+    plain list. Passing any of limit, cursor, from, to, subcategory_id, category_id,
+    min_amount, max_amount, sign or period switches to keyset pagination and returns
+    {transactions, next_cursor, has_more}.
+    """
+    if not request.args:
+        # Streamed: the active period can hold an arbitrarily large history
+        return stream_json_response(TransactionService.iter_user_transactions(current_user.id))
+    
+    schema = TransactionListQuerySchema()
+    
+    try:
+        params = schema.load(request.args)
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    try:
+        page = TransactionService.list_transactions(current_user.id, **params)
+    except ValueError as e:
+        return jsonify({'message': str(e), 'errors': {'cursor': [str(e)]}}), 400
+    
+    return jsonify(page), 200
+
+
+@transactions_bp.route('/search', methods=['GET'])
+@limiter.exempt  # Exempt GET requests from rate limiting
+@token_required
+@subscription_required
+@conditional_get
+def search_transactions(current_user):
+    """Full-text search over the current user's transaction descriptions and comments."""
+    schema = TransactionSearchQuerySchema()
+    
+    try:
+        params = schema.load(request.args)
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    results = TransactionService.search_transactions(
+        current_user.id,
+        params['q'],
+        page=params['page'],
+        per_page=params['per_page']
+    )
+    return jsonify(results), 200
 
 
 @transactions_bp.route('', methods=['POST'])
 @token_required
 @subscription_required
 def create_transaction(current_user):
-    """Create a new transaction."""
+    """
+    Create a new transaction.
+    
+    subcategory_id may be omitted when one of the user's categorization rules
+    matches the description and amount.
+    """
     schema = TransactionSchema()
     
     try:
-        validated_data = schema.load(request.get_json() or {})
+        validated_data = schema.load(request.get_json() or {}, partial=('subcategory_id',))
     except ValidationError as err:
         return handle_validation_error(err)
     
+    subcategory_id = validated_data.get('subcategory_id')
+    auto_categorized = subcategory_id is None
+    if auto_categorized:
+        subcategory_id = CategorizationService.categorize(
+            current_user.id, validated_data.get('description'), validated_data['amount']
+        )
+        if subcategory_id is None:
+            message = 'Subcategory ID is required (no categorization rule matched)'
+            return jsonify({'message': message, 'errors': {'subcategory_id': [message]}}), 400
+    
     transaction = TransactionService.create_transaction(
         user_id=current_user.id,
         amount=validated_data['amount'],
-        subcategory_id=validated_data['subcategory_id'],
+        subcategory_id=subcategory_id,
         description=validated_data.get('description'),
         comment=validated_data.get('comment')
     )
     
+    # Flag (but keep) likely re-entries of an existing transaction
+    possible_duplicates = TransactionService.find_duplicates(
+        current_user.id,
+        transaction.amount,
+        transaction.description,
+        transaction.transaction_date,
+        exclude_id=transaction.id
+    )
+    
     return jsonify({
         'id': transaction.id,
         'amount': transaction.amount,
         'description': transaction.description,
         'comment': transaction.comment,
         'subcategory_id': transaction.subcategory_id,
-        'transaction_date': transaction.transaction_date.isoformat()
+        'transaction_date': transaction.transaction_date.isoformat(),
+        'auto_categorized': auto_categorized,
+        'possible_duplicates': possible_duplicates
     }), 201
 
 
+@transactions_bp.route('/import', methods=['POST'])
+@limiter.limit("20 per hour")
+@token_required
+@subscription_required
+def import_transactions(current_user):
+    """Import transactions from an uploaded CSV, OFX or QIF bank statement."""
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'message': 'Statement file is required'}), 400
+    
+    schema = TransactionImportSchema()
+    
+    try:
+        validated_data = schema.load(request.form)
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    file_format = validated_data['format'] or detect_format(upload.filename)
+    if not file_format:
+        return jsonify({'message': 'Could not determine statement format. Use a .csv, .ofx or .qif file or pass format.'}), 400
+    
+    # Decode the upload lazily so the statement is never held in memory as a whole
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+    
+    try:
+        report = TransactionImportService.import_transactions(
+            user_id=current_user.id,
+            stream=stream,
+            file_format=file_format,
+            default_subcategory_id=validated_data['default_subcategory_id'],
+            date_format=validated_data['date_format'],
+            skip_duplicates=validated_data['skip_duplicates']
+        )
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return jsonify(report), 200
+
+
+@transactions_bp.route('/batch', methods=['POST'])
+@token_required
+@subscription_required
+def batch_transactions(current_user):
+    """Apply a batch of transaction create/update/delete operations in one database transaction."""
+    schema = TransactionBatchSchema()
+    
+    try:
+        validated_data = schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return handle_validation_error(err)
+    
+    applied, results = TransactionService.apply_batch(current_user.id, validated_data['operations'])
+    if not applied:
+        return jsonify({
+            'message': 'Batch validation failed. No operations were applied.',
+            'applied': False,
+            'results': results
+        }), 400
+    
+    return jsonify({
+        'message': f'Applied {len(results)} operations',
+        'applied': True,
+        'results': results
+    }), 200
+
+
 @transactions_bp.route('/<int:transaction_id>', methods=['PUT'])
 @token_required
 @subscription_required
@@ -4,8 +4,10 @@ User API routes.
 
 from flask import Blueprint, request, jsonify
 from ...auth import token_required, get_current_user
-from ...services import UserService, EmailService
+from ...services import UserService, EmailService, SpendingAggregator, TransactionService
 from ...utils.currency import get_currency_symbol
+from ...utils.data_version import bump_data_version, conditional_get
+from ...utils.active_budget import ActiveBudgetContext
 from ...extensions import db, limiter
 
 user_bp = Blueprint('user', __name__, url_prefix='/user')
@@ -14,6 +16,7 @@ user_bp = Blueprint('user', __name__, url_prefix='/user')
 @user_bp.route('/profile')
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
+@conditional_get
 def get_user_profile(current_user):
     """Get current user profile."""
     
@@ -35,18 +38,10 @@ def get_user_profile(current_user):
 @user_bp.route('/settings', methods=['GET'])
 @limiter.exempt  # Exempt GET requests from rate limiting
 @token_required
+@conditional_get
 def get_user_settings(current_user):
     """Get user settings."""
-    return jsonify({
-        'username': current_user.username,
-        'email': current_user.email,
-        'first_name': current_user.first_name,
-        'last_name': current_user.last_name,
-        'display_name': current_user.display_name,
-        'currency': current_user.currency,
-        'theme': current_user.theme,
-        'email_verified': current_user.email_verified
-    }), 200
+    return jsonify(UserService.get_user_settings(current_user)), 200
 
 
 @user_bp.route('/settings', methods=['PUT'])
@@ -170,11 +165,17 @@ def export_user_data(current_user):
         summary_ws.append([])
         
         # Get active budget period for summary
-        from ...models import BudgetPeriod, Budget, BudgetAllocation, Category, Subcategory, Transaction
+        from ...models import BudgetAllocation, Category, Transaction, ArchivedTransaction
         
-        active_period = BudgetPeriod.query.filter_by(user_id=current_user.id, is_active=True).first()
+        active_period = ActiveBudgetContext.resolve(current_user.id)
+        period_totals = {}
+        period_summary = None
         if active_period:
-            budget = Budget.query.filter_by(period_id=active_period.id, user_id=current_user.id).first()
+            period_totals = SpendingAggregator.period_totals(current_user.id, active_period.period_id)
+            period_summary = SpendingAggregator.summarize(period_totals)
+        
+        if active_period:
+            budget = active_period.budget()
             if budget:
                 # Calculate total income matching dashboard calculation (income sources + balance brought forward)
                 total_income_from_sources = sum(source.amount for source in budget.income_sources)
@@ -184,13 +185,8 @@ def export_user_data(current_user):
                 # Calculate total allocated and spent amounts
                 total_allocated = sum(allocation.allocated_amount for allocation in budget.allocations)
                 
-                # Calculate total spent from transactions within the active period
-                user_subcategory_ids = db.session.query(Subcategory.id).join(Category).filter(Category.user_id == current_user.id).subquery()
-                total_spent = db.session.query(db.func.sum(Transaction.amount)).filter(
-                    Transaction.subcategory_id.in_(user_subcategory_ids),
-                    Transaction.transaction_date >= active_period.start_date,
-                    Transaction.transaction_date <= active_period.end_date
-                ).scalar() or 0
+                # Expenses within the active period, as a positive value
+                total_spent = period_summary['spent_total']
                 
                 # Calculate remaining amounts
                 remaining_to_allocate = total_income - total_allocated
@@ -234,24 +230,19 @@ def export_user_data(current_user):
                 summary_ws.append([])
         
         # Get comprehensive transaction summary
-        all_transactions = Transaction.query.filter_by(user_id=current_user.id).all()
-        total_all_transactions = len(all_transactions)
-        total_all_spent = sum(t.amount for t in all_transactions)
-        
-        # Get transactions for current period only
-        current_period_transactions = []
-        if active_period:
-            current_period_transactions = Transaction.query.filter_by(user_id=current_user.id).filter(
-                Transaction.transaction_date >= active_period.start_date,
-                Transaction.transaction_date <= active_period.end_date
-            ).all()
+        all_time_totals = SpendingAggregator.summarize(SpendingAggregator.range_totals(current_user.id))
+        total_all_transactions = (
+            Transaction.query.filter_by(user_id=current_user.id).count()
+            + ArchivedTransaction.query.filter_by(user_id=current_user.id).count()
+        )
+        total_all_spent = all_time_totals['spent_total']
         
         summary_ws.append(["TRANSACTION SUMMARY"])
         summary_ws.append([f"Total Transactions (All Time): {total_all_transactions}"])
         summary_ws.append([f"Total Spent (All Time): {get_currency_symbol(current_user.currency)}{total_all_spent:,.2f}"])
         if active_period:
-            summary_ws.append([f"Transactions This Period: {len(current_period_transactions)}"])
-            summary_ws.append([f"Spent This Period: {get_currency_symbol(current_user.currency)}{sum(t.amount for t in current_period_transactions):,.2f}"])
+            summary_ws.append([f"Transactions This Period: {period_summary['spent_count'] + period_summary['income_count']}"])
+            summary_ws.append([f"Spent This Period: {get_currency_symbol(current_user.currency)}{period_summary['spent_total']:,.2f}"])
         else:
             summary_ws.append(["No Active Budget Period"])
             summary_ws.append(["Please create a budget period to track spending"])
@@ -286,7 +277,7 @@ def export_user_data(current_user):
                 period_name = "No Active Period"
                 
                 if active_period:
-                    budget = Budget.query.filter_by(period_id=active_period.id, user_id=current_user.id).first()
+                    budget = active_period.budget()
                     if budget:
                         allocation = BudgetAllocation.query.filter_by(
                             budget_id=budget.id,
@@ -296,15 +287,9 @@ def export_user_data(current_user):
                             allocated = allocation.allocated_amount
                         period_name = active_period.name
                         
-                        # Calculate spent amount
-                        spent_transactions = Transaction.query.filter_by(
-                            user_id=current_user.id,
-                            subcategory_id=subcategory.id
-                        ).filter(
-                            Transaction.transaction_date >= active_period.start_date,
-                            Transaction.transaction_date <= active_period.end_date
-                        ).all()
-                        spent = sum(t.amount for t in spent_transactions)
+                        totals = period_totals.get(subcategory.id)
+                        if totals:
+                            spent = totals['spent_total']
                 
                 remaining = allocated - spent
                 allocations_ws.append([
@@ -336,6 +321,58 @@ def export_user_data(current_user):
             adjusted_width = min(max_length + 2, 50)
             allocations_ws.column_dimensions[column_letter].width = adjusted_width
         
+        # Create Period History Sheet from the closed periods' snapshots
+        from ...models import BudgetPeriod, PeriodSnapshot
+        history_ws = wb.create_sheet("Period History")
+        history_ws.append([
+            "Period", "Start Date", "End Date", "Total Income", "Brought Forward",
+            "Allocated", "Spent", "Carried Forward"
+        ])
+        
+        # Style header row
+        for cell in history_ws[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = Alignment(horizontal="center")
+            cell.border = border
+        
+        history = db.session.query(PeriodSnapshot, BudgetPeriod).join(
+            BudgetPeriod, PeriodSnapshot.budget_period_id == BudgetPeriod.id
+        ).filter(
+            PeriodSnapshot.user_id == current_user.id
+        ).order_by(BudgetPeriod.start_date, BudgetPeriod.id)
+        for snapshot, period in history:
+            history_ws.append([
+                period.name,
+                period.start_date.strftime('%Y-%m-%d'),
+                period.end_date.strftime('%Y-%m-%d'),
+                snapshot.total_income,
+                snapshot.balance_brought_forward,
+                snapshot.total_allocated,
+                snapshot.total_spent,
+                snapshot.carry_forward
+            ])
+        
+        # Style period history data rows
+        for row in history_ws.iter_rows(min_row=2):
+            for cell in row:
+                cell.border = border
+                if cell.column >= 4:  # Amount columns
+                    cell.number_format = '#,##0.00'
+        
+        # Auto-adjust column widths for period history
+        for column in history_ws.columns:
+            max_length = 0
+            column_letter = get_column_letter(column[0].column)
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = min(max_length + 2, 50)
+            history_ws.column_dimensions[column_letter].width = adjusted_width
+        
         # Create Transactions Sheet
         transactions_ws = wb.create_sheet("Transactions")
         transactions_ws.append(["Date", "Category", "Subcategory", "Amount", "Description", "Comment"])
@@ -347,18 +384,16 @@ def export_user_data(current_user):
             cell.alignment = Alignment(horizontal="center")
             cell.border = border
         
-        # Add transaction data
-        for transaction in all_transactions:
-            subcategory = Subcategory.query.get(transaction.subcategory_id)
-            category = Category.query.get(subcategory.category_id) if subcategory else None
-            
+        # Add transaction data, streamed from one joined query rather than loaded up front
+        for transaction in TransactionService.iter_user_transactions(current_user.id, active_period_only=False):
+            subcategory = transaction['subcategory']
             transactions_ws.append([
-                transaction.transaction_date.strftime('%Y-%m-%d') if transaction.transaction_date else '',
-                category.name if category else 'Unknown',
-                subcategory.name if subcategory else 'Unknown',
-                transaction.amount,
-                transaction.description or '',
-                transaction.comment or ''
+                transaction['transaction_date'][:10],
+                subcategory['category']['name'],
+                subcategory['name'],
+                transaction['amount'],
+                transaction['description'] or '',
+                transaction['comment'] or ''
             ])
         
         # Style transaction data rows
@@ -414,6 +449,7 @@ def update_user_theme(current_user):
         return jsonify({'message': 'Invalid theme. Must be "light" or "dark"'}), 400
     
     current_user.theme = theme
+    bump_data_version(current_user.id)
     db.session.commit()
     
     return jsonify({'message': 'Theme updated successfully'}), 200
@@ -2,25 +2,38 @@
 Marshmallow schemas for input validation.
 """
 
-from .transaction_schema import TransactionSchema, TransactionUpdateSchema
+from .transaction_schema import (
+    TransactionSchema, TransactionUpdateSchema, TransactionListQuerySchema,
+    TransactionImportRowSchema, TransactionImportSchema,
+    TransactionBatchOperationSchema, TransactionBatchSchema, TransactionSearchQuerySchema
+)
 from .category_schema import CategorySchema, SubcategorySchema, CategoryUpdateSchema, SubcategoryUpdateSchema
 from .budget_schema import (
-    BudgetPeriodSchema, BudgetPeriodUpdateSchema, BudgetUpdateSchema,
+    BudgetPeriodSchema, BudgetPeriodUpdateSchema, BudgetPeriodCloneSchema, BudgetUpdateSchema,
     BudgetAllocationSchema, BudgetAllocationsUpdateSchema,
     IncomeSourceSchema, IncomeSourceUpdateSchema
 )
 from .account_schema import AccountSchema, AccountUpdateSchema
 from .user_schema import OnboardingSchema, ContactFormSchema
+from .analytics_schema import SpendingSeriesQuerySchema, PeriodComparisonQuerySchema
+from .categorization_schema import CategorizationRuleSchema, CategorizationLearnSchema
 
 __all__ = [
     'TransactionSchema',
     'TransactionUpdateSchema',
+    'TransactionListQuerySchema',
+    'TransactionImportRowSchema',
+    'TransactionImportSchema',
+    'TransactionBatchOperationSchema',
+    'TransactionBatchSchema',
+    'TransactionSearchQuerySchema',
     'CategorySchema',
     'SubcategorySchema',
     'CategoryUpdateSchema',
     'SubcategoryUpdateSchema',
     'BudgetPeriodSchema',
     'BudgetPeriodUpdateSchema',
+    'BudgetPeriodCloneSchema',
     'BudgetUpdateSchema',
     'BudgetAllocationSchema',
     'BudgetAllocationsUpdateSchema',
@@ -30,5 +43,9 @@ __all__ = [
     'AccountUpdateSchema',
     'OnboardingSchema',
     'ContactFormSchema',
+    'SpendingSeriesQuerySchema',
+    'PeriodComparisonQuerySchema',
+    'CategorizationRuleSchema',
+    'CategorizationLearnSchema',
 ]
 
@@ -0,0 +1,71 @@
+"""
+Analytics validation schemas.
+"""
+
+from marshmallow import Schema, fields, validate, ValidationError, validates_schema, EXCLUDE
+
+
+class SpendingSeriesQuerySchema(Schema):
+    """Schema for spending series query parameters."""
+    class Meta:
+        unknown = EXCLUDE  # Ignore unknown query parameters
+    
+    # Longest range a single series request may cover
+    MAX_RANGE_DAYS = 1830
+    
+    bucket = fields.Str(
+        load_default='day',
+        validate=validate.OneOf(['day', 'week', 'month']),
+        error_messages={
+            'validator_failed': 'Bucket must be one of: day, week, month'
+        }
+    )
+    date_from = fields.Date(
+        data_key='from',
+        load_default=None,
+        error_messages={
+            'invalid': 'From date must be a valid date (YYYY-MM-DD)'
+        }
+    )
+    date_to = fields.Date(
+        data_key='to',
+        load_default=None,
+        error_messages={
+            'invalid': 'To date must be a valid date (YYYY-MM-DD)'
+        }
+    )
+    group_by = fields.Str(
+        load_default='category',
+        validate=validate.OneOf(['category', 'subcategory']),
+        error_messages={
+            'validator_failed': 'Group by must be one of: category, subcategory'
+        }
+    )
+    
+    @validates_schema
+    def validate_range(self, data, **kwargs):
+        """Ensure the date range is not inverted or too long."""
+        date_from = data.get('date_from')
+        date_to = data.get('date_to')
+        if date_from and date_to:
+            if date_from > date_to:
+                raise ValidationError('From date must be on or before to date', field_name='from')
+            if (date_to - date_from).days > self.MAX_RANGE_DAYS:
+                raise ValidationError(
+                    f'Date range must not exceed {self.MAX_RANGE_DAYS} days', field_name='from'
+                )
+
+
+class PeriodComparisonQuerySchema(Schema):
+    """Schema for budget period comparison query parameters."""
+    class Meta:
+        unknown = EXCLUDE  # Ignore unknown query parameters
+    
+    last = fields.Int(
+        load_default=6,
+        validate=validate.Range(min=1, max=36),
+        error_messages={
+            'invalid': 'Last must be a valid integer',
+            'validator_failed': 'Last must be between 1 and 36'
+        }
+    )
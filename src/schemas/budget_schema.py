@@ -223,6 +223,26 @@ class BudgetPeriodUpdateSchema(Schema):
         return data
 
 
+class BudgetPeriodCloneSchema(BudgetPeriodSchema):
+    """Schema for cloning a budget period into a new one."""
+    period_type = fields.Str(
+        load_default=None,
+        validate=validate.OneOf(['monthly', 'quarterly', 'yearly', 'custom']),
+        allow_none=True,
+        error_messages={
+            'validator_failed': 'Period type must be one of: monthly, quarterly, yearly, custom'
+        }
+    )
+    scale = fields.Float(
+        load_default=1.0,
+        validate=validate.Range(min=0, max=100),
+        error_messages={
+            'invalid': 'Scale must be a valid number',
+            'validator_failed': 'Scale must be between 0 and 100'
+        }
+    )
+
+
 class BudgetUpdateSchema(Schema):
     """Schema for updating budget details."""
     total_income = fields.Float(
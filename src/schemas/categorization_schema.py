@@ -0,0 +1,99 @@
+"""
+Categorization rule validation schemas.
+"""
+
+from marshmallow import Schema, fields, validate, ValidationError, validates_schema, EXCLUDE
+from ..utils.rule_patterns import check_regex_pattern
+
+
+class CategorizationRuleSchema(Schema):
+    """Schema for creating or updating a categorization rule."""
+    subcategory_id = fields.Int(
+        required=True,
+        validate=validate.Range(min=1),
+        error_messages={
+            'required': 'Subcategory ID is required',
+            'invalid': 'Subcategory ID must be a valid integer',
+            'validator_failed': 'Subcategory ID must be greater than 0'
+        }
+    )
+    match_type = fields.Str(
+        load_default='contains',
+        validate=validate.OneOf(['contains', 'regex']),
+        error_messages={
+            'validator_failed': 'Match type must be one of: contains, regex'
+        }
+    )
+    pattern = fields.Str(
+        required=True,
+        validate=validate.Length(min=1, max=200),
+        error_messages={
+            'required': 'Pattern is required',
+            'validator_failed': 'Pattern must be between 1 and 200 characters'
+        }
+    )
+    min_amount = fields.Float(
+        allow_none=True,
+        load_default=None,
+        error_messages={
+            'invalid': 'Minimum amount must be a valid number'
+        }
+    )
+    max_amount = fields.Float(
+        allow_none=True,
+        load_default=None,
+        error_messages={
+            'invalid': 'Maximum amount must be a valid number'
+        }
+    )
+    priority = fields.Int(
+        load_default=0,
+        validate=validate.Range(min=-1000, max=1000),
+        error_messages={
+            'invalid': 'Priority must be a valid integer',
+            'validator_failed': 'Priority must be between -1000 and 1000'
+        }
+    )
+
+    @validates_schema
+    def validate_rule(self, data, **kwargs):
+        """Check regex patterns work in the combined matcher and amount bounds are ordered."""
+        if data.get('match_type', 'contains') == 'regex' and data.get('pattern'):
+            try:
+                check_regex_pattern(data['pattern'])
+            except ValueError as e:
+                raise ValidationError(str(e), field_name='pattern')
+
+        min_amount = data.get('min_amount')
+        max_amount = data.get('max_amount')
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise ValidationError('Minimum amount must not exceed maximum amount', field_name='min_amount')
+
+
+class CategorizationLearnSchema(Schema):
+    """Schema for learning categorization rules from transaction history."""
+    class Meta:
+        unknown = EXCLUDE  # Ignore unknown fields
+
+    min_occurrences = fields.Int(
+        load_default=3,
+        validate=validate.Range(min=1, max=1000),
+        error_messages={
+            'invalid': 'Minimum occurrences must be a valid integer',
+            'validator_failed': 'Minimum occurrences must be between 1 and 1000'
+        }
+    )
+    min_share = fields.Float(
+        load_default=0.9,
+        validate=validate.Range(min=0.5, max=1),
+        error_messages={
+            'invalid': 'Minimum share must be a valid number',
+            'validator_failed': 'Minimum share must be between 0.5 and 1'
+        }
+    )
+    dry_run = fields.Bool(
+        load_default=False,
+        error_messages={
+            'invalid': 'Dry run must be true or false'
+        }
+    )
@@ -2,7 +2,7 @@
 Transaction validation schemas.
 """
 
-from marshmallow import Schema, fields, validate, ValidationError, pre_load, EXCLUDE
+from marshmallow import Schema, fields, validate, ValidationError, pre_load, validates_schema, EXCLUDE
 from markupsafe import escape
 
 
@@ -136,3 +136,205 @@ class TransactionUpdateSchema(Schema):
             data['comment'] = escape(str(data['comment'])).strip()
         return data
 
+
+
+class TransactionListQuerySchema(Schema):
+    """Schema for transaction listing query parameters (filters and keyset pagination)."""
+    class Meta:
+        unknown = EXCLUDE  # Ignore unknown query parameters
+    
+    limit = fields.Int(
+        load_default=50,
+        validate=validate.Range(min=1, max=500),
+        error_messages={
+            'invalid': 'Limit must be a valid integer',
+            'validator_failed': 'Limit must be between 1 and 500'
+        }
+    )
+    cursor = fields.Str(load_default=None)
+    date_from = fields.Date(
+        data_key='from',
+        load_default=None,
+        error_messages={
+            'invalid': 'From date must be a valid date (YYYY-MM-DD)'
+        }
+    )
+    date_to = fields.Date(
+        data_key='to',
+        load_default=None,
+        error_messages={
+            'invalid': 'To date must be a valid date (YYYY-MM-DD)'
+        }
+    )
+    subcategory_id = fields.Int(
+        load_default=None,
+        validate=validate.Range(min=1),
+        error_messages={
+            'invalid': 'Subcategory ID must be a valid integer',
+            'validator_failed': 'Subcategory ID must be greater than 0'
+        }
+    )
+    category_id = fields.Int(
+        load_default=None,
+        validate=validate.Range(min=1),
+        error_messages={
+            'invalid': 'Category ID must be a valid integer',
+            'validator_failed': 'Category ID must be greater than 0'
+        }
+    )
+    min_amount = fields.Float(
+        load_default=None,
+        error_messages={
+            'invalid': 'Minimum amount must be a valid number'
+        }
+    )
+    max_amount = fields.Float(
+        load_default=None,
+        error_messages={
+            'invalid': 'Maximum amount must be a valid number'
+        }
+    )
+    sign = fields.Str(
+        load_default=None,
+        validate=validate.OneOf(['expense', 'income']),
+        error_messages={
+            'validator_failed': 'Sign must be one of: expense, income'
+        }
+    )
+    period = fields.Str(
+        load_default='active',
+        validate=validate.OneOf(['active', 'all']),
+        error_messages={
+            'validator_failed': 'Period must be one of: active, all'
+        }
+    )
+    
+    @validates_schema
+    def validate_ranges(self, data, **kwargs):
+        """Ensure range filters are not inverted."""
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise ValidationError('From date must be on or before to date', field_name='from')
+        min_amount = data.get('min_amount')
+        max_amount = data.get('max_amount')
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise ValidationError('Minimum amount must not exceed maximum amount', field_name='min_amount')
+
+
+class TransactionImportRowSchema(TransactionSchema):
+    """Schema for one row of an imported bank statement.
+    
+    Statement amounts are already signed (debits negative, credits positive), so
+    unlike manual entry positive amounts are kept as income.
+    """
+    
+    def process_amount(self, data, **kwargs):
+        """Keep the statement's sign (overrides the manual-entry pre_load hook)."""
+        return data
+
+
+class TransactionImportSchema(Schema):
+    """Schema for the form fields sent with a statement upload."""
+    class Meta:
+        unknown = EXCLUDE  # Ignore unknown fields
+    
+    format = fields.Str(
+        load_default=None,
+        validate=validate.OneOf(['csv', 'ofx', 'qif']),
+        error_messages={
+            'validator_failed': 'Format must be one of: csv, ofx, qif'
+        }
+    )
+    default_subcategory_id = fields.Int(
+        load_default=None,
+        validate=validate.Range(min=1),
+        error_messages={
+            'invalid': 'Default subcategory ID must be a valid integer',
+            'validator_failed': 'Default subcategory ID must be greater than 0'
+        }
+    )
+    date_format = fields.Str(
+        load_default=None,
+        validate=validate.Length(max=20),
+        error_messages={
+            'validator_failed': 'Date format must be 20 characters or less'
+        }
+    )
+    skip_duplicates = fields.Bool(
+        load_default=True,
+        error_messages={
+            'invalid': 'Skip duplicates must be true or false'
+        }
+    )
+
+
+class TransactionBatchOperationSchema(Schema):
+    """Schema for one operation in a transaction batch request."""
+    op = fields.Str(
+        required=True,
+        validate=validate.OneOf(['create', 'update', 'delete']),
+        error_messages={
+            'required': 'Operation type is required',
+            'validator_failed': 'Operation must be one of: create, update, delete'
+        }
+    )
+    id = fields.Int(
+        load_default=None,
+        validate=validate.Range(min=1),
+        error_messages={
+            'invalid': 'Transaction ID must be a valid integer',
+            'validator_failed': 'Transaction ID must be greater than 0'
+        }
+    )
+    data = fields.Dict(load_default=dict)
+    
+    @validates_schema
+    def validate_target(self, data, **kwargs):
+        """Require an ID for updates and deletes and a payload for creates and updates."""
+        if data['op'] in ('update', 'delete') and data.get('id') is None:
+            raise ValidationError('Transaction ID is required for update and delete operations', field_name='id')
+        if data['op'] in ('create', 'update') and not data.get('data'):
+            raise ValidationError('Data is required for create and update operations', field_name='data')
+
+
+class TransactionBatchSchema(Schema):
+    """Schema for a batch of transaction create/update/delete operations."""
+    operations = fields.List(
+        fields.Nested(TransactionBatchOperationSchema),
+        required=True,
+        validate=validate.Length(min=1, max=1000),
+        error_messages={
+            'required': 'Operations are required',
+            'validator_failed': 'A batch must contain between 1 and 1000 operations'
+        }
+    )
+
+
+class TransactionSearchQuerySchema(Schema):
+    """Schema for transaction search query parameters."""
+    class Meta:
+        unknown = EXCLUDE  # Ignore unknown query parameters
+    
+    q = fields.Str(
+        required=True,
+        validate=validate.Length(min=1, max=200),
+        error_messages={
+            'required': 'Search query is required',
+            'validator_failed': 'Search query must be between 1 and 200 characters'
+        }
+    )
+    page = fields.Int(
+        load_default=1,
+        validate=validate.Range(min=1, max=1000),
+        error_messages={
+            'invalid': 'Page must be a valid integer',
+            'validator_failed': 'Page must be between 1 and 1000'
+        }
+    )
+    per_page = fields.Int(
+        load_default=25,
+        validate=validate.Range(min=1, max=100),
+        error_messages={
+            'invalid': 'Per page must be a valid integer',
+            'validator_failed': 'Per page must be between 1 and 100'
+        }
+    )
@@ -9,6 +9,16 @@ from .transaction_service import TransactionService
 from .budget_service import BudgetService
 from .account_service import AccountService
 from .email_service import EmailService
+from .import_service import TransactionImportService
+from .spending_rollup_service import SpendingRollupService
+from .spending_aggregator import SpendingAggregator
+from .analytics_service import AnalyticsService
+from .categorization_service import CategorizationService, RuleMatcher
+from .archive_service import TransactionArchiveService
+from .rollover_service import BudgetRolloverService
+from .dashboard_service import DashboardService
+from .snapshot_service import PeriodSnapshotService
+from .forecast_service import ForecastService
 
 __all__ = [
     'AuthService',
@@ -17,5 +27,16 @@ __all__ = [
     'TransactionService',
     'BudgetService',
     'AccountService',
-    'EmailService'
+    'EmailService',
+    'TransactionImportService',
+    'SpendingRollupService',
+    'SpendingAggregator',
+    'AnalyticsService',
+    'CategorizationService',
+    'RuleMatcher',
+    'TransactionArchiveService',
+    'BudgetRolloverService',
+    'DashboardService',
+    'PeriodSnapshotService',
+    'ForecastService'
 ]
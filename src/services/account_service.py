@@ -5,6 +5,7 @@ Account service for managing financial accounts.
 from datetime import datetime
 from ..extensions import db
 from ..models import Account
+from ..utils.data_version import bump_data_version
 
 
 class AccountService:
@@ -43,6 +44,7 @@ class AccountService:
         )
         
         db.session.add(account)
+        bump_data_version(user_id)
         db.session.commit()
         return account
     
@@ -63,6 +65,7 @@ class AccountService:
                 setattr(account, key, value)
         
         account.updated_at = datetime.utcnow()
+        bump_data_version(user_id)
         db.session.commit()
         return account
     
@@ -80,46 +83,44 @@ class AccountService:
         
         account.is_active = False
         account.updated_at = datetime.utcnow()
+        bump_data_version(user_id)
         db.session.commit()
         return True
     
     @staticmethod
-    def get_balance_summary(user_id):
-        """Get balance summary for all accounts."""
-        accounts = Account.query.filter_by(user_id=user_id, is_active=True).all()
-        
-        total_accounts_balance = sum(account.current_balance for account in accounts)
-        
-        # Get app balance from active budget
-        from ..models import Budget, BudgetPeriod
+    def get_app_balance(user_id):
+        """Get the app balance: active budget income minus active period spending."""
+        from ..utils.active_budget import ActiveBudgetContext
         app_balance = 0
         try:
-            active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
+            active_period = ActiveBudgetContext.resolve(user_id)
             if active_period:
-                budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
+                budget = active_period.budget()
                 if budget:
                     # Calculate app balance as total income minus total spent
                     total_income = (budget.total_income or 0) + (budget.balance_brought_forward or 0)
-                    
-                    # Calculate total spent from transactions
-                    from ..models import Transaction, Category, Subcategory
-                    from ..extensions import db
-                    user_subcategory_ids = db.session.query(Subcategory.id).join(Category).filter(Category.user_id == user_id).subquery()
-                    # Get all transactions in the period
-                    transactions = Transaction.query.filter(
-                        Transaction.subcategory_id.in_(user_subcategory_ids),
-                        Transaction.transaction_date >= active_period.start_date,
-                        Transaction.transaction_date <= active_period.end_date
-                    ).all()
-                    
-                    # Calculate total spent as positive value (only count negative amounts as expenses)
-                    # This matches how category_service calculates spent amounts
-                    total_spent = sum(abs(t.amount) for t in transactions if t.amount < 0)
-                    
-                    app_balance = total_income - total_spent
+                    app_balance = total_income - (budget.total_spent or 0)
         except Exception as e:
             print(f"Error calculating app balance: {str(e)}")
             app_balance = 0
+        return app_balance
+    
+    @staticmethod
+    def get_balance_summary(user_id, app_balance=None):
+        """
+        Get balance summary for all accounts.
+        
+        Args:
+            user_id: User ID
+            app_balance: Optional app balance, when the caller has already worked
+                it out; defaults to get_app_balance()
+        """
+        accounts = Account.query.filter_by(user_id=user_id, is_active=True).all()
+        
+        total_accounts_balance = sum(account.current_balance for account in accounts)
+        
+        if app_balance is None:
+            app_balance = AccountService.get_app_balance(user_id)
         
         balance_difference = total_accounts_balance - app_balance
         alignment_percentage = 100 if app_balance == 0 else (total_accounts_balance / app_balance * 100) if app_balance > 0 else 0
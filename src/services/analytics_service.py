@@ -0,0 +1,256 @@
+"""
+Analytics service for chart-ready spending aggregates.
+"""
+
+from datetime import date, datetime, time, timedelta
+from ..extensions import db
+from ..models import Budget, BudgetPeriod, Category, Subcategory
+from ..utils.cache import user_cache
+from ..utils.data_version import get_data_version
+from .spending_aggregator import SpendingAggregator
+
+
+class AnalyticsService:
+    """Service for analytics and chart data."""
+
+    @staticmethod
+    def _bucket_start(day, bucket):
+        """First day of the bucket containing `day` (weeks start on Monday)."""
+        if bucket == 'week':
+            return day - timedelta(days=day.weekday())
+        if bucket == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def _next_bucket(day, bucket):
+        """First day of the bucket following the one starting on `day`."""
+        if bucket == 'week':
+            return day + timedelta(days=7)
+        if bucket == 'month':
+            return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return day + timedelta(days=1)
+
+    @staticmethod
+    def _bucket_expression(column, bucket, dialect):
+        """
+        SQL expression truncating a transaction date column to the start of its bucket.
+
+        Returns None for databases without a native equivalent; rows are then
+        grouped per day in SQL and folded into buckets in Python.
+        """
+        if dialect == 'postgresql':
+            return db.cast(db.func.date_trunc(bucket, column), db.Date)
+        if dialect == 'sqlite':
+            if bucket == 'week':
+                # 'weekday 0' moves forward to Sunday; six days back is that week's Monday
+                return db.func.date(column, 'weekday 0', '-6 days')
+            if bucket == 'month':
+                return db.func.strftime('%Y-%m-01', column)
+            return db.func.date(column)
+        return None
+
+    @staticmethod
+    def get_spending_series(user_id, bucket, date_from, date_to, group_by='category'):
+        """
+        Get spending and income per time bucket, grouped by category or subcategory.
+
+        Buckets are computed in one GROUP BY query over the (user_id, transaction_date)
+        indexes of the live and archived transaction tables and returned as dense
+        arrays aligned with `buckets`. Results are cached
+        per user and keyed on the user's data version, so any change to their data
+        misses the cache even in a process that didn't make the change.
+
+        Args:
+            user_id: User ID
+            bucket: 'day', 'week' or 'month'
+            date_from: First day of the range (inclusive)
+            date_to: Last day of the range (inclusive)
+            group_by: 'category' or 'subcategory'
+
+        Returns:
+            Dict with buckets (ISO start dates), series (per group spent/income
+            arrays) and totals (spent/income arrays over all groups)
+        """
+        cache_key = ('spending-series', get_data_version(user_id), bucket, date_from, date_to, group_by)
+        cached = user_cache.get(user_id, cache_key)
+        if cached is not None:
+            return cached
+
+        ledger = SpendingAggregator.ledger()
+        dialect = db.session.get_bind().dialect.name
+        bucket_column = AnalyticsService._bucket_expression(ledger.c.transaction_date, bucket, dialect)
+        if bucket_column is None:
+            bucket_column = db.func.date(ledger.c.transaction_date)
+        bucket_column = bucket_column.label('bucket')
+
+        if group_by == 'subcategory':
+            group_id, group_name = Subcategory.id, Subcategory.name
+        else:
+            group_id, group_name = Category.id, Category.name
+
+        spent_total, income_total = SpendingAggregator.aggregate_columns(ledger)[:2]
+        rows = db.session.query(
+            bucket_column,
+            group_id.label('group_id'),
+            group_name.label('group_name'),
+            spent_total,
+            income_total
+        ).select_from(ledger).join(
+            Subcategory, ledger.c.subcategory_id == Subcategory.id
+        ).join(
+            Category, Subcategory.category_id == Category.id
+        ).filter(
+            ledger.c.user_id == user_id,
+            ledger.c.transaction_date >= datetime.combine(date_from, time.min),
+            ledger.c.transaction_date < datetime.combine(date_to + timedelta(days=1), time.min),
+            ledger.c.amount != 0
+        ).group_by(
+            bucket_column, group_id, group_name
+        ).all()
+
+        # Dense bucket axis so every series lines up index for index
+        buckets = []
+        current = AnalyticsService._bucket_start(date_from, bucket)
+        while current <= date_to:
+            buckets.append(current.isoformat())
+            current = AnalyticsService._next_bucket(current, bucket)
+        positions = {key: index for index, key in enumerate(buckets)}
+
+        series = {}
+        totals = {'spent': [0] * len(buckets), 'income': [0] * len(buckets)}
+        for row in rows:
+            day = row.bucket if isinstance(row.bucket, date) else date.fromisoformat(str(row.bucket)[:10])
+            position = positions[AnalyticsService._bucket_start(day, bucket).isoformat()]
+            entry = series.get(row.group_id)
+            if entry is None:
+                entry = series[row.group_id] = {
+                    'id': row.group_id,
+                    'name': row.group_name,
+                    'spent': [0] * len(buckets),
+                    'income': [0] * len(buckets)
+                }
+            entry['spent'][position] += row.spent_total or 0
+            entry['income'][position] += row.income_total or 0
+            totals['spent'][position] += row.spent_total or 0
+            totals['income'][position] += row.income_total or 0
+
+        result = {
+            'bucket': bucket,
+            'group_by': group_by,
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'buckets': buckets,
+            'series': sorted(series.values(), key=lambda entry: -sum(entry['spent'])),
+            'totals': totals
+        }
+        user_cache.set(user_id, cache_key, result)
+        return result
+
+    @staticmethod
+    def get_period_comparison(user_id, last=6):
+        """
+        Compare allocated, spent and income per subcategory across budget periods.
+
+        Covers the user's last `last` periods that have started. Allocations and
+        the spending rollup (transactions already bucketed by period) are combined
+        by SpendingAggregator.budget_vs_actual and summed per (period,
+        subcategory) in one grouped query,
+        so the cost doesn't grow with the number of periods compared. Results are
+        cached per user and keyed on the user's data version.
+
+        Args:
+            user_id: User ID
+            last: Number of periods to compare
+
+        Returns:
+            Dict with periods (oldest first), subcategories (per subcategory
+            allocated/spent/income arrays aligned with periods) and totals
+            (allocated/spent/income arrays over all subcategories)
+        """
+        today = date.today()
+        cache_key = ('period-comparison', get_data_version(user_id), last, today)
+        cached = user_cache.get(user_id, cache_key)
+        if cached is not None:
+            return cached
+
+        periods = db.session.query(
+            BudgetPeriod.id,
+            BudgetPeriod.name,
+            BudgetPeriod.period_type,
+            BudgetPeriod.start_date,
+            BudgetPeriod.end_date,
+            BudgetPeriod.is_active,
+            Budget.total_income,
+            Budget.balance_brought_forward
+        ).outerjoin(
+            Budget, Budget.period_id == BudgetPeriod.id
+        ).filter(
+            BudgetPeriod.user_id == user_id,
+            BudgetPeriod.start_date <= today
+        ).order_by(
+            BudgetPeriod.start_date.desc(), BudgetPeriod.id.desc()
+        ).limit(last).all()[::-1]
+        period_ids = [period.id for period in periods]
+        positions = {period_id: index for index, period_id in enumerate(period_ids)}
+
+        rows = []
+        if period_ids:
+            combined = SpendingAggregator.budget_vs_actual(period_ids, user_id)
+
+            rows = db.session.query(
+                combined.c.period_id,
+                Subcategory.id.label('subcategory_id'),
+                Subcategory.name.label('subcategory_name'),
+                Category.id.label('category_id'),
+                Category.name.label('category_name'),
+                db.func.sum(combined.c.allocated).label('allocated'),
+                db.func.sum(combined.c.spent).label('spent'),
+                db.func.sum(combined.c.income).label('income')
+            ).join(
+                Subcategory, combined.c.subcategory_id == Subcategory.id
+            ).join(
+                Category, Subcategory.category_id == Category.id
+            ).filter(
+                Category.user_id == user_id
+            ).group_by(
+                combined.c.period_id, Subcategory.id, Subcategory.name, Category.id, Category.name
+            ).all()
+
+        metrics = ('allocated', 'spent', 'income')
+        subcategories = {}
+        totals = {metric: [0] * len(periods) for metric in metrics}
+        for row in rows:
+            position = positions[row.period_id]
+            entry = subcategories.get(row.subcategory_id)
+            if entry is None:
+                entry = subcategories[row.subcategory_id] = {
+                    'id': row.subcategory_id,
+                    'name': row.subcategory_name,
+                    'category_id': row.category_id,
+                    'category_name': row.category_name,
+                    **{metric: [0] * len(periods) for metric in metrics}
+                }
+            for metric in metrics:
+                value = getattr(row, metric) or 0
+                entry[metric][position] += value
+                totals[metric][position] += value
+
+        result = {
+            'periods': [{
+                'id': period.id,
+                'name': period.name,
+                'period_type': period.period_type,
+                'start_date': period.start_date.isoformat(),
+                'end_date': period.end_date.isoformat(),
+                'is_active': period.is_active,
+                'total_income': period.total_income or 0,
+                'balance_brought_forward': period.balance_brought_forward or 0
+            } for period in periods],
+            'subcategories': sorted(
+                subcategories.values(), key=lambda entry: (entry['category_name'], entry['name'], entry['id'])
+            ),
+            'totals': totals
+        }
+        user_cache.set(user_id, cache_key, result)
+        return result
@@ -0,0 +1,132 @@
+"""
+Archive service for moving old transactions into cold storage.
+"""
+
+from datetime import date, datetime, time, timedelta
+from flask import current_app
+from ..extensions import db
+from ..models import Transaction, ArchivedTransaction, BudgetPeriod, User
+from ..utils.data_version import bump_data_version
+from ..utils.active_budget import ActiveBudgetContext
+
+
+class TransactionArchiveService:
+    """
+    Service for the transaction -> transaction_archive move.
+
+    Archived rows keep their IDs and columns. Every history read (listings,
+    export, aggregates, duplicate detection) queries both tables, so archiving
+    only changes where a row lives, not what the API returns. The spending rollup
+    is keyed by budget period rather than by transaction, so it is unaffected.
+    """
+
+    # Transactions moved per INSERT ... SELECT / DELETE pair (and per commit)
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def archive_cutoff(user_id, horizon_days=None, closed_periods=False):
+        """
+        Work out the date before which a user's transactions are archived.
+
+        Args:
+            user_id: User ID
+            horizon_days: Age in days after which transactions are archived;
+                defaults to TRANSACTION_ARCHIVE_AFTER_DAYS
+            closed_periods: Also archive every transaction before the earliest
+                budget period that is still open (active or not yet ended)
+
+        Returns:
+            Cutoff date; transactions dated strictly before it are archived. Never
+            later than the start of the user's active budget period.
+        """
+        if horizon_days is None:
+            horizon_days = current_app.config['TRANSACTION_ARCHIVE_AFTER_DAYS']
+        today = date.today()
+        cutoff = today - timedelta(days=horizon_days)
+
+        if closed_periods:
+            earliest_open = db.session.query(db.func.min(BudgetPeriod.start_date)).filter(
+                BudgetPeriod.user_id == user_id,
+                db.or_(BudgetPeriod.is_active.is_(True), BudgetPeriod.end_date >= today)
+            ).scalar()
+            if earliest_open is None:
+                latest_end = db.session.query(db.func.max(BudgetPeriod.end_date)).filter(
+                    BudgetPeriod.user_id == user_id
+                ).scalar()
+                earliest_open = latest_end + timedelta(days=1) if latest_end else None
+            if earliest_open is not None:
+                cutoff = max(cutoff, earliest_open)
+
+        # The active period feeds the dashboard: keep it in the hot table
+        active_period = ActiveBudgetContext.resolve(user_id)
+        if active_period is not None:
+            cutoff = min(cutoff, active_period.start_date)
+        return min(cutoff, today)
+
+    @staticmethod
+    def archive_user(user_id, cutoff):
+        """
+        Move a user's transactions dated before cutoff into the archive.
+
+        Rows move in ID batches of BATCH_SIZE: one INSERT ... SELECT copies a batch
+        and one DELETE removes it, in the same database transaction, so a row is
+        never in both tables or in neither.
+
+        Args:
+            user_id: User ID
+            cutoff: Date; transactions dated strictly before it are moved
+
+        Returns:
+            Number of transactions archived
+        """
+        columns = [column.name for column in Transaction.__table__.columns]
+        boundary = datetime.combine(cutoff, time.min)
+        archived = 0
+        # New transaction IDs never collide with archived ones: the transaction
+        # table is AUTOINCREMENT on SQLite and sequence-backed on PostgreSQL
+        while True:
+            ids = [row[0] for row in db.session.query(Transaction.id).filter(
+                Transaction.user_id == user_id,
+                Transaction.transaction_date < boundary
+            ).order_by(Transaction.id).limit(TransactionArchiveService.BATCH_SIZE)]
+            if not ids:
+                break
+
+            db.session.execute(ArchivedTransaction.__table__.insert().from_select(
+                [*columns, 'archived_at'],
+                db.select(
+                    *(Transaction.__table__.c[column] for column in columns),
+                    db.literal(datetime.utcnow(), db.DateTime)
+                ).where(Transaction.id.in_(ids))
+            ))
+            Transaction.query.filter(Transaction.id.in_(ids)).delete(synchronize_session=False)
+            bump_data_version(user_id)
+            db.session.commit()
+            archived += len(ids)
+
+        return archived
+
+    @staticmethod
+    def archive_all(horizon_days=None, user_id=None, closed_periods=False):
+        """
+        Archive old transactions of every user (optionally of one user).
+
+        Args:
+            horizon_days: Age in days after which transactions are archived;
+                defaults to TRANSACTION_ARCHIVE_AFTER_DAYS
+            user_id: Optional user ID to restrict the job to
+            closed_periods: Also archive transactions of closed budget periods
+
+        Returns:
+            Tuple of (users processed, transactions archived)
+        """
+        query = db.session.query(User.id).order_by(User.id)
+        if user_id is not None:
+            query = query.filter(User.id == user_id)
+        user_ids = [row[0] for row in query]
+
+        archived = 0
+        for current_id in user_ids:
+            cutoff = TransactionArchiveService.archive_cutoff(current_id, horizon_days, closed_periods)
+            archived += TransactionArchiveService.archive_user(current_id, cutoff)
+        return len(user_ids), archived
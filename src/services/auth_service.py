@@ -9,6 +9,7 @@ from werkzeug.security import check_password_hash
 from ..extensions import db
 from ..models import User, PasswordResetToken, EmailVerification
 from ..utils.email import send_verification_email, send_password_reset_email
+from ..utils.data_version import bump_data_version
 
 
 class AuthService:
@@ -171,4 +172,5 @@ class AuthService:
             user = User.query.get(verification_token.user_id)
             if user:
                 user.email_verified = True
+                bump_data_version(user.id)
             db.session.commit()
@@ -2,10 +2,15 @@
 Budget service for managing budgets and budget periods.
 """
 
+from bisect import bisect_left
 from datetime import datetime, date
 from ..extensions import db
-from ..models import Budget, BudgetPeriod, BudgetAllocation, IncomeSource
-from ..utils.budget import populate_budget_from_recurring, cleanup_duplicate_allocations
+from ..models import Budget, BudgetPeriod, BudgetAllocation, IncomeSource, SpendingRollup
+from ..utils.budget import populate_budget_from_recurring, cleanup_duplicate_allocations, refresh_budget_totals
+from ..utils.data_version import bump_data_version
+from ..utils.active_budget import ActiveBudgetContext
+from .spending_rollup_service import SpendingRollupService
+from .snapshot_service import PeriodSnapshotService
 
 
 class BudgetService:
@@ -26,25 +31,89 @@ class BudgetService:
         Returns:
             BudgetPeriod object if overlap found, None otherwise
         """
-        # Query for periods of the same type for this user
-        query = BudgetPeriod.query.filter_by(
-            user_id=user_id,
-            period_type=period_type
+        # Two periods overlap if (start1 <= end2) AND (end1 >= start2). The test runs
+        # in the database as a LIMIT 1 range scan on ix_budget_period_user_type_dates
+        query = BudgetPeriod.query.filter(
+            BudgetPeriod.user_id == user_id,
+            BudgetPeriod.period_type == period_type,
+            BudgetPeriod.start_date <= end_date,
+            BudgetPeriod.end_date >= start_date
         )
         
         # Exclude the current period if updating
         if exclude_period_id:
             query = query.filter(BudgetPeriod.id != exclude_period_id)
         
-        existing_periods = query.all()
+        return query.order_by(BudgetPeriod.start_date).first()
+    
+    @staticmethod
+    def _check_period_overlaps(periods):
+        """
+        Check many proposed budget periods, for one or many users, for overlaps at once.
+        
+        One query loads the existing periods of the proposals' users and types within
+        the proposals' overall date range. Per user and type, existing and proposed
+        periods are then sorted by start date and swept once, keeping the
+        latest-ending period seen so far: a period overlaps an earlier one exactly
+        when it starts on or before that end date. Existing periods starting inside
+        a proposal are found by binary search over their start dates. The check is
+        O(n log n) rather than a query (or a full scan) per proposal.
         
-        # Check for overlap: two periods overlap if (start1 <= end2) AND (end1 >= start2)
-        for existing_period in existing_periods:
-            if (start_date <= existing_period.end_date and 
-                end_date >= existing_period.start_date):
-                return existing_period
+        A proposal conflicts if it overlaps an existing period or any proposal
+        sorting before it (by start date, then position), including proposals that
+        are themselves reported as conflicting.
         
-        return None
+        Args:
+            periods: List of dicts with user_id, period_type, start_date and end_date,
+                and an optional id of an existing period being changed (excluded
+                from the check)
+        
+        Returns:
+            Dict mapping the index of each conflicting proposal to the existing
+            BudgetPeriod or the index of the earlier proposal it overlaps
+        """
+        if not periods:
+            return {}
+        
+        excluded = {period['id'] for period in periods if period.get('id')}
+        existing = BudgetPeriod.query.filter(
+            BudgetPeriod.user_id.in_({period['user_id'] for period in periods}),
+            BudgetPeriod.period_type.in_({period['period_type'] for period in periods}),
+            BudgetPeriod.start_date <= max(period['end_date'] for period in periods),
+            BudgetPeriod.end_date >= min(period['start_date'] for period in periods)
+        ).all()
+        
+        # (start, end, proposal index or -1, period); existing periods sort first on ties
+        groups = {}
+        for period in existing:
+            if period.id not in excluded:
+                groups.setdefault((period.user_id, period.period_type), []).append(
+                    (period.start_date, period.end_date, -1, period)
+                )
+        for index, period in enumerate(periods):
+            groups.setdefault((period['user_id'], period['period_type']), []).append(
+                (period['start_date'], period['end_date'], index, index)
+            )
+        
+        conflicts = {}
+        for entries in groups.values():
+            entries.sort(key=lambda entry: (entry[0], entry[2]))
+            latest = None  # (end_date, period) of the latest-ending period so far
+            for start_date, end_date, index, period in entries:
+                if index >= 0 and latest is not None and start_date <= latest[0]:
+                    conflicts[index] = latest[1]
+                if latest is None or end_date > latest[0]:
+                    latest = (end_date, period)
+            
+            # Existing periods starting inside a proposal sort after it in the sweep
+            later = [entry for entry in entries if entry[2] < 0]
+            starts = [entry[0] for entry in later]
+            for start_date, end_date, index, _ in entries:
+                if index >= 0 and index not in conflicts:
+                    position = bisect_left(starts, start_date)
+                    if position < len(starts) and starts[position] <= end_date:
+                        conflicts[index] = later[position][3]
+        return conflicts
     
     @staticmethod
     def get_budget_periods(user_id):
@@ -67,6 +136,14 @@ class BudgetService:
         
         return result
     
+    @staticmethod
+    def _active_period_ids(user_id):
+        """IDs of a user's active periods, i.e. the ones a newly activated period closes."""
+        return [row[0] for row in db.session.query(BudgetPeriod.id).filter(
+            BudgetPeriod.user_id == user_id,
+            BudgetPeriod.is_active.is_(True)
+        )]
+    
     @staticmethod
     def create_budget_period(user_id, name, period_type, start_date, end_date):
         """Create a new budget period."""
@@ -83,6 +160,7 @@ class BudgetService:
             )
         
         # Deactivate any existing active periods
+        closing = BudgetService._active_period_ids(user_id)
         BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).update({'is_active': False})
         
         period = BudgetPeriod(
@@ -103,7 +181,13 @@ class BudgetService:
             user_id=user_id
         )
         db.session.add(budget)
+        
+        # Transactions already dated inside the new period count towards it
+        SpendingRollupService.rebuild_periods([period.id])
+        PeriodSnapshotService.close_periods(closing)
+        bump_data_version(user_id)
         db.session.commit()
+        ActiveBudgetContext.invalidate(user_id)
         
         # Populate budget from recurring sources matching the period type
         from ..models import User
@@ -112,10 +196,131 @@ class BudgetService:
         
         return period
     
+    @staticmethod
+    def clone_budget_period(period_id, user_id, name, start_date, end_date, period_type=None, scale=1.0):
+        """
+        Create a new active budget period with a copy of another period's budget.
+        
+        The source budget's allocations and income sources are copied with one
+        INSERT ... SELECT each, amounts multiplied by scale and rounded to cents,
+        so cloning takes the same few statements however large the budget is.
+        Otherwise behaves like create_budget_period, except that the new budget
+        is not populated from recurring items: it already holds the source's.
+        
+        Args:
+            period_id: ID of the budget period to clone
+            user_id: User ID
+            name: Name of the new period
+            start_date: Start date of the new period
+            end_date: End date of the new period
+            period_type: Type of the new period; defaults to the source's
+            scale: Factor applied to every allocation and income amount
+        
+        Returns:
+            The new BudgetPeriod, or None if the source period was not found
+        
+        Raises:
+            ValueError: If the new period overlaps an existing period of the same type
+        """
+        source = db.session.query(
+            BudgetPeriod.period_type,
+            Budget.id.label('budget_id'),
+            Budget.total_income
+        ).outerjoin(
+            Budget, Budget.period_id == BudgetPeriod.id
+        ).filter(
+            BudgetPeriod.id == period_id,
+            BudgetPeriod.user_id == user_id
+        ).order_by(Budget.id).first()
+        if not source:
+            return None
+        period_type = period_type or source.period_type
+        
+        # Check for overlapping periods of the same type
+        overlapping_period = BudgetService._check_period_overlap(
+            user_id, period_type, start_date, end_date
+        )
+        if overlapping_period:
+            raise ValueError(
+                f"A {period_type} budget period already exists that overlaps with "
+                f"the requested period ({start_date} to {end_date}). "
+                f"Existing period: {overlapping_period.name} "
+                f"({overlapping_period.start_date} to {overlapping_period.end_date})"
+            )
+        
+        # Deactivate any existing active periods
+        closing = BudgetService._active_period_ids(user_id)
+        BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).update({'is_active': False})
+        
+        period = BudgetPeriod(
+            name=name,
+            period_type=period_type,
+            start_date=start_date,
+            end_date=end_date,
+            user_id=user_id,
+            is_active=True
+        )
+        db.session.add(period)
+        db.session.flush()  # Get the period ID
+        
+        budget = Budget(
+            period_id=period.id,
+            user_id=user_id,
+            total_income=round((source.total_income or 0) * scale, 2)
+        )
+        db.session.add(budget)
+        db.session.flush()  # Get the budget ID
+        budget_id = budget.id
+        
+        if source.budget_id is not None:
+            def scaled(column):
+                if scale == 1:
+                    return column
+                return db.func.round(db.cast(column * scale, db.Numeric), 2)
+            
+            now = datetime.utcnow()
+            db.session.execute(IncomeSource.__table__.insert().from_select(
+                ['name', 'amount', 'budget_id', 'is_recurring_source', 'recurring_source_id', 'created_at'],
+                db.select(
+                    IncomeSource.name,
+                    scaled(IncomeSource.amount),
+                    db.literal(budget_id),
+                    IncomeSource.is_recurring_source,
+                    IncomeSource.recurring_source_id,
+                    db.literal(now, db.DateTime)
+                ).where(IncomeSource.budget_id == source.budget_id)
+            ))
+            db.session.execute(BudgetAllocation.__table__.insert().from_select(
+                ['allocated_amount', 'subcategory_id', 'budget_id', 'is_recurring_allocation', 'recurring_allocation_id'],
+                db.select(
+                    scaled(db.func.coalesce(BudgetAllocation.allocated_amount, 0)),
+                    BudgetAllocation.subcategory_id,
+                    db.literal(budget_id),
+                    BudgetAllocation.is_recurring_allocation,
+                    BudgetAllocation.recurring_allocation_id
+                ).where(BudgetAllocation.budget_id == source.budget_id)
+            ))
+            refresh_budget_totals([budget_id], columns=('total_allocated', 'income_source_total'))
+        
+        # Transactions already dated inside the new period count towards it
+        SpendingRollupService.rebuild_periods([period.id])
+        PeriodSnapshotService.close_periods(closing)
+        bump_data_version(user_id)
+        db.session.commit()
+        ActiveBudgetContext.invalidate(user_id)
+        
+        return period
+    
     @staticmethod
     def activate_budget_period(period_id, user_id):
-        """Activate a budget period."""
+        """
+        Activate a budget period.
+        
+        The periods it replaces are closed (snapshotted); the activated period is
+        re-opened, discarding any snapshot it had.
+        """
         # Deactivate all other periods for this user
+        closing = [active_id for active_id in BudgetService._active_period_ids(user_id) if active_id != period_id]
         BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).update({'is_active': False})
         
         # Activate the specified period
@@ -124,7 +329,11 @@ class BudgetService:
             return None
         
         period.is_active = True
+        PeriodSnapshotService.close_periods(closing)
+        PeriodSnapshotService.discard([period.id])
+        bump_data_version(user_id)
         db.session.commit()
+        ActiveBudgetContext.invalidate(user_id)
         return period
     
     @staticmethod
@@ -134,6 +343,8 @@ class BudgetService:
         if not period:
             return None
         
+        original_dates = (period.start_date, period.end_date)
+        
         # Use existing values if not provided
         final_period_type = period_type if period_type is not None else period.period_type
         final_start_date = start_date if start_date is not None else period.start_date
@@ -162,7 +373,13 @@ class BudgetService:
         if end_date is not None:
             period.end_date = end_date
         
+        if period.start_date != original_dates[0] or period.end_date != original_dates[1]:
+            db.session.flush()
+            SpendingRollupService.rebuild_periods([period.id])
+        
+        bump_data_version(user_id)
         db.session.commit()
+        ActiveBudgetContext.invalidate(user_id)
         return period
     
     @staticmethod
@@ -172,95 +389,223 @@ class BudgetService:
         if not period:
             return False
         
+        SpendingRollup.query.filter_by(budget_period_id=period.id).delete(synchronize_session=False)
+        PeriodSnapshotService.discard([period.id])
         db.session.delete(period)
+        bump_data_version(user_id)
         db.session.commit()
+        ActiveBudgetContext.invalidate(user_id)
         return True
     
     @staticmethod
     def get_budget(user_id):
-        """Get the active budget for a user."""
-        try:
-            active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-            if not active_period:
-                return None
-            
-            budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
-            if not budget:
-                return None
-            
-            # Get income sources
-            income_sources = IncomeSource.query.filter_by(budget_id=budget.id).all()
-            income_data = [{
-                'id': source.id, 
-                'name': source.name, 
-                'amount': source.amount,
-                'is_recurring': source.is_recurring_source
-            } for source in income_sources]
+        """
+        Get the active budget for a user.
+        
+        Runs a fixed four queries however many allocations the budget has: the
+        user's data version (ActiveBudgetContext's freshness check), the budget
+        row, the income sources, and the allocations joined to their subcategory,
+        category and (outer) recurring allocation.
+        Allocations whose subcategory or category no longer exists drop out of the
+        inner joins.
+        """
+        from ..models import Category, Subcategory, RecurringBudgetAllocation
+        
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
+        if not budget:
+            return None
+        
+        # Get income sources
+        income_sources = db.session.query(
+            IncomeSource.id,
+            IncomeSource.name,
+            IncomeSource.amount,
+            IncomeSource.is_recurring_source
+        ).filter(IncomeSource.budget_id == budget.id).order_by(IncomeSource.id).all()
+        income_data = [{
+            'id': source.id, 
+            'name': source.name, 
+            'amount': source.amount,
+            'is_recurring': source.is_recurring_source
+        } for source in income_sources]
+        
+        # Get allocations with their subcategory, category and recurring period type
+        allocations = db.session.query(
+            BudgetAllocation.id,
+            BudgetAllocation.allocated_amount,
+            BudgetAllocation.is_recurring_allocation,
+            BudgetAllocation.recurring_allocation_id,
+            RecurringBudgetAllocation.period_type.label('recurring_period_type'),
+            Subcategory.id.label('subcategory_id'),
+            Subcategory.name.label('subcategory_name'),
+            Category.id.label('category_id'),
+            Category.name.label('category_name')
+        ).join(
+            Subcategory, BudgetAllocation.subcategory_id == Subcategory.id
+        ).join(
+            Category, Subcategory.category_id == Category.id
+        ).outerjoin(
+            RecurringBudgetAllocation,
+            BudgetAllocation.recurring_allocation_id == RecurringBudgetAllocation.id
+        ).filter(
+            BudgetAllocation.budget_id == budget.id
+        ).order_by(BudgetAllocation.id).all()
+        allocation_data = [{
+            'id': allocation.id,
+            'allocated_amount': allocation.allocated_amount,
+            'is_recurring_allocation': allocation.is_recurring_allocation,
+            'recurring_allocation_id': allocation.recurring_allocation_id,
+            'recurring_period_type': allocation.recurring_period_type,
+            'subcategory': {
+                'id': allocation.subcategory_id,
+                'name': allocation.subcategory_name,
+                'category': {
+                    'id': allocation.category_id,
+                    'name': allocation.category_name
+                }
+            }
+        } for allocation in allocations]
+        
+        return {
+            'id': budget.id,
+            'total_income': budget.total_income,
+            'balance_brought_forward': budget.balance_brought_forward,
+            'total_allocated': budget.total_allocated,
+            'total_spent': budget.total_spent,
+            'income_sources': income_data,
+            'allocations': allocation_data,
+            'period_name': context.name,  # Add period_name for dashboard compatibility
+            'period': {
+                'id': context.period_id,
+                'name': context.name,
+                'period_type': context.period_type,
+                'start_date': context.start_date.isoformat(),
+                'end_date': context.end_date.isoformat()
+            }
+        }
+    
+    @staticmethod
+    def check_balance(budget):
+        """
+        Check whether a budget's income covers its allocations.
+        
+        Reads only the budget row: total_allocated is maintained on write.
+        
+        Args:
+            budget: Budget
+        
+        Returns:
+            Balance check dict
+        """
+        # Total available income is income sources + balance brought forward
+        total_income = (budget.total_income or 0) + (budget.balance_brought_forward or 0)
+        total_allocated = budget.total_allocated or 0
+        
+        balance = total_income - total_allocated
+        is_balanced = balance >= 0
+        
+        return {
+            'total_income': total_income,
+            'total_allocated': total_allocated,
+            'balance': balance,
+            'deficit': abs(balance) if balance < 0 else 0,  # Add deficit for dashboard compatibility
+            'is_balanced': is_balanced,
+            'message': 'Budget is balanced' if is_balanced else 'Budget allocation exceeds income'
+        }
+    
+    @staticmethod
+    def find_overspending(user_id, budget, period_totals, subcategory_names=None):
+        """
+        Find subcategories where spending exceeds allocation.
+        
+        Spending in a subcategory with no allocation counts as overspending too.
+        
+        Args:
+            user_id: User ID
+            budget: Budget dict as returned by get_budget()
+            period_totals: SpendingAggregator.period_totals() of the budget's period
+            subcategory_names: Optional subcategory_id -> (subcategory name, category
+                name) covering the user's subcategories; unallocated subcategories
+                with spending are looked up in one query when omitted
+        
+        Returns:
+            Overspending check dict
+        """
+        subcategory_spending = {
+            subcategory_id: totals['spent_total']
+            for subcategory_id, totals in period_totals.items()
+            if totals['spent_count']
+        }
+        
+        overspending = []
+        checked_subcategories = set()
+        
+        # Check subcategories that have allocations
+        for allocation in budget['allocations']:
+            subcategory = allocation['subcategory']
+            checked_subcategories.add(subcategory['id'])
             
-            # Get allocations with error handling
-            allocations = BudgetAllocation.query.filter_by(budget_id=budget.id).all()
-            allocation_data = []
-            for allocation in allocations:
-                try:
-                    # Check if subcategory and category exist
-                    if allocation.subcategory and allocation.subcategory.category:
-                        # Get period_type from recurring allocation if it exists
-                        recurring_period_type = None
-                        if allocation.recurring_allocation_id:
-                            from ..models import RecurringBudgetAllocation
-                            recurring = RecurringBudgetAllocation.query.get(allocation.recurring_allocation_id)
-                            if recurring:
-                                recurring_period_type = recurring.period_type
-                        
-                        allocation_data.append({
-                            'id': allocation.id,
-                            'allocated_amount': allocation.allocated_amount,
-                            'is_recurring_allocation': allocation.is_recurring_allocation,
-                            'recurring_allocation_id': allocation.recurring_allocation_id,
-                            'recurring_period_type': recurring_period_type,
-                            'subcategory': {
-                                'id': allocation.subcategory.id,
-                                'name': allocation.subcategory.name,
-                                'category': {
-                                    'id': allocation.subcategory.category.id,
-                                    'name': allocation.subcategory.category.name
-                                }
-                            }
-                        })
-                    else:
-                        # Skip allocations with missing subcategory or category
-                        print(f"Warning: Skipping allocation {allocation.id} - missing subcategory or category")
-                except Exception as e:
-                    print(f"Error processing allocation {allocation.id}: {str(e)}")
-                    continue
+            total_spent = subcategory_spending.get(subcategory['id'], 0)
+            allocated = allocation['allocated_amount'] or 0
             
-            return {
-                'id': budget.id,
-                'total_income': budget.total_income,
-                'balance_brought_forward': budget.balance_brought_forward,
-                'income_sources': income_data,
-                'allocations': allocation_data,
-                'period_name': active_period.name,  # Add period_name for dashboard compatibility
-                'period': {
-                    'id': active_period.id,
-                    'name': active_period.name,
-                    'period_type': active_period.period_type,
-                    'start_date': active_period.start_date.isoformat(),
-                    'end_date': active_period.end_date.isoformat()
-                }
+            if total_spent > allocated:
+                overspent_amount = total_spent - allocated
+                overspent_percentage = (overspent_amount / allocated * 100) if allocated > 0 else 0
+                
+                overspending.append({
+                    'subcategory_id': subcategory['id'],
+                    'subcategory_name': subcategory['name'],
+                    'category_name': subcategory['category']['name'],
+                    'allocated': allocated,
+                    'spent': total_spent,
+                    'overspent_amount': overspent_amount,
+                    'overspent_percentage': overspent_percentage
+                })
+        
+        # Check subcategories with spending but no allocations
+        unallocated = {
+            subcategory_id: total_spent
+            for subcategory_id, total_spent in subcategory_spending.items()
+            if subcategory_id not in checked_subcategories and total_spent > 0
+        }
+        if unallocated and subcategory_names is None:
+            from ..models import Category, Subcategory
+            subcategory_names = {
+                row.id: (row.name, row.category_name)
+                for row in db.session.query(
+                    Subcategory.id, Subcategory.name, Category.name.label('category_name')
+                ).join(
+                    Category, Subcategory.category_id == Category.id
+                ).filter(
+                    Subcategory.id.in_(list(unallocated)),
+                    Category.user_id == user_id
+                )
             }
-        except Exception as e:
-            print(f"Error in get_budget: {str(e)}")
-            return None
+        for subcategory_id, total_spent in unallocated.items():
+            names = subcategory_names.get(subcategory_id)
+            if names:
+                overspending.append({
+                    'subcategory_id': subcategory_id,
+                    'subcategory_name': names[0],
+                    'category_name': names[1],
+                    'allocated': 0,
+                    'spent': total_spent,
+                    'overspent_amount': total_spent,
+                    'overspent_percentage': 0  # Can't calculate percentage when allocated is 0
+                })
+        
+        return {
+            'overspent_categories': overspending,
+            'total_overspent_categories': len(overspending),
+            'has_overspending': len(overspending) > 0
+        }
     
     @staticmethod
     def update_budget(user_id, total_income=None, balance_brought_forward=None):
         """Update budget details."""
-        active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-        if not active_period:
-            return None
-        
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
         if not budget:
             return None
         
@@ -269,43 +614,117 @@ class BudgetService:
         if balance_brought_forward is not None:
             budget.balance_brought_forward = balance_brought_forward
         
+        bump_data_version(user_id)
         db.session.commit()
         return budget
     
     @staticmethod
     def update_allocations(user_id, allocations_data):
-        """Update budget allocations."""
-        active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-        if not active_period:
-            return False
-        
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
-        if not budget:
-            return False
+        """
+        Replace the active budget's allocations with the given list.
         
-        # Clear existing allocations
-        BudgetAllocation.query.filter_by(budget_id=budget.id).delete()
+        The current allocations are loaded once and diffed against the new list, so
+        only changed rows are written: one DELETE for removed subcategories and one
+        bulk upsert for new and changed amounts. Unchanged allocations, and the
+        recurring allocation links of changed ones, are left alone. Saving an
+        unchanged list writes nothing.
         
-        # Add new allocations
-        for allocation_data in allocations_data:
-            allocation = BudgetAllocation(
-                allocated_amount=allocation_data['allocated_amount'],
-                subcategory_id=allocation_data['subcategory_id'],
-                budget_id=budget.id
-            )
-            db.session.add(allocation)
+        Args:
+            user_id: User ID
+            allocations_data: List of dicts with subcategory_id and allocated_amount;
+                if a subcategory appears more than once the last entry wins
         
+        Returns:
+            True if the budget was updated, False if there is no active budget
+        """
+        context = ActiveBudgetContext.resolve(user_id)
+        if not context or context.budget_id is None:
+            return False
+        budget_id = context.budget_id
+        
+        desired = {
+            allocation_data['subcategory_id']: allocation_data['allocated_amount']
+            for allocation_data in allocations_data
+        }
+        
+        current = {}
+        delete_ids = []
+        for allocation_id, subcategory_id, allocated_amount in db.session.query(
+            BudgetAllocation.id, BudgetAllocation.subcategory_id, BudgetAllocation.allocated_amount
+        ).filter(BudgetAllocation.budget_id == budget_id).order_by(BudgetAllocation.id):
+            if subcategory_id in current or subcategory_id not in desired:
+                delete_ids.append(allocation_id)
+            else:
+                current[subcategory_id] = allocated_amount
+        
+        upserts = [
+            {'budget_id': budget_id, 'subcategory_id': subcategory_id, 'allocated_amount': allocated_amount}
+            for subcategory_id, allocated_amount in desired.items()
+            if subcategory_id not in current or current[subcategory_id] != allocated_amount
+        ]
+        if not delete_ids and not upserts:
+            return True
+        
+        if delete_ids:
+            BudgetAllocation.query.filter(
+                BudgetAllocation.id.in_(delete_ids)
+            ).delete(synchronize_session=False)
+        if upserts:
+            BudgetService._upsert_allocations(upserts, {(budget_id, subcategory_id) for subcategory_id in current})
+        refresh_budget_totals([budget_id], columns=('total_allocated',))
+        
+        bump_data_version(user_id)
         db.session.commit()
         return True
     
+    @staticmethod
+    def _upsert_allocations(rows, existing_keys):
+        """
+        Write allocation amounts, inserting the (budget, subcategory) pairs that don't exist yet.
+        
+        Uses INSERT ... ON CONFLICT on PostgreSQL and SQLite (backed by
+        uq_budget_allocation_budget_subcategory); elsewhere one executemany UPDATE
+        for existing pairs and one executemany INSERT for new ones.
+        
+        Args:
+            rows: Dicts with budget_id, subcategory_id and allocated_amount
+            existing_keys: Set of (budget_id, subcategory_id) pairs that already have
+                an allocation (only used without native upsert)
+        """
+        table = BudgetAllocation.__table__
+        dialect = db.session.get_bind().dialect.name
+        
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['budget_id', 'subcategory_id'],
+                set_={'allocated_amount': statement.excluded.allocated_amount}
+            )
+            db.session.execute(statement, rows)
+            return
+        
+        updates = [row for row in rows if (row['budget_id'], row['subcategory_id']) in existing_keys]
+        inserts = [row for row in rows if (row['budget_id'], row['subcategory_id']) not in existing_keys]
+        if updates:
+            db.session.execute(
+                table.update().where(
+                    table.c.budget_id == db.bindparam('b_budget_id'),
+                    table.c.subcategory_id == db.bindparam('b_subcategory_id')
+                ).values(allocated_amount=db.bindparam('b_allocated_amount')),
+                [{f'b_{key}': value for key, value in row.items()} for row in updates]
+            )
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+    
     @staticmethod
     def create_income_source(user_id, name, amount):
         """Create an income source for the active budget."""
-        active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-        if not active_period:
-            return None
-        
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
         if not budget:
             return None
         
@@ -320,40 +739,85 @@ class BudgetService:
         
         # Update total income by adding the new amount to existing total
         budget.total_income = (budget.total_income or 0) + amount
+        refresh_budget_totals([budget.id], columns=('income_source_total',))
+        bump_data_version(user_id)
         db.session.commit()
         
         return income_source
     
     @staticmethod
-    def recalculate_total_income(user_id):
-        """Recalculate total income from all income sources."""
-        active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-        if not active_period:
+    def update_income_source(user_id, source_id, name=None, amount=None):
+        """
+        Update an income source of the active budget and recalculate total income.
+        
+        Returns:
+            The income source, or None if the active budget has no such source
+        """
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
+        income_source = IncomeSource.query.filter_by(
+            id=source_id, budget_id=budget.id
+        ).first() if budget else None
+        if not income_source:
+            return None
+        
+        if name is not None:
+            income_source.name = name
+        if amount is not None:
+            income_source.amount = amount
+        
+        refresh_budget_totals([budget.id], columns=('income_source_total',))
+        budget.total_income = budget.income_source_total
+        bump_data_version(user_id)
+        db.session.commit()
+        return income_source
+    
+    @staticmethod
+    def delete_income_source(user_id, source_id):
+        """
+        Delete an income source of the active budget and recalculate total income.
+        
+        Returns:
+            True if the source was deleted, False if the active budget has no such source
+        """
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
+        income_source = IncomeSource.query.filter_by(
+            id=source_id, budget_id=budget.id
+        ).first() if budget else None
+        if not income_source:
             return False
         
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
+        db.session.delete(income_source)
+        refresh_budget_totals([budget.id], columns=('income_source_total',))
+        budget.total_income = budget.income_source_total
+        bump_data_version(user_id)
+        db.session.commit()
+        return True
+    
+    @staticmethod
+    def recalculate_total_income(user_id):
+        """Recalculate total income from all income sources (the budget's income_source_total)."""
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
         if not budget:
             return False
         
-        # Calculate total from all income sources
-        total_income = sum(source.amount for source in budget.income_sources)
-        budget.total_income = total_income
+        budget.total_income = budget.income_source_total
         
+        bump_data_version(user_id)
         db.session.commit()
         return True
     
     @staticmethod
     def populate_from_recurring(user_id):
         """Populate current budget from recurring sources matching the period type."""
-        active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-        if not active_period:
-            return False
-        
-        budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
+        context = ActiveBudgetContext.resolve(user_id)
+        budget = context.budget() if context else None
         if not budget:
             return False
         
         from ..models import User
         user = User.query.get(user_id)
-        populate_budget_from_recurring(user, budget, active_period.period_type)
+        populate_budget_from_recurring(user, budget, context.period_type)
         return True
@@ -0,0 +1,362 @@
+"""
+Categorization service for assigning subcategories to transactions by rule.
+"""
+
+import re
+import threading
+from flask import current_app, has_app_context
+from ..extensions import db
+from ..models import CategorizationRule, Category, Subcategory, Transaction
+from ..utils.data_version import bump_data_version
+from ..utils.fingerprint import normalize_description
+from ..utils.rule_patterns import RULE_FLAGS, compile_alternatives, rule_alternative
+
+
+class RuleMatcher:
+    """
+    A user's categorization rules compiled into combined regular expressions.
+
+    All 'contains' rules form one alternation matched against the normalized
+    description and all 'regex' rules another matched against the raw description.
+    Each alternation is anchored and ordered by precedence, i.e.
+    ^(?:.*?(?:p1)(?P<r0>)|.*?(?:p2)(?P<r1>)|...), so a single C-level match returns
+    the highest-precedence rule whose pattern occurs anywhere in the text. Matching
+    a row costs two regex calls however many rules the user has.
+
+    Patterns are checked against this wrapper on input (see
+    utils.rule_patterns.check_regex_pattern). A kind whose combined expression
+    still fails to compile, e.g. because of a rule saved before that check,
+    falls back to testing its rules one by one; a rule whose own pattern doesn't
+    compile never matches.
+    """
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules: Iterable of objects with id, subcategory_id, match_type, pattern,
+                min_amount, max_amount and priority
+        """
+        self.rules = sorted(rules, key=lambda rule: (-rule.priority, -len(rule.pattern), rule.id))
+        self._compiled = {}
+        # Kinds matched rule by rule because their combined expression failed to compile
+        self._fallback = set()
+        for kind in ('contains', 'regex'):
+            alternatives = [
+                rule_alternative(re.escape(rule.pattern) if kind == 'contains' else rule.pattern, index)
+                for index, rule in enumerate(self.rules)
+                if rule.match_type == kind
+            ]
+            if not alternatives:
+                continue
+            try:
+                self._compiled[kind] = compile_alternatives(alternatives)
+            except re.error as e:
+                self._fallback.add(kind)
+                if has_app_context():
+                    current_app.logger.warning(f'Categorization rules fall back to one-by-one matching: {e}')
+        self._individual = None
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _individual_patterns(self):
+        """Each rule's own compiled pattern, in precedence order (None if it doesn't compile)."""
+        if self._individual is None:
+            self._individual = []
+            for rule in self.rules:
+                try:
+                    pattern = re.compile(
+                        re.escape(rule.pattern) if rule.match_type == 'contains' else rule.pattern, RULE_FLAGS
+                    )
+                except re.error:
+                    pattern = None
+                self._individual.append(pattern)
+        return self._individual
+
+    @staticmethod
+    def _amount_matches(rule, amount):
+        if amount is None:
+            return rule.min_amount is None and rule.max_amount is None
+        if rule.min_amount is not None and amount < rule.min_amount:
+            return False
+        if rule.max_amount is not None and amount > rule.max_amount:
+            return False
+        return True
+
+    def match(self, description, amount=None):
+        """
+        Find the rule that applies to a transaction.
+
+        Returns:
+            The matching rule, or None
+        """
+        if not self.rules or not description:
+            return None
+
+        subjects = {'contains': normalize_description(description), 'regex': description}
+        best = None
+        for kind, pattern in self._compiled.items():
+            found = pattern.match(subjects[kind])
+            if found is not None:
+                index = int(found.lastgroup[1:])
+                if best is None or index < best:
+                    best = index
+        if self._fallback:
+            patterns = self._individual_patterns()
+            for index, rule in enumerate(self.rules[:best]):
+                if (rule.match_type in self._fallback and patterns[index] is not None
+                        and patterns[index].search(subjects[rule.match_type])):
+                    best = index
+                    break
+        if best is None:
+            return None
+
+        rule = self.rules[best]
+        if self._amount_matches(rule, amount):
+            return rule
+
+        # The best text match is excluded by its amount bounds: fall back to
+        # testing the lower-precedence rules one by one
+        patterns = self._individual_patterns()
+        for index in range(best + 1, len(self.rules)):
+            rule = self.rules[index]
+            if (patterns[index] is not None and patterns[index].search(subjects[rule.match_type])
+                    and self._amount_matches(rule, amount)):
+                return rule
+        return None
+
+
+class CategorizationService:
+    """Service for categorization rules and automatic subcategory assignment."""
+
+    # user_id -> (rules signature, RuleMatcher)
+    _matchers = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _serialize(rule):
+        return {
+            'id': rule.id,
+            'subcategory_id': rule.subcategory_id,
+            'match_type': rule.match_type,
+            'pattern': rule.pattern,
+            'min_amount': rule.min_amount,
+            'max_amount': rule.max_amount,
+            'priority': rule.priority,
+            'created_at': rule.created_at.isoformat() if rule.created_at else None
+        }
+
+    @staticmethod
+    def _owns_subcategory(user_id, subcategory_id):
+        return db.session.query(Subcategory.id).join(
+            Category, Subcategory.category_id == Category.id
+        ).filter(
+            Subcategory.id == subcategory_id,
+            Category.user_id == user_id
+        ).first() is not None
+
+    @staticmethod
+    def get_rules(user_id):
+        """Get a user's rules in precedence order."""
+        rules = CategorizationRule.query.filter_by(user_id=user_id).all()
+        return [CategorizationService._serialize(rule) for rule in RuleMatcher(rules).rules]
+
+    @staticmethod
+    def create_rule(user_id, subcategory_id, pattern, match_type='contains', min_amount=None,
+                    max_amount=None, priority=0):
+        """
+        Create a categorization rule.
+
+        Returns:
+            Serialized rule
+
+        Raises:
+            ValueError: If the subcategory does not belong to the user or a
+                'contains' pattern has no letters or digits
+        """
+        if not CategorizationService._owns_subcategory(user_id, subcategory_id):
+            raise ValueError('Subcategory not found')
+        if match_type == 'contains' and not normalize_description(pattern):
+            raise ValueError('Pattern must contain letters or digits')
+
+        rule = CategorizationRule(
+            user_id=user_id,
+            subcategory_id=subcategory_id,
+            match_type=match_type,
+            pattern=normalize_description(pattern) if match_type == 'contains' else pattern,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            priority=priority
+        )
+        db.session.add(rule)
+        bump_data_version(user_id)
+        db.session.commit()
+        return CategorizationService._serialize(rule)
+
+    @staticmethod
+    def update_rule(rule_id, user_id, **kwargs):
+        """
+        Update a categorization rule.
+
+        Returns:
+            Serialized rule, or None if the rule does not exist
+
+        Raises:
+            ValueError: If the new subcategory does not belong to the user or the
+                updated rule is invalid
+        """
+        rule = CategorizationRule.query.filter_by(id=rule_id, user_id=user_id).first()
+        if not rule:
+            return None
+
+        if 'subcategory_id' in kwargs and not CategorizationService._owns_subcategory(user_id, kwargs['subcategory_id']):
+            raise ValueError('Subcategory not found')
+
+        for key, value in kwargs.items():
+            if hasattr(rule, key):
+                setattr(rule, key, value)
+
+        # A partial update can turn an existing pattern into a regex (or vice versa),
+        # so validate the rule as a whole
+        from ..schemas import CategorizationRuleSchema
+        errors = CategorizationRuleSchema().validate({
+            'subcategory_id': rule.subcategory_id,
+            'match_type': rule.match_type,
+            'pattern': rule.pattern,
+            'min_amount': rule.min_amount,
+            'max_amount': rule.max_amount,
+            'priority': rule.priority
+        })
+        if rule.match_type == 'contains':
+            rule.pattern = normalize_description(rule.pattern)
+            if not rule.pattern:
+                errors.setdefault('pattern', ['Pattern must contain letters or digits'])
+        if errors:
+            db.session.rollback()
+            raise ValueError(next(iter(errors.values()))[0])
+
+        bump_data_version(user_id)
+        db.session.commit()
+        return CategorizationService._serialize(rule)
+
+    @staticmethod
+    def delete_rule(rule_id, user_id):
+        """Delete a categorization rule."""
+        rule = CategorizationRule.query.filter_by(id=rule_id, user_id=user_id).first()
+        if not rule:
+            return False
+
+        db.session.delete(rule)
+        bump_data_version(user_id)
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def get_matcher(user_id):
+        """
+        Get the compiled matcher for a user's rules.
+
+        Matchers are cached per process and recompiled only when the user's rules
+        change, detected from a (count, max id, max updated_at) signature that is a
+        single indexed aggregate query.
+        """
+        signature = tuple(db.session.query(
+            db.func.count(CategorizationRule.id),
+            db.func.max(CategorizationRule.id),
+            db.func.max(CategorizationRule.updated_at)
+        ).filter(CategorizationRule.user_id == user_id).one())
+
+        with CategorizationService._lock:
+            cached = CategorizationService._matchers.get(user_id)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        matcher = RuleMatcher(db.session.query(
+            CategorizationRule.id,
+            CategorizationRule.subcategory_id,
+            CategorizationRule.match_type,
+            CategorizationRule.pattern,
+            CategorizationRule.min_amount,
+            CategorizationRule.max_amount,
+            CategorizationRule.priority
+        ).filter(CategorizationRule.user_id == user_id).all())
+        with CategorizationService._lock:
+            CategorizationService._matchers[user_id] = (signature, matcher)
+        return matcher
+
+    @staticmethod
+    def categorize(user_id, description, amount=None, matcher=None):
+        """
+        Pick a subcategory for a transaction from the user's rules.
+
+        Args:
+            user_id: User ID
+            description: Transaction description
+            amount: Transaction amount, checked against rule amount bounds
+            matcher: Optional RuleMatcher from get_matcher, to reuse across many rows
+
+        Returns:
+            Subcategory ID, or None if no rule matches
+        """
+        matcher = matcher or CategorizationService.get_matcher(user_id)
+        rule = matcher.match(description, amount)
+        return rule.subcategory_id if rule else None
+
+    @staticmethod
+    def learn_rules(user_id, min_occurrences=3, min_share=0.9, dry_run=False):
+        """
+        Derive 'contains' rules from how the user has categorized past transactions.
+
+        Descriptions are grouped by their normalized text with standalone numbers
+        (reference and card numbers) removed. A group becomes a rule when it has at
+        least min_occurrences transactions, at least min_share of them are in one
+        subcategory, and the user's current rules don't already categorize it.
+
+        Args:
+            user_id: User ID
+            min_occurrences: Minimum number of transactions with the description
+            min_share: Minimum fraction of them in the winning subcategory
+            dry_run: Return the proposed rules without creating them
+
+        Returns:
+            List of created (or, for a dry run, proposed) rules
+        """
+        counts = {}
+        rows = db.session.query(
+            Transaction.description,
+            Transaction.subcategory_id,
+            db.func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.description.isnot(None)
+        ).group_by(Transaction.description, Transaction.subcategory_id)
+        for description, subcategory_id, count in rows:
+            key = ' '.join(
+                token for token in normalize_description(description).split() if not token.isdigit()
+            )
+            if key:
+                by_subcategory = counts.setdefault(key, {})
+                by_subcategory[subcategory_id] = by_subcategory.get(subcategory_id, 0) + count
+
+        matcher = CategorizationService.get_matcher(user_id)
+        proposals = []
+        for key, by_subcategory in sorted(counts.items()):
+            total = sum(by_subcategory.values())
+            subcategory_id, count = max(by_subcategory.items(), key=lambda item: item[1])
+            if total < min_occurrences or count / total < min_share:
+                continue
+            if matcher.match(key) is not None:
+                continue
+            proposals.append(CategorizationRule(
+                user_id=user_id,
+                subcategory_id=subcategory_id,
+                match_type='contains',
+                pattern=key[:200],
+                priority=0
+            ))
+
+        if proposals and not dry_run:
+            db.session.add_all(proposals)
+            bump_data_version(user_id)
+            db.session.commit()
+        return [CategorizationService._serialize(rule) for rule in proposals]
@@ -4,22 +4,36 @@ Category service for managing categories and subcategories.
 
 from ..extensions import db
 from ..models import Category, Subcategory
+from ..utils.budget import refresh_budget_totals
+from ..utils.data_version import bump_data_version
+from .snapshot_service import PeriodSnapshotService
 
 
 class CategoryService:
     """Service for handling category operations."""
     
     @staticmethod
-    def get_user_categories(user_id):
-        """Get all categories for a user with allocation data."""
-        from ..models import Budget, BudgetPeriod, BudgetAllocation, RecurringBudgetAllocation
+    def get_user_categories(user_id, allocations=None, period_totals=None):
+        """
+        Get all categories for a user with allocation data.
         
-        categories = Category.query.filter_by(user_id=user_id).all()
+        Args:
+            user_id: User ID
+            allocations: Optional subcategory_id -> allocated amount of the active
+                budget, when the caller has already loaded it
+            period_totals: Optional SpendingAggregator.period_totals() of the active
+                period, when the caller has already loaded it
+        """
+        from ..models import BudgetAllocation, RecurringBudgetAllocation
+        from ..utils.active_budget import ActiveBudgetContext
+        
+        categories = Category.query.filter_by(user_id=user_id).options(
+            db.selectinload(Category.subcategories)
+        ).order_by(Category.id).all()
         result = []
         
         # Get active budget allocations and spent amounts
-        active_period = BudgetPeriod.query.filter_by(user_id=user_id, is_active=True).first()
-        allocations = {}
+        active_period = ActiveBudgetContext.resolve(user_id)
         spent_amounts = {}
         
         # Get all active recurring allocations to check if a subcategory has a recurring allocation
@@ -29,29 +43,21 @@ class CategoryService:
         ).all()
         subcategory_has_recurring = {alloc.subcategory_id: True for alloc in recurring_allocations}
         
-        if active_period:
-            budget = Budget.query.filter_by(period_id=active_period.id, user_id=user_id).first()
-            if budget:
-                # Get allocations
-                budget_allocations = BudgetAllocation.query.filter_by(budget_id=budget.id).all()
-                for allocation in budget_allocations:
-                    allocations[allocation.subcategory_id] = allocation.allocated_amount
-                
-                # Get spent amounts from transactions
-                from ..models import Transaction
-                transactions = Transaction.query.filter(
-                    Transaction.user_id == user_id,
-                    Transaction.transaction_date >= active_period.start_date,
-                    Transaction.transaction_date <= active_period.end_date
-                ).all()
-                
-                for transaction in transactions:
-                    subcategory_id = transaction.subcategory_id
-                    if subcategory_id not in spent_amounts:
-                        spent_amounts[subcategory_id] = 0
-                    # Only count negative amounts (expenses) as spent
-                    if transaction.amount < 0:
-                        spent_amounts[subcategory_id] += abs(transaction.amount)
+        if active_period and active_period.budget_id is not None:
+            # Get allocations
+            if allocations is None:
+                allocations = dict(db.session.query(
+                    BudgetAllocation.subcategory_id, BudgetAllocation.allocated_amount
+                ).filter(BudgetAllocation.budget_id == active_period.budget_id))
+            
+            # Get spent amounts (expenses only)
+            if period_totals is None:
+                from .spending_aggregator import SpendingAggregator
+                period_totals = SpendingAggregator.period_totals(user_id, active_period.period_id)
+            for subcategory_id, totals in period_totals.items():
+                spent_amounts[subcategory_id] = totals['spent_total']
+        else:
+            allocations = {}
         
         for category in categories:
             category_data = {
@@ -93,6 +99,7 @@ class CategoryService:
             is_template=is_template
         )
         db.session.add(category)
+        bump_data_version(user_id)
         db.session.commit()
         return category
     
@@ -104,6 +111,9 @@ class CategoryService:
             category_id=category_id
         )
         db.session.add(subcategory)
+        category = Category.query.get(category_id)
+        if category:
+            bump_data_version(category.user_id)
         db.session.commit()
         return subcategory
     
@@ -115,6 +125,7 @@ class CategoryService:
             return None
         
         category.name = name
+        bump_data_version(user_id)
         db.session.commit()
         return category
     
@@ -126,6 +137,7 @@ class CategoryService:
             return None
         
         subcategory.name = name
+        bump_data_version(subcategory.category.user_id)
         db.session.commit()
         return subcategory
     
@@ -136,7 +148,25 @@ class CategoryService:
         if not category:
             return False
         
+        from ..models import SpendingRollup, CategorizationRule, ArchivedTransaction, PeriodSnapshotLine
+        subcategory_ids = [subcategory.id for subcategory in category.subcategories]
+        ArchivedTransaction.query.filter(
+            ArchivedTransaction.subcategory_id.in_(subcategory_ids)
+        ).delete(synchronize_session=False)
+        SpendingRollup.query.filter(
+            SpendingRollup.subcategory_id.in_(subcategory_ids)
+        ).delete(synchronize_session=False)
+        CategorizationRule.query.filter(
+            CategorizationRule.subcategory_id.in_(subcategory_ids)
+        ).delete(synchronize_session=False)
+        PeriodSnapshotLine.query.filter(
+            PeriodSnapshotLine.subcategory_id.in_(subcategory_ids)
+        ).delete(synchronize_session=False)
+        
         db.session.delete(category)
+        refresh_budget_totals(user_id=user_id, columns=('total_allocated', 'total_spent'))
+        PeriodSnapshotService.refresh(user_id=user_id)
+        bump_data_version(user_id)
         db.session.commit()
         return True
     
@@ -149,16 +179,24 @@ class CategoryService:
                 return False
             
             # Delete related budget allocations first
-            from ..models import BudgetAllocation, RecurringBudgetAllocation
+            from ..models import BudgetAllocation, RecurringBudgetAllocation, CategorizationRule
             BudgetAllocation.query.filter_by(subcategory_id=subcategory_id).delete()
             RecurringBudgetAllocation.query.filter_by(subcategory_id=subcategory_id).delete()
+            CategorizationRule.query.filter_by(subcategory_id=subcategory_id).delete()
             
-            # Delete related transactions
-            from ..models import Transaction
+            # Delete related transactions and their spending rollup rows
+            from ..models import Transaction, ArchivedTransaction, SpendingRollup, PeriodSnapshotLine
             Transaction.query.filter_by(subcategory_id=subcategory_id).delete()
+            ArchivedTransaction.query.filter_by(subcategory_id=subcategory_id).delete()
+            SpendingRollup.query.filter_by(subcategory_id=subcategory_id).delete()
+            PeriodSnapshotLine.query.filter_by(subcategory_id=subcategory_id).delete()
             
             # Now delete the subcategory
+            user_id = subcategory.category.user_id
             db.session.delete(subcategory)
+            refresh_budget_totals(user_id=user_id, columns=('total_allocated', 'total_spent'))
+            PeriodSnapshotService.refresh(user_id=user_id)
+            bump_data_version(user_id)
             db.session.commit()
             return True
         except Exception as e:
@@ -422,4 +460,5 @@ class CategoryService:
         else:
             print("Validation passed: No duplicate subcategories found.")
         
+        bump_data_version(user_id)
         db.session.commit()
@@ -0,0 +1,81 @@
+"""
+Dashboard service for building the dashboard's data in one request.
+"""
+
+from ..utils.active_budget import ActiveBudgetContext
+from .budget_service import BudgetService
+from .category_service import CategoryService
+from .account_service import AccountService
+from .user_service import UserService
+from .spending_aggregator import SpendingAggregator
+from .forecast_service import ForecastService
+
+
+class DashboardService:
+    """
+    Service for the composite dashboard payload.
+
+    The dashboard used to call six endpoints, each resolving the active period and
+    budget and re-reading allocations and spending. Here the active period is
+    resolved once, the budget (with its allocations) is loaded once and the
+    period's spending rollup is read once; every section is derived from those.
+    The forecast reuses the allocations and subcategory names loaded here.
+    """
+
+    @staticmethod
+    def get_dashboard(user):
+        """
+        Get everything the dashboard shows for a user.
+
+        Each section has the same shape as the response of the endpoint it
+        replaces: budget (GET /api/budget/budget), categories (GET
+        /api/categories/categories), balance_check (GET /api/budget/balance-check),
+        overspending (GET /api/budget/overspending-check), forecast (GET
+        /api/analytics/forecast), accounts_summary (GET
+        /api/accounts/balance-summary) and settings (GET /api/user/settings).
+
+        Args:
+            user: User
+
+        Returns:
+            Dashboard dict; budget, balance_check, overspending and forecast are
+            None when the user has no active budget
+        """
+        active_period = ActiveBudgetContext.resolve(user.id)
+        # Holding the row keeps it in the session for get_budget and the balance check
+        budget_row = active_period.budget() if active_period else None
+        budget = BudgetService.get_budget(user.id) if budget_row else None
+
+        if budget:
+            period_totals = SpendingAggregator.period_totals(user.id, active_period.period_id)
+            allocations = {
+                allocation['subcategory']['id']: allocation['allocated_amount']
+                for allocation in budget['allocations']
+            }
+        else:
+            period_totals = allocations = None
+
+        categories = CategoryService.get_user_categories(user.id, allocations, period_totals)
+
+        balance_check = overspending = forecast = None
+        app_balance = 0
+        if budget:
+            balance_check = BudgetService.check_balance(budget_row)
+            subcategory_names = {
+                subcategory['id']: (subcategory['name'], category['name'])
+                for category in categories
+                for subcategory in category['subcategories']
+            }
+            overspending = BudgetService.find_overspending(user.id, budget, period_totals, subcategory_names)
+            forecast = ForecastService.get_period_forecast(user.id, allocations, subcategory_names)
+            app_balance = balance_check['total_income'] - (budget['total_spent'] or 0)
+
+        return {
+            'budget': budget,
+            'categories': categories,
+            'balance_check': balance_check,
+            'overspending': overspending,
+            'forecast': forecast,
+            'accounts_summary': AccountService.get_balance_summary(user.id, app_balance),
+            'settings': UserService.get_user_settings(user)
+        }
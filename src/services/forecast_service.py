@@ -0,0 +1,229 @@
+"""
+Forecast service for projecting end-of-period spending.
+"""
+
+from datetime import date, datetime, time, timedelta
+from ..extensions import db
+from ..models import BudgetAllocation, Category, Subcategory
+from ..utils.active_budget import ActiveBudgetContext
+from ..utils.cache import user_cache
+from ..utils.data_version import get_data_version
+from .spending_aggregator import SpendingAggregator
+
+
+class ForecastService:
+    """
+    Service for end-of-period spending forecasts of the active budget period.
+
+    A user's daily spend is loaded in one grouped query as a (subcategory x day)
+    NumPy matrix covering the active period so far and the weeks before it. Every
+    projection is then a handful of array operations over all subcategories at
+    once:
+
+    - burn_rate: spend so far continued at its average daily rate
+    - linear: least-squares line through the period's cumulative spend
+    - seasonal: spend so far plus each subcategory's average spend per weekday
+      over the remaining days, from SEASONAL_LOOKBACK_DAYS of history
+
+    The forecast used for flagging is the seasonal projection when there is
+    enough history, else the linear one, else the burn rate.
+    """
+
+    METHODS = ('burn_rate', 'linear', 'seasonal')
+    # Days of history feeding the weekday profile of the seasonal projection
+    SEASONAL_LOOKBACK_DAYS = 84
+    # Days of spending history needed before the seasonal projection is used
+    SEASONAL_MIN_DAYS = 14
+
+    @staticmethod
+    def _daily_spend(user_id, positions, date_from, date_to):
+        """
+        Spend per subcategory and day as a matrix.
+
+        Args:
+            user_id: User ID
+            positions: subcategory_id -> row index
+            date_from: First day (column 0)
+            date_to: Last day (inclusive)
+
+        Returns:
+            Float array of shape (len(positions), days)
+        """
+        import numpy as np
+
+        ledger = SpendingAggregator.ledger()
+        day = db.func.date(ledger.c.transaction_date).label('day')
+        rows = db.session.query(
+            day,
+            ledger.c.subcategory_id,
+            db.func.sum(-ledger.c.amount).label('spent')
+        ).filter(
+            ledger.c.user_id == user_id,
+            ledger.c.transaction_date >= datetime.combine(date_from, time.min),
+            ledger.c.transaction_date < datetime.combine(date_to + timedelta(days=1), time.min),
+            ledger.c.amount < 0
+        ).group_by(day, ledger.c.subcategory_id).all()
+
+        matrix = np.zeros((len(positions), (date_to - date_from).days + 1))
+        rows = [row for row in rows if row.subcategory_id in positions]
+        if rows:
+            row_index = np.fromiter((positions[row.subcategory_id] for row in rows), dtype=np.intp, count=len(rows))
+            column_index = np.fromiter((
+                ((row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day)[:10])) - date_from).days
+                for row in rows
+            ), dtype=np.intp, count=len(rows))
+            values = np.fromiter((row.spent or 0 for row in rows), dtype=float, count=len(rows))
+            np.add.at(matrix, (row_index, column_index), values)
+        return matrix
+
+    @staticmethod
+    def get_period_forecast(user_id, allocations=None, subcategory_names=None, today=None):
+        """
+        Project each subcategory's spending at the end of the active budget period.
+
+        Results are cached per user and keyed on the user's data version and the
+        day, so any change to their data misses the cache.
+
+        Args:
+            user_id: User ID
+            allocations: Optional subcategory_id -> allocated amount of the active
+                budget; loaded in one query when omitted
+            subcategory_names: Optional subcategory_id -> (subcategory name,
+                category name) covering the user's subcategories; loaded in one
+                query when omitted
+            today: Date to forecast from; defaults to today
+
+        Returns:
+            Forecast dict, or None if the user has no active period
+        """
+        import numpy as np
+
+        today = today or date.today()
+        cache_key = ('forecast', get_data_version(user_id), today)
+        cached = user_cache.get(user_id, cache_key)
+        if cached is not None:
+            return cached
+
+        active_period = ActiveBudgetContext.resolve(user_id)
+        if active_period is None:
+            return None
+        start, end = active_period.start_date, active_period.end_date
+
+        if allocations is None:
+            allocations = {}
+            if active_period.budget_id is not None:
+                allocations = dict(db.session.query(
+                    BudgetAllocation.subcategory_id, BudgetAllocation.allocated_amount
+                ).filter(BudgetAllocation.budget_id == active_period.budget_id))
+        if subcategory_names is None:
+            subcategory_names = {
+                row.id: (row.name, row.category_name)
+                for row in db.session.query(
+                    Subcategory.id, Subcategory.name, Category.name.label('category_name')
+                ).join(
+                    Category, Subcategory.category_id == Category.id
+                ).filter(Category.user_id == user_id)
+            }
+        subcategory_ids = list(subcategory_names)
+        positions = {subcategory_id: index for index, subcategory_id in enumerate(subcategory_ids)}
+
+        # Day axis: lookback history (or the whole period, if longer) up to today
+        period_days = (end - start).days + 1
+        window_start = min(start, today - timedelta(days=ForecastService.SEASONAL_LOOKBACK_DAYS - 1))
+        window_end = max(min(today, end), window_start)
+        daily = ForecastService._daily_spend(user_id, positions, window_start, window_end)
+
+        elapsed = min(max((today - start).days + 1, 0), period_days)
+        first_remaining = max(today + timedelta(days=1), start)
+        remaining_days = max((end - first_remaining).days + 1, 0)
+        offset = (start - window_start).days
+        period_daily = daily[:, offset:offset + elapsed]
+        spent = period_daily.sum(axis=1)
+        allocated = np.fromiter(
+            (allocations.get(subcategory_id) or 0 for subcategory_id in subcategory_ids),
+            dtype=float, count=len(subcategory_ids)
+        )
+
+        projections = dict.fromkeys(ForecastService.METHODS)
+        if elapsed:
+            projections['burn_rate'] = spent + spent / elapsed * remaining_days
+        if elapsed >= 2:
+            # Least-squares slope and intercept of cumulative spend against day number
+            days = np.arange(1, elapsed + 1, dtype=float)
+            cumulative = period_daily.cumsum(axis=1)
+            centered = days - days.mean()
+            slope = (cumulative - cumulative.mean(axis=1, keepdims=True)) @ centered / (centered @ centered)
+            intercept = cumulative.mean(axis=1) - slope * days.mean()
+            projections['linear'] = np.maximum(intercept + slope * period_days, spent)
+
+        active_days = np.flatnonzero(daily.any(axis=0))
+        if active_days.size and daily.shape[1] - active_days[0] >= ForecastService.SEASONAL_MIN_DAYS:
+            # Average spend per weekday since the first day with any spending
+            history = daily[:, active_days[0]:]
+            weekdays = (window_start.weekday() + active_days[0] + np.arange(history.shape[1])) % 7
+            weekday_matrix = np.eye(7)[weekdays]
+            profile = (history @ weekday_matrix) / np.maximum(weekday_matrix.sum(axis=0), 1)
+            remaining_weekdays = np.bincount(
+                (first_remaining.weekday() + np.arange(remaining_days)) % 7, minlength=7
+            )
+            projections['seasonal'] = spent + profile @ remaining_weekdays
+
+        forecast = next(
+            (projections[method] for method in ('seasonal', 'linear', 'burn_rate') if projections[method] is not None),
+            spent
+        )
+        overspend = np.maximum(forecast - allocated, 0)
+        at_risk = forecast > allocated + 0.005
+
+        def values(array):
+            return np.round(array, 2).tolist() if array is not None else [None] * len(subcategory_ids)
+
+        columns = {
+            'allocated': values(allocated),
+            'spent': values(spent),
+            'forecast': values(forecast),
+            'projected_overspend': values(overspend),
+            **{method: values(projections[method]) for method in ForecastService.METHODS}
+        }
+        shown = np.flatnonzero((allocated > 0) | (forecast > 0)).tolist()
+        subcategories = []
+        for index in shown:
+            name, category_name = subcategory_names[subcategory_ids[index]]
+            subcategories.append({
+                'id': subcategory_ids[index],
+                'name': name,
+                'category_name': category_name,
+                'allocated': columns['allocated'][index],
+                'spent': columns['spent'][index],
+                'projections': {method: columns[method][index] for method in ForecastService.METHODS},
+                'forecast': columns['forecast'][index],
+                'projected_overspend': columns['projected_overspend'][index],
+                'at_risk': bool(at_risk[index])
+            })
+        subcategories.sort(key=lambda entry: (-entry['projected_overspend'], entry['category_name'], entry['name']))
+
+        def total(array):
+            return round(float(array.sum()), 2) if array is not None else None
+
+        result = {
+            'period': {
+                'id': active_period.period_id,
+                'name': active_period.name,
+                'start_date': start.isoformat(),
+                'end_date': end.isoformat()
+            },
+            'as_of': today.isoformat(),
+            'period_days': period_days,
+            'days_elapsed': elapsed,
+            'days_remaining': remaining_days,
+            'subcategories': subcategories,
+            'totals': {
+                'allocated': total(allocated),
+                'spent': total(spent),
+                'projections': {method: total(projections[method]) for method in ForecastService.METHODS},
+                'forecast': total(forecast)
+            },
+            'at_risk_count': int(at_risk.sum())
+        }
+        user_cache.set(user_id, cache_key, result)
+        return result
@@ -0,0 +1,282 @@
+"""
+Import service for bulk-loading transactions from bank statements.
+"""
+
+import csv
+import io
+from datetime import datetime, time, timedelta
+from marshmallow import ValidationError
+from ..extensions import db
+from ..models import Transaction, ArchivedTransaction, Category, Subcategory
+from ..schemas import TransactionImportRowSchema
+from ..utils.statements import parse_statement
+from ..utils.data_version import bump_data_version
+from ..utils.fingerprint import transaction_fingerprint, DUPLICATE_WINDOW_DAYS
+from .spending_rollup_service import SpendingRollupService
+from .categorization_service import CategorizationService
+
+
+class TransactionImportService:
+    """Service for streaming statement imports."""
+
+    # Rows validated and inserted per round trip
+    CHUNK_SIZE = 1000
+    # Cap on per-row errors returned to the client so a bad file can't blow up the response
+    MAX_REPORTED_ERRORS = 500
+
+    @staticmethod
+    def _subcategory_lookup(user_id):
+        """
+        Build name -> subcategory ID maps for a user's subcategories.
+
+        Returns:
+            Tuple of (ids, by_name, by_path) where by_path is keyed on
+            (category name, subcategory name), all lowercased
+        """
+        rows = db.session.query(
+            Subcategory.id, Subcategory.name, Category.name
+        ).join(Category, Subcategory.category_id == Category.id).filter(
+            Category.user_id == user_id
+        ).all()
+
+        ids = {row[0] for row in rows}
+        by_name = {}
+        by_path = {}
+        for subcategory_id, subcategory_name, category_name in rows:
+            by_name.setdefault(subcategory_name.strip().lower(), subcategory_id)
+            by_path[(category_name.strip().lower(), subcategory_name.strip().lower())] = subcategory_id
+        return ids, by_name, by_path
+
+    @staticmethod
+    def _resolve_subcategory(name, by_name, by_path):
+        """Map a statement category label ('Sub' or 'Category:Sub') to a subcategory ID."""
+        label = name.strip().lower()
+        if ':' in label:
+            category_name, _, subcategory_name = label.partition(':')
+            subcategory_id = by_path.get((category_name.strip(), subcategory_name.strip()))
+            if subcategory_id:
+                return subcategory_id
+            label = subcategory_name.strip()
+        return by_name.get(label)
+
+    @staticmethod
+    def _bulk_insert(rows):
+        """
+        Insert a chunk of transaction rows in a single round trip.
+
+        Uses COPY on PostgreSQL and an executemany INSERT elsewhere. Runs inside the
+        session's current transaction so the import commits or rolls back as a whole.
+        """
+        if not rows:
+            return
+
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql':
+            columns = ('amount', 'description', 'comment', 'subcategory_id', 'user_id', 'transaction_date', 'fingerprint')
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([row[column] for column in columns])
+            buffer.seek(0)
+            cursor = connection.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f'COPY "transaction" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+            finally:
+                cursor.close()
+        else:
+            db.session.execute(Transaction.__table__.insert(), rows)
+
+    @staticmethod
+    def _find_duplicates(user_id, rows, last_existing_id, matched):
+        """
+        Find the rows of a chunk that repeat transactions the user already had.
+
+        One query per table (live and archived) fetches the candidates for the whole
+        chunk through their (user_id, fingerprint, transaction_date) indexes. Each existing transaction can only
+        account for one imported row, so a statement that legitimately contains
+        the same line twice is only skipped as far as it was already imported.
+        Rows inserted earlier in the same import (id > last_existing_id) are not
+        considered.
+
+        Args:
+            user_id: User ID
+            rows: Transaction rows of the chunk
+            last_existing_id: Highest transaction ID the user had before the import
+            matched: Set of (table name, ID) of existing transactions already
+                matched by earlier chunks; updated with this chunk's matches
+
+        Returns:
+            Set of indexes into rows that are duplicates
+        """
+        if not rows or last_existing_id is None:
+            return set()
+
+        window = timedelta(days=DUPLICATE_WINDOW_DAYS)
+        days = [row['transaction_date'].date() for row in rows]
+        fingerprints = {row['fingerprint'] for row in rows}
+        candidates = {}
+        for model in (Transaction, ArchivedTransaction):
+            for transaction_id, fingerprint, transaction_date in db.session.query(
+                model.id, model.fingerprint, model.transaction_date
+            ).filter(
+                model.user_id == user_id,
+                model.fingerprint.in_(fingerprints),
+                model.transaction_date >= datetime.combine(min(days) - window, time.min),
+                model.transaction_date < datetime.combine(max(days) + window + timedelta(days=1), time.min),
+                model.id <= last_existing_id
+            ):
+                key = (model.__tablename__, transaction_id)
+                if key not in matched:
+                    candidates.setdefault(fingerprint, []).append((transaction_date.date(), key))
+
+        duplicates = set()
+        for index, row in enumerate(rows):
+            existing = candidates.get(row['fingerprint'])
+            if not existing:
+                continue
+            closest = min(existing, key=lambda candidate: abs((candidate[0] - days[index]).days))
+            if abs((closest[0] - days[index]).days) <= DUPLICATE_WINDOW_DAYS:
+                existing.remove(closest)
+                matched.add(closest[1])
+                duplicates.add(index)
+        return duplicates
+
+    @staticmethod
+    def import_transactions(user_id, stream, file_format, default_subcategory_id=None, date_format=None,
+                            skip_duplicates=True):
+        """
+        Import a bank statement for a user.
+
+        The statement is parsed as a stream and processed CHUNK_SIZE rows at a time:
+        each chunk is mapped to subcategories, validated with TransactionImportRowSchema
+        and bulk inserted, so memory use is bounded by the chunk size rather than the
+        file size. Rows whose category label doesn't name one of the user's
+        subcategories are assigned by the user's categorization rules, then fall
+        back to default_subcategory_id. The spending rollup is updated per chunk. Valid rows are committed
+        together at the end; invalid rows are skipped and reported. Rows matching a
+        transaction the user already had (same amount and description within
+        DUPLICATE_WINDOW_DAYS days) are skipped and reported unless skip_duplicates is off.
+
+        Args:
+            user_id: User ID
+            stream: Text stream of the statement file
+            file_format: 'csv', 'ofx' or 'qif'
+            default_subcategory_id: Subcategory for rows without a recognised category
+            date_format: Optional strptime format for statement dates
+            skip_duplicates: Skip rows that duplicate existing transactions
+
+        Returns:
+            Dict with imported, failed and duplicate counts, a per-row error report
+            and the line numbers of skipped duplicates
+
+        Raises:
+            ValueError: If the default subcategory does not belong to the user
+        """
+        subcategory_ids, by_name, by_path = TransactionImportService._subcategory_lookup(user_id)
+        matcher = CategorizationService.get_matcher(user_id)
+        if default_subcategory_id is not None and default_subcategory_id not in subcategory_ids:
+            raise ValueError('Default subcategory not found')
+
+        schema = TransactionImportRowSchema(many=True)
+        report = {
+            'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False,
+            'duplicates': 0, 'duplicate_rows': []
+        }
+
+        last_existing_id = None
+        matched = set()
+        if skip_duplicates:
+            last_existing_id = db.session.query(db.func.max(Transaction.id)).filter(
+                Transaction.user_id == user_id
+            ).scalar()
+
+        def record_error(line_number, errors):
+            report['failed'] += 1
+            if len(report['errors']) < TransactionImportService.MAX_REPORTED_ERRORS:
+                report['errors'].append({'row': line_number, 'errors': errors})
+            else:
+                report['errors_truncated'] = True
+
+        def flush_chunk(chunk):
+            line_numbers = [line_number for line_number, _ in chunk]
+            try:
+                validated = schema.load([row for _, row in chunk])
+                invalid = {}
+            except ValidationError as err:
+                validated = err.valid_data
+                invalid = err.messages
+
+            rows = []
+            row_line_numbers = []
+            for index, data in enumerate(validated):
+                if index in invalid:
+                    record_error(line_numbers[index], invalid[index])
+                    continue
+                transaction_date = data.get('transaction_date')
+                rows.append({
+                    'amount': data['amount'],
+                    'description': data.get('description'),
+                    'comment': data.get('comment'),
+                    'subcategory_id': data['subcategory_id'],
+                    'user_id': user_id,
+                    'transaction_date': (
+                        datetime.combine(transaction_date, time.min) if transaction_date else datetime.utcnow()
+                    ),
+                    'fingerprint': transaction_fingerprint(user_id, data['amount'], data.get('description'))
+                })
+                row_line_numbers.append(line_numbers[index])
+
+            duplicates = TransactionImportService._find_duplicates(user_id, rows, last_existing_id, matched)
+            for index in sorted(duplicates):
+                report['duplicates'] += 1
+                if len(report['duplicate_rows']) < TransactionImportService.MAX_REPORTED_ERRORS:
+                    report['duplicate_rows'].append(row_line_numbers[index])
+            if duplicates:
+                rows = [row for index, row in enumerate(rows) if index not in duplicates]
+
+            TransactionImportService._bulk_insert(rows)
+            SpendingRollupService.apply_changes(user_id, (
+                (row['subcategory_id'], row['transaction_date'], row['amount'], 1) for row in rows
+            ))
+            report['imported'] += len(rows)
+
+        chunk = []
+        try:
+            for line_number, row in parse_statement(stream, file_format, date_format=date_format):
+                label = row.pop('subcategory', None)
+                subcategory_id = None
+                if label:
+                    subcategory_id = TransactionImportService._resolve_subcategory(label, by_name, by_path)
+                if subcategory_id is None and len(matcher):
+                    try:
+                        amount = float(row.get('amount'))
+                    except (TypeError, ValueError):
+                        amount = None
+                    subcategory_id = CategorizationService.categorize(
+                        user_id, row.get('description'), amount, matcher=matcher
+                    )
+                if subcategory_id is None:
+                    subcategory_id = default_subcategory_id
+                if subcategory_id is None:
+                    message = f'Unknown subcategory "{label}"' if label else 'Subcategory could not be determined'
+                    record_error(line_number, {'subcategory_id': [message]})
+                    continue
+
+                row['subcategory_id'] = subcategory_id
+                chunk.append((line_number, row))
+                if len(chunk) >= TransactionImportService.CHUNK_SIZE:
+                    flush_chunk(chunk)
+                    chunk = []
+
+            flush_chunk(chunk)
+            bump_data_version(user_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        report['errors'].sort(key=lambda error: error['row'])
+        return report
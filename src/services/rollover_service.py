@@ -0,0 +1,258 @@
+"""
+Rollover service for starting users' next budget periods in bulk.
+"""
+
+import calendar
+from datetime import date, timedelta
+from ..extensions import db
+from ..models import Budget, BudgetPeriod, BudgetAllocation, SpendingRollup
+from ..utils.budget import populate_budgets_from_recurring, refresh_budget_totals
+from ..utils.data_version import bump_data_versions
+from .budget_service import BudgetService
+from .spending_rollup_service import SpendingRollupService
+from .snapshot_service import PeriodSnapshotService
+
+
+class BudgetRolloverService:
+    """
+    Service for the scheduled period rollover job.
+
+    Users whose active period has ended get the next period of the same type, made
+    active, with a budget carrying the previous period's remaining balance forward
+    and populated from their recurring income sources and allocations. Work is done
+    in chunks of users: each chunk is a fixed handful of set-based statements and
+    one commit, however many users it holds.
+    """
+
+    # Users rolled over per chunk (and per commit)
+    CHUNK_SIZE = 500
+    # Months spanned by each fixed-length period type
+    PERIOD_MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+    @staticmethod
+    def _add_months(day, months):
+        month_index = day.month - 1 + months
+        year, month = day.year + month_index // 12, month_index % 12 + 1
+        return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+    @staticmethod
+    def next_period(period_type, start_date, end_date):
+        """
+        Work out the period following one that ended.
+
+        Monthly, quarterly and yearly periods advance by calendar months from the
+        day after the previous end; custom periods repeat the previous length.
+        Names follow the budgets page ("January 2025", "Q1 2025", "2025").
+
+        Returns:
+            Tuple of (name, start_date, end_date)
+        """
+        start = end_date + timedelta(days=1)
+        months = BudgetRolloverService.PERIOD_MONTHS.get(period_type)
+        if months:
+            end = BudgetRolloverService._add_months(start, months) - timedelta(days=1)
+        else:
+            end = start + (end_date - start_date)
+
+        if period_type == 'monthly':
+            name = start.strftime('%B %Y')
+        elif period_type == 'quarterly':
+            name = f'Q{(start.month - 1) // 3 + 1} {start.year}'
+        elif period_type == 'yearly':
+            name = str(start.year)
+        else:
+            name = f'{start.isoformat()} to {end.isoformat()}'
+        return name, start, end
+
+    @staticmethod
+    def rollover_all(today=None, user_id=None, carry_envelopes=False):
+        """
+        Roll over every user (optionally one user) whose active period has ended.
+
+        Runs passes until no active period has ended, so a user who has been away
+        for several periods gets each missing period in turn, with balances carried
+        through all of them.
+
+        Args:
+            today: Date to roll over to; defaults to today
+            user_id: Optional user ID to restrict the job to
+            carry_envelopes: Also add each subcategory's unspent allocation to the
+                same subcategory's allocation in the new period
+
+        Returns:
+            Dict with periods (periods created) and skipped (users whose next
+            period would overlap an existing period of the same type)
+        """
+        today = today or date.today()
+        created = 0
+        skipped = set()
+        while True:
+            after_user_id = 0
+            rolled = 0
+            while True:
+                query = db.session.query(
+                    BudgetPeriod.id,
+                    BudgetPeriod.user_id,
+                    BudgetPeriod.period_type,
+                    BudgetPeriod.start_date,
+                    BudgetPeriod.end_date
+                ).filter(
+                    BudgetPeriod.is_active.is_(True),
+                    BudgetPeriod.end_date < today,
+                    BudgetPeriod.user_id > after_user_id
+                )
+                if user_id is not None:
+                    query = query.filter(BudgetPeriod.user_id == user_id)
+                if skipped:
+                    query = query.filter(BudgetPeriod.user_id.notin_(skipped))
+                periods = query.order_by(BudgetPeriod.user_id, BudgetPeriod.id).limit(
+                    BudgetRolloverService.CHUNK_SIZE
+                ).all()
+                if not periods:
+                    break
+                after_user_id = periods[-1].user_id
+
+                count, conflicts = BudgetRolloverService._rollover_chunk(periods, carry_envelopes)
+                rolled += count
+                skipped.update(conflicts)
+            created += rolled
+            if not rolled:
+                break
+
+        return {'periods': created, 'skipped': len(skipped)}
+
+    @staticmethod
+    def _rollover_chunk(ended_periods, carry_envelopes):
+        """
+        Create and activate the next period for each ended active period in a chunk.
+
+        Returns:
+            Tuple of (periods created, IDs of users skipped because of an overlap)
+        """
+        # A user with several active periods rolls over from the first one only
+        by_user = {}
+        for period in ended_periods:
+            by_user.setdefault(period.user_id, period)
+
+        proposals = {
+            user_id: BudgetRolloverService.next_period(period.period_type, period.start_date, period.end_date)
+            for user_id, period in by_user.items()
+        }
+
+        # Skip users whose next period collides with an existing one
+        user_ids = list(by_user)
+        overlapping = BudgetService._check_period_overlaps([
+            {
+                'user_id': user_id,
+                'period_type': by_user[user_id].period_type,
+                'start_date': proposals[user_id][1],
+                'end_date': proposals[user_id][2]
+            }
+            for user_id in user_ids
+        ])
+        conflicts = {user_ids[index] for index in overlapping}
+        for user_id in conflicts:
+            del by_user[user_id]
+        if not by_user:
+            return 0, conflicts
+
+        ended_ids = [period.id for period in by_user.values()]
+
+        # Remaining balance of each ended period: income + brought forward - spent
+        balances = {
+            period_id: (total_income or 0) + (brought_forward or 0) - (total_spent or 0)
+            for period_id, total_income, brought_forward, total_spent in db.session.query(
+                Budget.period_id,
+                Budget.total_income,
+                Budget.balance_brought_forward,
+                Budget.total_spent
+            ).filter(Budget.period_id.in_(ended_ids))
+        }
+
+        envelopes = {}
+        if carry_envelopes:
+            # Unspent allocation per (ended period, subcategory)
+            for period_id, subcategory_id, allocated, spent_total in db.session.query(
+                Budget.period_id,
+                BudgetAllocation.subcategory_id,
+                BudgetAllocation.allocated_amount,
+                SpendingRollup.spent_total
+            ).join(
+                BudgetAllocation, BudgetAllocation.budget_id == Budget.id
+            ).outerjoin(
+                SpendingRollup, db.and_(
+                    SpendingRollup.budget_period_id == Budget.period_id,
+                    SpendingRollup.subcategory_id == BudgetAllocation.subcategory_id
+                )
+            ).filter(Budget.period_id.in_(ended_ids)):
+                remaining = (allocated or 0) - (spent_total or 0)
+                if remaining > 0:
+                    envelopes.setdefault(period_id, {})[subcategory_id] = remaining
+
+        # Deactivate (and close) every active period of the chunk's users, as
+        # create_budget_period does
+        closing = [row[0] for row in db.session.query(BudgetPeriod.id).filter(
+            BudgetPeriod.user_id.in_(list(by_user)),
+            BudgetPeriod.is_active.is_(True)
+        )]
+        BudgetPeriod.query.filter(
+            BudgetPeriod.user_id.in_(list(by_user)),
+            BudgetPeriod.is_active.is_(True)
+        ).update({'is_active': False}, synchronize_session=False)
+
+        new_periods = {}
+        for user_id, ended in by_user.items():
+            name, start, end = proposals[user_id]
+            new_periods[user_id] = BudgetPeriod(
+                name=name,
+                period_type=ended.period_type,
+                start_date=start,
+                end_date=end,
+                user_id=user_id,
+                is_active=True
+            )
+        db.session.add_all(new_periods.values())
+        db.session.flush()
+
+        new_budgets = {
+            user_id: Budget(
+                period_id=new_periods[user_id].id,
+                user_id=user_id,
+                balance_brought_forward=balances.get(ended.id, 0)
+            )
+            for user_id, ended in by_user.items()
+        }
+        db.session.add_all(new_budgets.values())
+        db.session.flush()
+
+        budget_ids = [budget.id for budget in new_budgets.values()]
+        populate_budgets_from_recurring(budget_ids)
+
+        if envelopes:
+            allocated = {
+                (budget_id, subcategory_id): amount
+                for budget_id, subcategory_id, amount in db.session.query(
+                    BudgetAllocation.budget_id, BudgetAllocation.subcategory_id, BudgetAllocation.allocated_amount
+                ).filter(BudgetAllocation.budget_id.in_(budget_ids))
+            }
+            rows = [
+                {
+                    'budget_id': new_budgets[user_id].id,
+                    'subcategory_id': subcategory_id,
+                    'allocated_amount': allocated.get((new_budgets[user_id].id, subcategory_id), 0) + remaining
+                }
+                for user_id, ended in by_user.items()
+                for subcategory_id, remaining in envelopes.get(ended.id, {}).items()
+            ]
+            BudgetService._upsert_allocations(rows, set(allocated))
+            refresh_budget_totals(budget_ids, columns=('total_allocated',))
+
+        # Transactions already dated inside the new periods count towards them
+        SpendingRollupService.rebuild_periods([period.id for period in new_periods.values()])
+        PeriodSnapshotService.close_periods(closing)
+        bump_data_versions(list(by_user))
+        db.session.commit()
+        # Drop the chunk's ORM objects so memory stays flat across chunks
+        db.session.expunge_all()
+
+        return len(by_user), conflicts
@@ -0,0 +1,231 @@
+"""
+Period snapshot service for freezing the figures of closed budget periods.
+"""
+
+from datetime import date, datetime
+from ..extensions import db
+from ..models import (
+    Budget, BudgetPeriod, Category, PeriodSnapshot, PeriodSnapshotLine, SpendingRollup, Subcategory
+)
+from .spending_aggregator import SpendingAggregator
+
+
+class PeriodSnapshotService:
+    """
+    Service for the period_snapshot and period_snapshot_line tables.
+
+    A period is closed (snapshotted) when it stops being the active period. Its
+    budget-level figures and per-subcategory allocated/spent/income/remaining
+    are copied with two INSERT ... SELECT statements, after which history reads
+    are plain primary-key and index lookups. Re-opening a period discards its
+    snapshot; a late change to a closed period (a transaction edit, new dates,
+    a deleted subcategory) rebuilds the snapshot of just the periods it touched.
+    Write methods never commit, like SpendingRollupService.
+    """
+
+    # Periods closed per statement (and per commit) by close_ended
+    CHUNK_SIZE = 200
+
+    SUMMARY_COLUMNS = (
+        'total_income', 'balance_brought_forward', 'total_allocated', 'total_spent',
+        'transaction_income', 'carry_forward'
+    )
+    LINE_COLUMNS = ('allocated', 'spent', 'income', 'remaining')
+
+    @staticmethod
+    def _summary_select(period_ids):
+        """Select computing each period's budget-level figures, in SUMMARY_COLUMNS order."""
+        def rollup_sum(column):
+            return db.func.coalesce(
+                db.select(db.func.sum(column)).where(
+                    SpendingRollup.user_id == BudgetPeriod.user_id,
+                    SpendingRollup.budget_period_id == BudgetPeriod.id
+                ).scalar_subquery(),
+                0
+            )
+
+        total_income = db.func.coalesce(Budget.total_income, 0)
+        brought_forward = db.func.coalesce(Budget.balance_brought_forward, 0)
+        total_spent = rollup_sum(SpendingRollup.spent_total)
+        return db.select(
+            BudgetPeriod.user_id,
+            BudgetPeriod.id.label('budget_period_id'),
+            total_income.label('total_income'),
+            brought_forward.label('balance_brought_forward'),
+            db.func.coalesce(Budget.total_allocated, 0).label('total_allocated'),
+            total_spent.label('total_spent'),
+            rollup_sum(SpendingRollup.income_total).label('transaction_income'),
+            (total_income + brought_forward - total_spent).label('carry_forward')
+        ).select_from(BudgetPeriod).outerjoin(
+            Budget, Budget.period_id == BudgetPeriod.id
+        ).where(BudgetPeriod.id.in_(period_ids))
+
+    @staticmethod
+    def _lines_select(period_ids):
+        """Select computing per (period, subcategory) figures, in LINE_COLUMNS order."""
+        combined = SpendingAggregator.budget_vs_actual(period_ids)
+        allocated = db.func.coalesce(db.func.sum(combined.c.allocated), 0)
+        spent = db.func.coalesce(db.func.sum(combined.c.spent), 0)
+        return db.select(
+            combined.c.period_id.label('budget_period_id'),
+            combined.c.subcategory_id,
+            allocated.label('allocated'),
+            spent.label('spent'),
+            db.func.coalesce(db.func.sum(combined.c.income), 0).label('income'),
+            (allocated - spent).label('remaining')
+        ).group_by(combined.c.period_id, combined.c.subcategory_id)
+
+    @staticmethod
+    def close_periods(period_ids):
+        """
+        Write (or rewrite) the snapshots of the given periods.
+
+        Args:
+            period_ids: Budget period IDs
+        """
+        period_ids = list(period_ids)
+        if not period_ids:
+            return
+
+        PeriodSnapshotService.discard(period_ids)
+        db.session.execute(PeriodSnapshot.__table__.insert().from_select(
+            ['user_id', 'budget_period_id', *PeriodSnapshotService.SUMMARY_COLUMNS, 'closed_at'],
+            db.select(
+                *PeriodSnapshotService._summary_select(period_ids).subquery('summary').c,
+                db.literal(datetime.utcnow(), db.DateTime)
+            )
+        ))
+        db.session.execute(PeriodSnapshotLine.__table__.insert().from_select(
+            ['budget_period_id', 'subcategory_id', *PeriodSnapshotService.LINE_COLUMNS],
+            PeriodSnapshotService._lines_select(period_ids)
+        ))
+
+    @staticmethod
+    def discard(period_ids):
+        """Delete the snapshots of the given periods (re-opened or deleted periods)."""
+        period_ids = list(period_ids)
+        if not period_ids:
+            return
+        PeriodSnapshotLine.query.filter(
+            PeriodSnapshotLine.budget_period_id.in_(period_ids)
+        ).delete(synchronize_session=False)
+        PeriodSnapshot.query.filter(
+            PeriodSnapshot.budget_period_id.in_(period_ids)
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def refresh(period_ids=None, user_id=None):
+        """
+        Rebuild the existing snapshots among the given periods (or of a user).
+
+        Periods without a snapshot are left alone, so this is safe to call for
+        every period a write touched.
+
+        Returns:
+            Number of snapshots rebuilt
+        """
+        query = db.session.query(PeriodSnapshot.budget_period_id)
+        if period_ids is not None:
+            period_ids = list(period_ids)
+            if not period_ids:
+                return 0
+            query = query.filter(PeriodSnapshot.budget_period_id.in_(period_ids))
+        if user_id is not None:
+            query = query.filter(PeriodSnapshot.user_id == user_id)
+        closed = [row[0] for row in query]
+        PeriodSnapshotService.close_periods(closed)
+        return len(closed)
+
+    @staticmethod
+    def close_ended(today=None, user_id=None):
+        """
+        Snapshot every inactive or ended period that has no snapshot yet.
+
+        Commits after each chunk of CHUNK_SIZE periods; used to backfill.
+
+        Returns:
+            Number of periods closed
+        """
+        today = today or date.today()
+        closed = 0
+        while True:
+            query = db.session.query(BudgetPeriod.id).outerjoin(
+                PeriodSnapshot, PeriodSnapshot.budget_period_id == BudgetPeriod.id
+            ).filter(
+                PeriodSnapshot.id.is_(None),
+                db.or_(BudgetPeriod.is_active.isnot(True), BudgetPeriod.end_date < today)
+            )
+            if user_id is not None:
+                query = query.filter(BudgetPeriod.user_id == user_id)
+            period_ids = [row[0] for row in query.order_by(BudgetPeriod.id).limit(PeriodSnapshotService.CHUNK_SIZE)]
+            if not period_ids:
+                break
+            PeriodSnapshotService.close_periods(period_ids)
+            db.session.commit()
+            closed += len(period_ids)
+        return closed
+
+    @staticmethod
+    def get_period_summary(user_id, period_id):
+        """
+        Get a budget period's budget-level and per-subcategory figures.
+
+        Closed periods are read from their snapshot; the active period (or one
+        not closed yet) is computed live with the same queries.
+
+        Args:
+            user_id: User ID
+            period_id: Budget period ID
+
+        Returns:
+            Summary dict, or None if the user has no such period
+        """
+        period = BudgetPeriod.query.filter_by(id=period_id, user_id=user_id).first()
+        if not period:
+            return None
+
+        snapshot = PeriodSnapshot.query.filter_by(budget_period_id=period.id).first()
+        if snapshot:
+            summary = {column: getattr(snapshot, column) for column in PeriodSnapshotService.SUMMARY_COLUMNS}
+            lines = db.select(
+                PeriodSnapshotLine.subcategory_id,
+                *[getattr(PeriodSnapshotLine, column) for column in PeriodSnapshotService.LINE_COLUMNS]
+            ).where(PeriodSnapshotLine.budget_period_id == period.id).subquery('lines')
+        else:
+            row = db.session.execute(PeriodSnapshotService._summary_select([period.id])).one()
+            summary = {column: getattr(row, column) for column in PeriodSnapshotService.SUMMARY_COLUMNS}
+            lines = PeriodSnapshotService._lines_select([period.id]).subquery('lines')
+
+        rows = db.session.query(
+            lines,
+            Subcategory.name.label('subcategory_name'),
+            Category.id.label('category_id'),
+            Category.name.label('category_name')
+        ).join(
+            Subcategory, lines.c.subcategory_id == Subcategory.id
+        ).join(
+            Category, Subcategory.category_id == Category.id
+        ).filter(
+            Category.user_id == user_id
+        ).order_by(Category.name, Subcategory.name, Subcategory.id).all()
+
+        return {
+            'period': {
+                'id': period.id,
+                'name': period.name,
+                'period_type': period.period_type,
+                'start_date': period.start_date.isoformat(),
+                'end_date': period.end_date.isoformat(),
+                'is_active': period.is_active
+            },
+            'closed': snapshot is not None,
+            'closed_at': snapshot.closed_at.isoformat() if snapshot else None,
+            **summary,
+            'subcategories': [{
+                'id': row.subcategory_id,
+                'name': row.subcategory_name,
+                'category_id': row.category_id,
+                'category_name': row.category_name,
+                **{column: getattr(row, column) for column in PeriodSnapshotService.LINE_COLUMNS}
+            } for row in rows]
+        }
@@ -0,0 +1,223 @@
+"""
+Spending aggregator: the single definition of "spent" and "income".
+"""
+
+from datetime import datetime, time, timedelta
+from ..extensions import db
+from ..models import Transaction, ArchivedTransaction, Budget, BudgetAllocation, BudgetPeriod, SpendingRollup
+
+
+class SpendingAggregator:
+    """
+    Aggregates transaction amounts per subcategory.
+
+    Every spending figure in the application goes through this class:
+    - spent is the sum of -amount over transactions with amount < 0 (a positive value)
+    - income is the sum of amount over transactions with amount > 0
+    - a transaction belongs to a budget period when its calendar day falls
+      within the period's start_date..end_date range, inclusive
+    - archived transactions count exactly like live ones (see ledger())
+
+    Totals for budget periods are read from the spending_rollup table, which is
+    built from period_select() and kept current by SpendingRollupService.
+    """
+
+    TOTAL_COLUMNS = ('spent_total', 'income_total', 'spent_count', 'income_count')
+
+    @staticmethod
+    def split_amount(amount):
+        """Split one transaction amount into (spent, income, spent_count, income_count)."""
+        if amount < 0:
+            return -amount, 0, 1, 0
+        if amount > 0:
+            return 0, amount, 0, 1
+        return 0, 0, 0, 0
+
+    @staticmethod
+    def ledger():
+        """
+        Every transaction, live and archived, as one UNION ALL subquery.
+
+        Columns: id, user_id, subcategory_id, amount, transaction_date. Filters on
+        the subquery are pushed down into both branches, so each side still uses
+        its own (user_id, transaction_date) index.
+        """
+        def columns(model):
+            return db.select(
+                model.id, model.user_id, model.subcategory_id, model.amount, model.transaction_date
+            )
+        return db.union_all(columns(Transaction), columns(ArchivedTransaction)).subquery('ledger')
+
+    @staticmethod
+    def aggregate_columns(source=None):
+        """
+        SUM/COUNT columns computing the totals in SQL, in TOTAL_COLUMNS order.
+
+        Args:
+            source: Optional selectable with an amount column (e.g. ledger());
+                defaults to the transaction table
+        """
+        amount = source.c.amount if source is not None else Transaction.amount
+        return (
+            db.func.sum(db.case((amount < 0, -amount), else_=0)).label('spent_total'),
+            db.func.sum(db.case((amount > 0, amount), else_=0)).label('income_total'),
+            db.func.sum(db.case((amount < 0, 1), else_=0)).label('spent_count'),
+            db.func.sum(db.case((amount > 0, 1), else_=0)).label('income_count'),
+        )
+
+    @staticmethod
+    def in_period(source=None):
+        """SQL condition matching transactions (of source, default the transaction table) to their budget periods."""
+        columns = source.c if source is not None else Transaction
+        return db.and_(
+            columns.user_id == BudgetPeriod.user_id,
+            columns.transaction_date >= BudgetPeriod.start_date,
+            db.func.date(columns.transaction_date) <= BudgetPeriod.end_date
+        )
+
+    @staticmethod
+    def period_select(period_ids):
+        """
+        Build the GROUP BY select producing rollup rows for the given periods.
+
+        Columns: user_id, budget_period_id, subcategory_id, then TOTAL_COLUMNS.
+        Reads the whole ledger so archived transactions stay in their periods.
+        """
+        ledger = SpendingAggregator.ledger()
+        return db.select(
+            ledger.c.user_id,
+            BudgetPeriod.id.label('budget_period_id'),
+            ledger.c.subcategory_id,
+            *SpendingAggregator.aggregate_columns(ledger)
+        ).select_from(BudgetPeriod).join(
+            ledger, SpendingAggregator.in_period(ledger)
+        ).where(
+            BudgetPeriod.id.in_(period_ids),
+            ledger.c.amount != 0
+        ).group_by(
+            ledger.c.user_id, BudgetPeriod.id, ledger.c.subcategory_id
+        )
+
+    @staticmethod
+    def budget_vs_actual(period_ids, user_id=None):
+        """
+        Allocations and rollup totals of budget periods as one UNION ALL subquery.
+
+        Columns: period_id, subcategory_id, allocated, spent, income. Each
+        allocation and each rollup row is one row with zeros for the other side,
+        so callers sum per (period_id, subcategory_id) with a single GROUP BY.
+
+        Args:
+            period_ids: Budget period IDs
+            user_id: Optional user ID both sides are also filtered on
+        """
+        zero = db.literal(0.0, db.Float)
+        allocated = db.select(
+            Budget.period_id.label('period_id'),
+            BudgetAllocation.subcategory_id.label('subcategory_id'),
+            BudgetAllocation.allocated_amount.label('allocated'),
+            zero.label('spent'),
+            zero.label('income')
+        ).join(
+            Budget, BudgetAllocation.budget_id == Budget.id
+        ).where(Budget.period_id.in_(period_ids))
+        actual = db.select(
+            SpendingRollup.budget_period_id,
+            SpendingRollup.subcategory_id,
+            zero,
+            SpendingRollup.spent_total,
+            SpendingRollup.income_total
+        ).where(SpendingRollup.budget_period_id.in_(period_ids))
+        if user_id is not None:
+            allocated = allocated.where(Budget.user_id == user_id)
+            actual = actual.where(SpendingRollup.user_id == user_id)
+        return db.union_all(allocated, actual).subquery('budget_vs_actual')
+
+    @staticmethod
+    def range_totals(user_id, start_date=None, end_date=None, sign=None):
+        """
+        Aggregate a user's transactions per subcategory over an arbitrary date range.
+
+        One GROUP BY subcategory_id query over the ledger (live and archived
+        transactions), for ranges that don't correspond to a budget period (use
+        period_totals for those).
+
+        Args:
+            user_id: User ID
+            start_date: Optional first day (inclusive)
+            end_date: Optional last day (inclusive)
+            sign: Optional 'expense' or 'income' to only aggregate one side
+
+        Returns:
+            Dict of subcategory_id -> totals dict
+        """
+        ledger = SpendingAggregator.ledger()
+        query = db.session.query(
+            ledger.c.subcategory_id,
+            *SpendingAggregator.aggregate_columns(ledger)
+        ).filter(ledger.c.user_id == user_id)
+
+        if start_date is not None:
+            query = query.filter(ledger.c.transaction_date >= datetime.combine(start_date, time.min))
+        if end_date is not None:
+            query = query.filter(ledger.c.transaction_date < datetime.combine(end_date + timedelta(days=1), time.min))
+        if sign == 'expense':
+            query = query.filter(ledger.c.amount < 0)
+        elif sign == 'income':
+            query = query.filter(ledger.c.amount > 0)
+
+        return {
+            row.subcategory_id: SpendingAggregator._totals(row[1:])
+            for row in query.group_by(ledger.c.subcategory_id)
+        }
+
+    @staticmethod
+    def period_totals(user_id, period_id):
+        """
+        Get a budget period's totals per subcategory from the spending rollup.
+
+        Returns:
+            Dict of subcategory_id -> totals dict
+        """
+        rows = db.session.query(
+            SpendingRollup.subcategory_id,
+            *[getattr(SpendingRollup, column) for column in SpendingAggregator.TOTAL_COLUMNS]
+        ).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.budget_period_id == period_id
+        ).all()
+
+        return {row.subcategory_id: SpendingAggregator._totals(row[1:]) for row in rows}
+
+    @staticmethod
+    def period_summary(user_id, period_id):
+        """Get a budget period's totals summed over all subcategories."""
+        row = db.session.query(*[
+            db.func.coalesce(db.func.sum(getattr(SpendingRollup, column)), 0)
+            for column in SpendingAggregator.TOTAL_COLUMNS
+        ]).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.budget_period_id == period_id
+        ).one()
+
+        return SpendingAggregator._totals(row)
+
+    @staticmethod
+    def summarize(totals_by_subcategory):
+        """Sum a subcategory -> totals mapping into a single totals dict."""
+        return SpendingAggregator._totals([
+            sum(totals[column] for totals in totals_by_subcategory.values())
+            for column in SpendingAggregator.TOTAL_COLUMNS
+        ])
+
+    @staticmethod
+    def _totals(values):
+        """Build a totals dict (TOTAL_COLUMNS plus net) from a row of aggregates."""
+        spent_total, income_total, spent_count, income_count = (value or 0 for value in values)
+        return {
+            'spent_total': spent_total,
+            'income_total': income_total,
+            'spent_count': spent_count,
+            'income_count': income_count,
+            'net_total': income_total - spent_total,
+        }
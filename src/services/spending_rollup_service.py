@@ -0,0 +1,178 @@
+"""
+Spending rollup service for maintaining per-period transaction aggregates.
+"""
+
+from datetime import datetime
+from ..extensions import db
+from ..models import SpendingRollup, BudgetPeriod
+from ..utils.budget import add_budget_spent, refresh_budget_totals
+from .spending_aggregator import SpendingAggregator
+from .snapshot_service import PeriodSnapshotService
+
+
+class SpendingRollupService:
+    """
+    Service for maintaining the spending_rollup table.
+
+    Period membership and the spent/income split follow SpendingAggregator, which
+    is also what reads the table. Write methods never commit: they run inside the
+    caller's database transaction so the rollup changes atomically with the
+    writes that caused them. The total_spent of the periods' budgets, and the
+    snapshots of closed periods, are kept in step the same way.
+    """
+
+    TOTAL_COLUMNS = SpendingAggregator.TOTAL_COLUMNS
+    # Periods rebuilt per statement (and per commit) by rebuild_all
+    REBUILD_CHUNK_SIZE = 200
+
+    @staticmethod
+    def apply_changes(user_id, changes):
+        """
+        Apply transaction deltas to the rollup.
+
+        Changes are first summed per (subcategory, day) so a large batch costs one
+        period lookup and one upsert per affected rollup row.
+
+        Args:
+            user_id: User ID
+            changes: Iterable of (subcategory_id, transaction_date, amount, weight)
+                tuples; weight is 1 for a row that was added and -1 for one that was removed
+        """
+        deltas = {}
+        for subcategory_id, transaction_date, amount, weight in changes:
+            if not amount:
+                continue
+            day = transaction_date.date() if isinstance(transaction_date, datetime) else transaction_date
+            delta = deltas.setdefault((subcategory_id, day), [0.0, 0.0, 0, 0])
+            for index, value in enumerate(SpendingAggregator.split_amount(amount)):
+                delta[index] += value * weight
+        if not deltas:
+            return
+
+        days = [day for _, day in deltas]
+        periods = db.session.query(
+            BudgetPeriod.id, BudgetPeriod.start_date, BudgetPeriod.end_date
+        ).filter(
+            BudgetPeriod.user_id == user_id,
+            BudgetPeriod.start_date <= max(days),
+            BudgetPeriod.end_date >= min(days)
+        ).all()
+
+        totals = {}
+        for (subcategory_id, day), delta in deltas.items():
+            for period_id, start_date, end_date in periods:
+                if start_date <= day <= end_date:
+                    total = totals.setdefault((period_id, subcategory_id), [0.0, 0.0, 0, 0])
+                    for index, value in enumerate(delta):
+                        total[index] += value
+
+        rows = [
+            dict(
+                user_id=user_id,
+                budget_period_id=period_id,
+                subcategory_id=subcategory_id,
+                **dict(zip(SpendingRollupService.TOTAL_COLUMNS, total))
+            )
+            for (period_id, subcategory_id), total in totals.items()
+            if any(total)
+        ]
+        if not rows:
+            return
+
+        SpendingRollupService._upsert(rows)
+        spent = {}
+        for row in rows:
+            spent[row['budget_period_id']] = spent.get(row['budget_period_id'], 0) + row['spent_total']
+        add_budget_spent(spent)
+
+        # Drop rows whose last transaction was removed
+        SpendingRollup.query.filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.budget_period_id.in_({row['budget_period_id'] for row in rows}),
+            SpendingRollup.spent_count == 0,
+            SpendingRollup.income_count == 0
+        ).delete(synchronize_session=False)
+        PeriodSnapshotService.refresh(spent)
+
+    @staticmethod
+    def _upsert(rows):
+        """Add delta rows onto existing rollup rows, inserting the ones that don't exist yet."""
+        table = SpendingRollup.__table__
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['user_id', 'budget_period_id', 'subcategory_id'],
+                set_={
+                    column: table.c[column] + statement.excluded[column]
+                    for column in SpendingRollupService.TOTAL_COLUMNS
+                }
+            )
+            db.session.execute(statement, rows)
+            return
+
+        for row in rows:
+            result = db.session.execute(
+                table.update().where(
+                    table.c.user_id == row['user_id'],
+                    table.c.budget_period_id == row['budget_period_id'],
+                    table.c.subcategory_id == row['subcategory_id']
+                ).values({
+                    column: table.c[column] + row[column]
+                    for column in SpendingRollupService.TOTAL_COLUMNS
+                })
+            )
+            if result.rowcount == 0:
+                db.session.execute(table.insert(), row)
+
+    @staticmethod
+    def rebuild_periods(period_ids):
+        """
+        Recompute the rollup rows of the given budget periods from their transactions.
+
+        Used when a period is created or its dates change, and for backfilling.
+        The aggregation runs entirely in the database as one INSERT ... SELECT.
+        """
+        period_ids = list(period_ids)
+        if not period_ids:
+            return
+
+        SpendingRollup.query.filter(
+            SpendingRollup.budget_period_id.in_(period_ids)
+        ).delete(synchronize_session=False)
+
+        db.session.execute(SpendingRollup.__table__.insert().from_select(
+            ['user_id', 'budget_period_id', 'subcategory_id', *SpendingRollupService.TOTAL_COLUMNS],
+            SpendingAggregator.period_select(period_ids)
+        ))
+        refresh_budget_totals(period_ids=period_ids, columns=('total_spent',))
+        PeriodSnapshotService.refresh(period_ids)
+
+    @staticmethod
+    def rebuild_all(user_id=None):
+        """
+        Rebuild the rollup for every budget period (optionally of one user).
+
+        Commits after each chunk of REBUILD_CHUNK_SIZE periods so a full backfill
+        doesn't hold one long transaction.
+
+        Returns:
+            Number of periods rebuilt
+        """
+        query = db.session.query(BudgetPeriod.id).order_by(BudgetPeriod.id)
+        if user_id is not None:
+            query = query.filter(BudgetPeriod.user_id == user_id)
+        period_ids = [row[0] for row in query]
+
+        for start in range(0, len(period_ids), SpendingRollupService.REBUILD_CHUNK_SIZE):
+            SpendingRollupService.rebuild_periods(
+                period_ids[start:start + SpendingRollupService.REBUILD_CHUNK_SIZE]
+            )
+            db.session.commit()
+
+        return len(period_ids)
@@ -2,54 +2,314 @@
 Transaction service for managing financial transactions.
 """
 
-from datetime import datetime
+import heapq
+import re
+from datetime import datetime, time, timedelta
 from ..extensions import db
-from ..models import Transaction, BudgetPeriod
+from ..models import Transaction, ArchivedTransaction, Category, Subcategory
+from ..models.transaction import TRANSACTION_SEARCH_VECTOR
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.data_version import bump_data_version
+from ..utils.active_budget import ActiveBudgetContext
+from ..utils.streaming import STREAM_BATCH_SIZE
+from ..utils.fingerprint import transaction_fingerprint, DUPLICATE_WINDOW_DAYS
+from .spending_rollup_service import SpendingRollupService
 
 
 class TransactionService:
     """Service for handling transaction operations."""
     
+    # Tables holding a user's transactions: live rows, then archived ones
+    LEDGER_MODELS = (Transaction, ArchivedTransaction)
+    
+    @staticmethod
+    def _listing_query(user_id, model=Transaction):
+        """
+        Build the read query used by the transaction listings.
+        
+        Subcategory and category are joined in and only the serialized columns are
+        projected, so a listing is a single SELECT no matter how many rows it returns
+        (no per-row lazy loads of transaction.subcategory / subcategory.category).
+        Pass model=ArchivedTransaction to read the archive table instead.
+        """
+        return db.session.query(
+            model.id,
+            model.amount,
+            model.description,
+            model.comment,
+            model.transaction_date,
+            Subcategory.id.label('subcategory_id'),
+            Subcategory.name.label('subcategory_name'),
+            Category.id.label('category_id'),
+            Category.name.label('category_name'),
+            db.literal(model is ArchivedTransaction).label('archived')
+        ).join(
+            Subcategory, model.subcategory_id == Subcategory.id
+        ).join(
+            Category, Subcategory.category_id == Category.id
+        ).filter(model.user_id == user_id)
+    
     @staticmethod
     def get_user_transactions(user_id, active_period_only=True):
         """Get transactions for a user."""
-        query = Transaction.query.filter_by(user_id=user_id)
+        return list(TransactionService.iter_user_transactions(user_id, active_period_only))
+    
+    @staticmethod
+    def _in_period(model, period):
+        """
+        Conditions matching a model's transactions dated inside a budget period.
+        
+        The end date counts as a whole day, as in SpendingAggregator.in_period, so
+        listings agree with the period's spending totals.
+        """
+        return (
+            model.transaction_date >= datetime.combine(period.start_date, time.min),
+            model.transaction_date < datetime.combine(period.end_date + timedelta(days=1), time.min)
+        )
+    
+    @staticmethod
+    def iter_user_transactions(user_id, active_period_only=True):
+        """
+        Get a user's serialized transactions as a generator, newest first.
         
+        Rows are fetched from server-side cursors STREAM_BATCH_SIZE at a time, so
+        the whole history is never held in memory. Live and archived rows are read
+        as two ordered streams and merged.
+        """
+        active_period = None
         if active_period_only:
             # Get active budget period
-            active_period = BudgetPeriod.query.filter_by(
-                user_id=user_id, 
-                is_active=True
-            ).first()
-            
+            active_period = ActiveBudgetContext.resolve(user_id)
+        
+        streams = []
+        for model in TransactionService.LEDGER_MODELS:
+            query = TransactionService._listing_query(user_id, model)
             if active_period:
                 # Filter transactions within the active period
-                query = query.filter(
-                    Transaction.transaction_date >= active_period.start_date,
-                    Transaction.transaction_date <= active_period.end_date
-                )
+                query = query.filter(*TransactionService._in_period(model, active_period))
+            streams.append(query.order_by(
+                model.transaction_date.desc(), model.id.desc()
+            ).yield_per(STREAM_BATCH_SIZE))
         
-        transactions = query.order_by(Transaction.transaction_date.desc()).all()
-        
-        result = []
-        for transaction in transactions:
-            result.append({
-                'id': transaction.id,
-                'amount': transaction.amount,
-                'description': transaction.description,
-                'comment': transaction.comment,
-                'transaction_date': transaction.transaction_date.isoformat(),
-                'subcategory': {
-                    'id': transaction.subcategory.id,
-                    'name': transaction.subcategory.name,
-                    'category': {
-                        'id': transaction.subcategory.category.id,
-                        'name': transaction.subcategory.category.name
-                    }
+        rows = heapq.merge(*streams, key=lambda row: (row.transaction_date, row.id), reverse=True)
+        return (TransactionService._serialize(row) for row in rows)
+    
+    @staticmethod
+    def list_transactions(user_id, limit=50, cursor=None, date_from=None, date_to=None,
+                          subcategory_id=None, category_id=None, min_amount=None,
+                          max_amount=None, sign=None, period='active'):
+        """
+        Get one page of a user's transactions using keyset pagination.
+        
+        Rows are ordered by (transaction_date DESC, id DESC) and the page boundary is
+        expressed as a WHERE clause on that key, so every page is an index range scan
+        on ix_transaction_user_date_id regardless of how deep into the history it is.
+        The archive table is read the same way and the two pages are merged.
+        
+        Args:
+            user_id: User ID
+            limit: Maximum number of transactions to return
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            date_from: Only include transactions on or after this date
+            date_to: Only include transactions on or before this date
+            subcategory_id: Only include transactions in this subcategory
+            category_id: Only include transactions in this category
+            min_amount: Only include transactions with amount >= min_amount
+            max_amount: Only include transactions with amount <= max_amount
+            sign: 'expense' for negative amounts, 'income' for positive amounts
+            period: 'active' to default to the active budget period when no dates are
+                given, 'all' to search the full history
+        
+        Returns:
+            Dict with the page of transactions, next_cursor and has_more
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        active_period = None
+        if date_from is None and date_to is None and period == 'active':
+            active_period = ActiveBudgetContext.resolve(user_id)
+        
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+        
+        rows = []
+        for model in TransactionService.LEDGER_MODELS:
+            query = TransactionService._listing_query(user_id, model)
+            
+            if active_period:
+                query = query.filter(*TransactionService._in_period(model, active_period))
+            if date_from is not None:
+                query = query.filter(model.transaction_date >= datetime.combine(date_from, time.min))
+            if date_to is not None:
+                query = query.filter(model.transaction_date < datetime.combine(date_to + timedelta(days=1), time.min))
+            if subcategory_id is not None:
+                query = query.filter(model.subcategory_id == subcategory_id)
+            if category_id is not None:
+                query = query.filter(Subcategory.category_id == category_id)
+            if min_amount is not None:
+                query = query.filter(model.amount >= min_amount)
+            if max_amount is not None:
+                query = query.filter(model.amount <= max_amount)
+            if sign == 'expense':
+                query = query.filter(model.amount < 0)
+            elif sign == 'income':
+                query = query.filter(model.amount > 0)
+            
+            if cursor:
+                query = query.filter(db.or_(
+                    model.transaction_date < cursor_date,
+                    db.and_(model.transaction_date == cursor_date, model.id < cursor_id)
+                ))
+            
+            # Fetch one extra row to know whether another page exists
+            rows.extend(query.order_by(
+                model.transaction_date.desc(),
+                model.id.desc()
+            ).limit(limit + 1).all())
+        
+        rows.sort(key=lambda row: (row.transaction_date, row.id), reverse=True)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last.transaction_date, last.id)
+        
+        return {
+            'transactions': [TransactionService._serialize(row) for row in rows],
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+    
+    @staticmethod
+    def search_transactions(user_id, query, page=1, per_page=25):
+        """
+        Full-text search over a user's transaction descriptions and comments.
+        
+        Uses the FTS5 index on SQLite and the tsvector GIN index on PostgreSQL
+        (see models/transaction.py); every search term is matched as a prefix and
+        all terms must match. Other databases fall back to a LIKE scan.
+        
+        Args:
+            user_id: User ID
+            query: Free-text search string
+            page: 1-based page number
+            per_page: Results per page
+        
+        Returns:
+            Dict with ranked results, page, per_page and has_more
+        """
+        terms = re.findall(r'\w+', query.lower(), flags=re.UNICODE)[:10]
+        if not terms:
+            return {'results': [], 'page': page, 'per_page': per_page, 'has_more': False}
+        
+        listing = TransactionService._listing_query(user_id)
+        dialect = db.session.get_bind().dialect.name
+        
+        if dialect == 'sqlite' and TransactionService._sqlite_search_index_exists():
+            match = f'owner : u{int(user_id)} AND ' + ' AND '.join(f'"{term}"*' for term in terms)
+            hits = db.text(
+                "SELECT rowid AS id, bm25(transaction_fts, 0.0, 1.0, 0.5) AS rank "
+                "FROM transaction_fts WHERE transaction_fts MATCH :match"
+            ).bindparams(match=match).columns(id=db.Integer, rank=db.Float).subquery('hits')
+            # bm25 is lower-is-better; negate so higher rank means a better match everywhere
+            rank = (-hits.c.rank).label('rank')
+            listing = listing.join(hits, hits.c.id == Transaction.id).add_columns(rank)
+        elif dialect == 'postgresql':
+            vector = db.literal_column(TRANSACTION_SEARCH_VECTOR)
+            ts_query = db.func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+            rank = db.func.ts_rank(vector, ts_query).label('rank')
+            listing = listing.filter(vector.op('@@')(ts_query)).add_columns(rank)
+        else:
+            for term in terms:
+                pattern = f'%{term}%'
+                listing = listing.filter(db.or_(
+                    Transaction.description.ilike(pattern),
+                    Transaction.comment.ilike(pattern)
+                ))
+            rank = db.literal(0.0).label('rank')
+            listing = listing.add_columns(rank)
+        
+        rows = listing.order_by(
+            rank.desc(),
+            Transaction.transaction_date.desc(),
+            Transaction.id.desc()
+        ).offset((page - 1) * per_page).limit(per_page + 1).all()
+        
+        has_more = len(rows) > per_page
+        results = []
+        for row in rows[:per_page]:
+            result = TransactionService._serialize(row)
+            result['rank'] = row.rank
+            results.append(result)
+        
+        return {'results': results, 'page': page, 'per_page': per_page, 'has_more': has_more}
+    
+    @staticmethod
+    def _sqlite_search_index_exists():
+        """Check whether the FTS5 table exists (it is missing on databases built before the search migration)."""
+        return db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transaction_fts'"
+        )).first() is not None
+    
+    @staticmethod
+    def _serialize(row):
+        """Serialize a row produced by _listing_query."""
+        return {
+            'id': row.id,
+            'amount': row.amount,
+            'description': row.description,
+            'comment': row.comment,
+            'transaction_date': row.transaction_date.isoformat(),
+            'archived': bool(row.archived),
+            'subcategory': {
+                'id': row.subcategory_id,
+                'name': row.subcategory_name,
+                'category': {
+                    'id': row.category_id,
+                    'name': row.category_name
                 }
-            })
+            }
+        }
+    
+    @staticmethod
+    def find_duplicates(user_id, amount, description, transaction_date, window_days=DUPLICATE_WINDOW_DAYS,
+                        exclude_id=None):
+        """
+        Find a user's transactions with the same amount and description near a date.
         
-        return result
+        A single range scan on ix_transaction_user_fingerprint_date (and its twin on
+        the archive table), independent of the size of the user's history.
+        
+        Args:
+            user_id: User ID
+            amount: Transaction amount
+            description: Transaction description (compared normalized)
+            transaction_date: Date or datetime of the transaction
+            window_days: Days either side of transaction_date to search
+            exclude_id: Optional transaction ID to leave out (the transaction itself)
+        
+        Returns:
+            List of matching transaction IDs, closest date first
+        """
+        day = transaction_date.date() if isinstance(transaction_date, datetime) else transaction_date
+        fingerprint = transaction_fingerprint(user_id, amount, description)
+        
+        rows = []
+        for model in TransactionService.LEDGER_MODELS:
+            query = db.session.query(model.id, model.transaction_date).filter(
+                model.user_id == user_id,
+                model.fingerprint == fingerprint,
+                model.transaction_date >= datetime.combine(day - timedelta(days=window_days), time.min),
+                model.transaction_date < datetime.combine(day + timedelta(days=window_days + 1), time.min)
+            )
+            if exclude_id is not None:
+                query = query.filter(model.id != exclude_id)
+            rows.extend(query.all())
+        
+        rows.sort(key=lambda row: (abs((row.transaction_date.date() - day).days), row.id))
+        return [row.id for row in rows]
     
     @staticmethod
     def create_transaction(user_id, amount, subcategory_id, description=None, comment=None, transaction_date=None):
@@ -63,10 +323,13 @@ class TransactionService:
             comment=comment,
             subcategory_id=subcategory_id,
             user_id=user_id,
-            transaction_date=transaction_date
+            transaction_date=transaction_date,
+            fingerprint=transaction_fingerprint(user_id, amount, description)
         )
         
         db.session.add(transaction)
+        SpendingRollupService.apply_changes(user_id, [(subcategory_id, transaction_date, amount, 1)])
+        bump_data_version(user_id)
         db.session.commit()
         return transaction
     
@@ -81,10 +344,18 @@ class TransactionService:
         if not transaction:
             return None
         
+        previous = (transaction.subcategory_id, transaction.transaction_date, transaction.amount)
+        
         for key, value in kwargs.items():
             if hasattr(transaction, key):
                 setattr(transaction, key, value)
+        transaction.fingerprint = transaction_fingerprint(user_id, transaction.amount, transaction.description)
         
+        current = (transaction.subcategory_id, transaction.transaction_date, transaction.amount)
+        if current != previous:
+            SpendingRollupService.apply_changes(user_id, [previous + (-1,), current + (1,)])
+        
+        bump_data_version(user_id)
         db.session.commit()
         return transaction
     
@@ -99,6 +370,194 @@ class TransactionService:
         if not transaction:
             return False
         
+        SpendingRollupService.apply_changes(user_id, [
+            (transaction.subcategory_id, transaction.transaction_date, transaction.amount, -1)
+        ])
         db.session.delete(transaction)
+        bump_data_version(user_id)
         db.session.commit()
         return True
+    
+    @staticmethod
+    def apply_batch(user_id, operations):
+        """
+        Validate and apply a batch of create/update/delete operations atomically.
+        
+        Every operation is validated before anything is written. The batch is then
+        applied in a single database transaction: creates are flushed together,
+        updates are grouped by identical new values into UPDATE ... WHERE id IN (...)
+        statements and deletes become one DELETE ... WHERE id IN (...). A bulk
+        recategorisation of N rows is therefore one UPDATE and one commit.
+        
+        Args:
+            user_id: User ID
+            operations: List of dicts validated by TransactionBatchOperationSchema
+        
+        Returns:
+            Tuple of (applied, results) where results has one entry per operation
+        """
+        from marshmallow import ValidationError
+        from ..schemas import TransactionSchema, TransactionUpdateSchema
+        
+        create_schema = TransactionSchema()
+        update_schema = TransactionUpdateSchema()
+        results = [{'index': index, 'op': operation['op']} for index, operation in enumerate(operations)]
+        errors = {}
+        payloads = {}
+        
+        # Validate payloads
+        for index, operation in enumerate(operations):
+            try:
+                if operation['op'] == 'create':
+                    payloads[index] = create_schema.load(operation['data'])
+                elif operation['op'] == 'update':
+                    payload = update_schema.load(operation['data'], partial=True)
+                    # amount and subcategory are NOT NULL - treat explicit nulls as "unchanged"
+                    payload = {
+                        key: value for key, value in payload.items()
+                        if value is not None or key in ('description', 'comment')
+                    }
+                    if not payload:
+                        errors[index] = {'data': ['No valid fields to update']}
+                        continue
+                    payloads[index] = payload
+            except ValidationError as err:
+                errors[index] = err.messages
+        
+        # Validate ownership of referenced transactions and subcategories in one query each.
+        # The current values of the targets are kept for the spending rollup deltas.
+        target_ids = [operation['id'] for operation in operations if operation['op'] in ('update', 'delete')]
+        existing = {}
+        if target_ids:
+            existing = {row.id: row for row in db.session.query(
+                Transaction.id, Transaction.subcategory_id, Transaction.transaction_date, Transaction.amount,
+                Transaction.description
+            ).filter(
+                Transaction.user_id == user_id,
+                Transaction.id.in_(target_ids)
+            )}
+        owned_ids = set(existing)
+        
+        subcategory_ids = {payload['subcategory_id'] for payload in payloads.values() if 'subcategory_id' in payload}
+        owned_subcategory_ids = set()
+        if subcategory_ids:
+            owned_subcategory_ids = {row[0] for row in db.session.query(Subcategory.id).join(
+                Category, Subcategory.category_id == Category.id
+            ).filter(
+                Category.user_id == user_id,
+                Subcategory.id.in_(subcategory_ids)
+            )}
+        
+        seen_ids = set()
+        for index, operation in enumerate(operations):
+            if index in errors:
+                continue
+            if operation['op'] in ('update', 'delete'):
+                if operation['id'] not in owned_ids:
+                    errors[index] = {'id': ['Transaction not found']}
+                    continue
+                if operation['id'] in seen_ids:
+                    errors[index] = {'id': ['Transaction is referenced by more than one operation']}
+                    continue
+                seen_ids.add(operation['id'])
+            payload = payloads.get(index, {})
+            if 'subcategory_id' in payload and payload['subcategory_id'] not in owned_subcategory_ids:
+                errors[index] = {'subcategory_id': ['Subcategory not found']}
+        
+        if errors:
+            for index, result in enumerate(results):
+                if index in errors:
+                    result['status'] = 'invalid'
+                    result['errors'] = errors[index]
+                else:
+                    result['status'] = 'not_applied'
+            return False, results
+        
+        try:
+            rollup_changes = []
+            
+            # Creates - flushed together so the new IDs can be reported
+            created = {}
+            for index, operation in enumerate(operations):
+                if operation['op'] != 'create':
+                    continue
+                payload = payloads[index]
+                transaction_date = payload.get('transaction_date')
+                created[index] = Transaction(
+                    amount=payload['amount'],
+                    description=payload.get('description'),
+                    comment=payload.get('comment'),
+                    subcategory_id=payload['subcategory_id'],
+                    user_id=user_id,
+                    transaction_date=(
+                        datetime.combine(transaction_date, time.min) if transaction_date else datetime.utcnow()
+                    ),
+                    fingerprint=transaction_fingerprint(user_id, payload['amount'], payload.get('description'))
+                )
+                transaction = created[index]
+                rollup_changes.append((transaction.subcategory_id, transaction.transaction_date, transaction.amount, 1))
+            if created:
+                db.session.add_all(created.values())
+                db.session.flush()
+            
+            # Updates - one statement per distinct set of new values
+            update_groups = {}
+            for index, operation in enumerate(operations):
+                if operation['op'] != 'update':
+                    continue
+                values = dict(payloads[index])
+                if values.get('transaction_date') is not None:
+                    values['transaction_date'] = datetime.combine(values['transaction_date'], time.min)
+                old = existing[operation['id']]
+                if 'amount' in values or 'description' in values:
+                    values['fingerprint'] = transaction_fingerprint(
+                        user_id,
+                        values.get('amount', old.amount),
+                        values['description'] if 'description' in values else old.description
+                    )
+                key = tuple(sorted(values.items()))
+                update_groups.setdefault(key, []).append(operation['id'])
+                rollup_changes.append((old.subcategory_id, old.transaction_date, old.amount, -1))
+                rollup_changes.append((
+                    values.get('subcategory_id', old.subcategory_id),
+                    values.get('transaction_date') or old.transaction_date,
+                    values.get('amount', old.amount),
+                    1
+                ))
+            for key, ids in update_groups.items():
+                Transaction.query.filter(
+                    Transaction.user_id == user_id,
+                    Transaction.id.in_(ids)
+                ).update(dict(key), synchronize_session=False)
+            
+            # Deletes - one statement
+            delete_ids = [operation['id'] for operation in operations if operation['op'] == 'delete']
+            if delete_ids:
+                Transaction.query.filter(
+                    Transaction.user_id == user_id,
+                    Transaction.id.in_(delete_ids)
+                ).delete(synchronize_session=False)
+                for transaction_id in delete_ids:
+                    old = existing[transaction_id]
+                    rollup_changes.append((old.subcategory_id, old.transaction_date, old.amount, -1))
+            
+            SpendingRollupService.apply_changes(user_id, rollup_changes)
+            bump_data_version(user_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        for index, operation in enumerate(operations):
+            result = results[index]
+            if operation['op'] == 'create':
+                result['id'] = created[index].id
+                result['status'] = 'created'
+            elif operation['op'] == 'update':
+                result['id'] = operation['id']
+                result['status'] = 'updated'
+            else:
+                result['id'] = operation['id']
+                result['status'] = 'deleted'
+        
+        return True, results
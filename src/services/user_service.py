@@ -6,6 +6,8 @@ from datetime import datetime
 from ..extensions import db
 from ..models import User
 from ..utils.categories import create_default_categories
+from ..utils.data_version import bump_data_version
+from .snapshot_service import PeriodSnapshotService
 
 
 class UserService:
@@ -60,6 +62,20 @@ class UserService:
         """Get user by email."""
         return User.query.filter_by(email=email).first()
     
+    @staticmethod
+    def get_user_settings(user):
+        """Get a user's settings."""
+        return {
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'display_name': user.display_name,
+            'currency': user.currency,
+            'theme': user.theme,
+            'email_verified': user.email_verified
+        }
+    
     @staticmethod
     def update_user_settings(user, **kwargs):
         """Update user settings."""
@@ -71,6 +87,7 @@ class UserService:
                 elif value is not None:
                     setattr(user, key, value)
         
+        bump_data_version(user.id)
         db.session.commit()
         return user
     
@@ -94,7 +111,8 @@ class UserService:
                 Transaction, BudgetAllocation, IncomeSource, Budget, 
                 BudgetPeriod, RecurringIncomeSource,
                 RecurringBudgetAllocation, Account, PasswordResetToken,
-                EmailVerification
+                EmailVerification, SpendingRollup, CategorizationRule,
+                ArchivedTransaction
             )
             
             user_id = user.id
@@ -126,8 +144,11 @@ class UserService:
                 IncomeSource.query.filter(IncomeSource.budget_id.in_(budget_ids)).delete(synchronize_session=False)
                 db.session.commit()
             
-            # 5. Delete transactions
+            # 5. Delete transactions (live and archived) and their spending rollup
             Transaction.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            ArchivedTransaction.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            SpendingRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            PeriodSnapshotService.discard(period_ids)
             db.session.commit()
             
             # 6. Delete budgets
@@ -152,6 +173,10 @@ class UserService:
             Account.query.filter_by(user_id=user_id).delete(synchronize_session=False)
             db.session.commit()
             
+            # Categorization rules reference subcategories, so they go first
+            CategorizationRule.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            db.session.commit()
+            
             # 11. Delete categories and subcategories
             from ..models import Category, Subcategory, BudgetAllocation, RecurringBudgetAllocation, Transaction
             
@@ -188,7 +213,8 @@ class UserService:
             from ..models import (
                 Transaction, BudgetAllocation, IncomeSource, Budget, 
                 BudgetPeriod, RecurringIncomeSource,
-                RecurringBudgetAllocation, Account
+                RecurringBudgetAllocation, Account, SpendingRollup,
+                ArchivedTransaction
             )
             
             user_id = user.id
@@ -212,8 +238,11 @@ class UserService:
                 IncomeSource.query.filter(IncomeSource.budget_id.in_(budget_ids)).delete(synchronize_session=False)
                 db.session.commit()
             
-            # 3. Delete transactions
+            # 3. Delete transactions (live and archived) and their spending rollup
             Transaction.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            ArchivedTransaction.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            SpendingRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            PeriodSnapshotService.discard(period_ids)
             db.session.commit()
             
             # 4. Delete budgets
@@ -236,6 +265,7 @@ class UserService:
             
             # 8. Keep accounts but reset balances
             Account.query.filter_by(user_id=user_id).update({'current_balance': 0})
+            bump_data_version(user_id)
             db.session.commit()
             
             return True, None
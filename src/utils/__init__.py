@@ -5,11 +5,27 @@ Utility functions for the Wealth Wise application.
 from .currency import get_currency_symbol
 from .email import send_email, send_verification_email, send_password_reset_email
 from .categories import create_default_categories
-from .budget import populate_budget_from_recurring, cleanup_duplicate_allocations
+from .budget import (
+    populate_budget_from_recurring, populate_budgets_from_recurring, cleanup_duplicate_allocations,
+    BUDGET_TOTAL_COLUMNS, refresh_budget_totals, add_budget_spent, check_budget_totals
+)
+from .pagination import encode_cursor, decode_cursor
+from .cache import UserCache, user_cache
+from .data_version import bump_data_version, bump_data_versions, get_data_version, conditional_get
+from .active_budget import ActiveBudgetContext
+from .streaming import STREAM_BATCH_SIZE, iter_json_array, stream_json_response
+from .fingerprint import DUPLICATE_WINDOW_DAYS, normalize_description, transaction_fingerprint
 
 __all__ = [
     'get_currency_symbol',
     'send_email', 'send_verification_email', 'send_password_reset_email',
     'create_default_categories',
-    'populate_budget_from_recurring', 'cleanup_duplicate_allocations'
+    'populate_budget_from_recurring', 'populate_budgets_from_recurring', 'cleanup_duplicate_allocations',
+    'BUDGET_TOTAL_COLUMNS', 'refresh_budget_totals', 'add_budget_spent', 'check_budget_totals',
+    'encode_cursor', 'decode_cursor',
+    'UserCache', 'user_cache',
+    'bump_data_version', 'bump_data_versions', 'get_data_version', 'conditional_get',
+    'ActiveBudgetContext',
+    'STREAM_BATCH_SIZE', 'iter_json_array', 'stream_json_response',
+    'DUPLICATE_WINDOW_DAYS', 'normalize_description', 'transaction_fingerprint'
 ]
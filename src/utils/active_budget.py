@@ -0,0 +1,107 @@
+"""
+Resolver for a user's active budget period and its budget.
+
+Most endpoints start by looking up the active period and then its budget, often
+more than once per request (a service calling another service). ActiveBudgetContext
+resolves both in one joined query and memoizes the result twice:
+
+- on flask.g for the rest of the request (or CLI app context)
+- in user_cache across requests, keyed by the user's data version, so any change
+  to the user's data misses the cache even in another worker
+
+The context holds plain values, never ORM instances, so it can outlive the
+session it was loaded in. period() and budget() fetch the rows by primary key
+when a caller needs to modify them.
+"""
+
+from flask import g
+from ..extensions import db
+from .cache import user_cache
+from .data_version import get_data_version
+
+
+class ActiveBudgetContext:
+    """Snapshot of a user's active budget period and the ID of its budget."""
+
+    __slots__ = ('user_id', 'period_id', 'name', 'period_type', 'start_date', 'end_date', 'budget_id')
+
+    def __init__(self, user_id, period_id, name, period_type, start_date, end_date, budget_id):
+        self.user_id = user_id
+        self.period_id = period_id
+        self.name = name
+        self.period_type = period_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.budget_id = budget_id
+
+    def __repr__(self):
+        return f'<ActiveBudgetContext user={self.user_id} period={self.period_id} budget={self.budget_id}>'
+
+    def period(self):
+        """Get the active BudgetPeriod (from the session identity map when already loaded)."""
+        from ..models import BudgetPeriod
+        return db.session.get(BudgetPeriod, self.period_id)
+
+    def budget(self):
+        """Get the active period's Budget, or None if the period has no budget."""
+        from ..models import Budget
+        return db.session.get(Budget, self.budget_id) if self.budget_id is not None else None
+
+    @staticmethod
+    def _memo():
+        if '_active_budget' not in g:
+            g._active_budget = {}
+        return g._active_budget
+
+    @staticmethod
+    def resolve(user_id):
+        """
+        Get the active budget context of a user.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            ActiveBudgetContext, or None if the user has no active period
+        """
+        memo = ActiveBudgetContext._memo()
+        version = get_data_version(user_id)
+        cached = memo.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        cache_key = ('active-budget', version)
+        found = user_cache.get(user_id, cache_key)
+        if found is None:
+            from ..models import Budget, BudgetPeriod
+            row = db.session.query(
+                BudgetPeriod.id,
+                BudgetPeriod.name,
+                BudgetPeriod.period_type,
+                BudgetPeriod.start_date,
+                BudgetPeriod.end_date,
+                Budget.id
+            ).outerjoin(
+                Budget, db.and_(Budget.period_id == BudgetPeriod.id, Budget.user_id == user_id)
+            ).filter(
+                BudgetPeriod.user_id == user_id,
+                BudgetPeriod.is_active.is_(True)
+            ).order_by(BudgetPeriod.id, Budget.id).first()
+            # A missing active period is cached too, as a falsy marker
+            found = ActiveBudgetContext(user_id, *row) if row else False
+            user_cache.set(user_id, cache_key, found)
+
+        context = found or None
+        memo[user_id] = (version, context)
+        return context
+
+    @staticmethod
+    def invalidate(user_id):
+        """
+        Forget a user's resolved context in this request and in user_cache.
+
+        Call after changing which period is active or its dates; the data version
+        bump alone only takes effect for other requests once committed.
+        """
+        ActiveBudgetContext._memo().pop(user_id, None)
+        user_cache.invalidate(user_id)
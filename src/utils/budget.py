@@ -2,58 +2,25 @@
 Budget utility functions.
 """
 
+from datetime import datetime
 from ..extensions import db
-from ..models import IncomeSource, BudgetAllocation, RecurringIncomeSource, RecurringBudgetAllocation
+from ..models import (
+    Budget, BudgetPeriod, IncomeSource, BudgetAllocation, RecurringIncomeSource, RecurringBudgetAllocation,
+    SpendingRollup
+)
+from .data_version import bump_data_version, bump_data_versions
 
 
 def populate_budget_from_recurring(user, budget, period_type):
-    """Populate a new budget with recurring income sources and allocations matching the period type."""
+    """
+    Populate a budget with recurring income sources and allocations matching the period type.
+    
+    A constant number of statements (see populate_budgets_from_recurring). Safe to
+    call again: recurring items the budget already has are not added twice.
+    """
     try:
-        # Check if budget already has data to avoid duplicates
-        existing_income_sources = IncomeSource.query.filter_by(budget_id=budget.id).count()
-        existing_allocations = BudgetAllocation.query.filter_by(budget_id=budget.id).count()
-        
-        if existing_income_sources > 0 or existing_allocations > 0:
-            print(f"Budget {budget.id} already has data, skipping auto-population to avoid duplicates")
-            return
-        
-        # Add recurring income sources matching the period type
-        recurring_income_sources = RecurringIncomeSource.query.filter_by(
-            user_id=user.id, 
-            period_type=period_type,
-            is_active=True
-        ).all()
-        
-        for recurring_source in recurring_income_sources:
-            income_source = IncomeSource(
-                name=recurring_source.name,
-                amount=recurring_source.amount,
-                budget_id=budget.id,
-                is_recurring_source=True,
-                recurring_source_id=recurring_source.id
-            )
-            db.session.add(income_source)
-        
-        # Add recurring budget allocations matching the period type
-        recurring_allocations = RecurringBudgetAllocation.query.filter_by(
-            user_id=user.id,
-            period_type=period_type,
-            is_active=True
-        ).all()
-        
-        for recurring_allocation in recurring_allocations:
-            budget_allocation = BudgetAllocation(
-                allocated_amount=recurring_allocation.allocated_amount,
-                subcategory_id=recurring_allocation.subcategory_id,
-                budget_id=budget.id,
-                is_recurring_allocation=True,
-                recurring_allocation_id=recurring_allocation.id
-            )
-            db.session.add(budget_allocation)
-        
-        # Update total income
-        budget.total_income = sum(source.amount for source in budget.income_sources)
-        
+        if populate_budgets_from_recurring([budget.id], period_type=period_type):
+            bump_data_version(user.id)
         db.session.commit()
         
     except Exception as e:
@@ -61,6 +28,242 @@ def populate_budget_from_recurring(user, budget, period_type):
         db.session.rollback()
 
 
+def populate_budgets_from_recurring(budget_ids, period_type=None):
+    """
+    Copy recurring income sources and allocations into many budgets at once.
+    
+    Each budget receives its user's active recurring items whose period type matches
+    the budget's period, through one INSERT ... SELECT for income sources and one for
+    allocations (the lowest-ID recurring allocation per subcategory), followed by one
+    UPDATE setting total_income from the budget's income sources. Does not commit.
+    
+    Population is idempotent: NOT EXISTS guards, backed by the unique indexes on
+    income_source (budget_id, recurring_source_id) and budget_allocation
+    (budget_id, subcategory_id), skip recurring sources the budget already has and
+    subcategories it already allocates to.
+    
+    Args:
+        budget_ids: Budget IDs
+        period_type: Optional period type to match instead of each budget's own
+    
+    Returns:
+        Number of income sources and allocations added
+    """
+    budget_ids = list(budget_ids)
+    if not budget_ids:
+        return 0
+    
+    now = datetime.utcnow()
+    targets = db.select(
+        Budget.id.label('budget_id'),
+        Budget.user_id,
+        (db.literal(period_type) if period_type is not None else BudgetPeriod.period_type).label('period_type')
+    ).join(
+        BudgetPeriod, Budget.period_id == BudgetPeriod.id
+    ).where(Budget.id.in_(budget_ids)).subquery('targets')
+    
+    present_source = db.aliased(IncomeSource)
+    added = db.session.execute(IncomeSource.__table__.insert().from_select(
+        ['name', 'amount', 'budget_id', 'is_recurring_source', 'recurring_source_id', 'created_at'],
+        db.select(
+            RecurringIncomeSource.name,
+            RecurringIncomeSource.amount,
+            targets.c.budget_id,
+            db.literal(True),
+            RecurringIncomeSource.id,
+            db.literal(now, db.DateTime)
+        ).join(
+            targets, db.and_(
+                RecurringIncomeSource.user_id == targets.c.user_id,
+                RecurringIncomeSource.period_type == targets.c.period_type
+            )
+        ).where(
+            RecurringIncomeSource.is_active.is_(True),
+            ~db.exists().where(
+                present_source.budget_id == targets.c.budget_id,
+                present_source.recurring_source_id == RecurringIncomeSource.id
+            )
+        )
+    )).rowcount
+    
+    # A budget holds one allocation per subcategory: the first recurring one wins
+    first_recurring = db.aliased(RecurringBudgetAllocation)
+    present_allocation = db.aliased(BudgetAllocation)
+    added += db.session.execute(BudgetAllocation.__table__.insert().from_select(
+        ['allocated_amount', 'subcategory_id', 'budget_id', 'is_recurring_allocation', 'recurring_allocation_id'],
+        db.select(
+            RecurringBudgetAllocation.allocated_amount,
+            RecurringBudgetAllocation.subcategory_id,
+            targets.c.budget_id,
+            db.literal(True),
+            RecurringBudgetAllocation.id
+        ).join(
+            targets, db.and_(
+                RecurringBudgetAllocation.user_id == targets.c.user_id,
+                RecurringBudgetAllocation.period_type == targets.c.period_type
+            )
+        ).where(
+            RecurringBudgetAllocation.is_active.is_(True),
+            RecurringBudgetAllocation.id == db.select(db.func.min(first_recurring.id)).where(
+                first_recurring.user_id == RecurringBudgetAllocation.user_id,
+                first_recurring.period_type == RecurringBudgetAllocation.period_type,
+                first_recurring.subcategory_id == RecurringBudgetAllocation.subcategory_id,
+                first_recurring.is_active.is_(True)
+            ).correlate(RecurringBudgetAllocation).scalar_subquery(),
+            ~db.exists().where(
+                present_allocation.budget_id == targets.c.budget_id,
+                present_allocation.subcategory_id == RecurringBudgetAllocation.subcategory_id
+            )
+        )
+    )).rowcount
+    
+    if added:
+        refresh_budget_totals(budget_ids, columns=('total_allocated', 'income_source_total'))
+        db.session.execute(Budget.__table__.update().where(Budget.id.in_(budget_ids)).values(
+            total_income=Budget.income_source_total
+        ))
+    return added
+
+
+# Denormalized Budget columns and the aggregate each one caches
+BUDGET_TOTAL_COLUMNS = ('total_allocated', 'total_spent', 'income_source_total')
+
+
+def _budget_total_expressions():
+    """Correlated subqueries computing each denormalized total of a budget row."""
+    return {
+        'total_allocated': db.func.coalesce(
+            db.select(db.func.sum(BudgetAllocation.allocated_amount)).where(
+                BudgetAllocation.budget_id == Budget.id
+            ).scalar_subquery(),
+            0
+        ),
+        'total_spent': db.func.coalesce(
+            db.select(db.func.sum(SpendingRollup.spent_total)).where(
+                SpendingRollup.user_id == Budget.user_id,
+                SpendingRollup.budget_period_id == Budget.period_id
+            ).scalar_subquery(),
+            0
+        ),
+        'income_source_total': db.func.coalesce(
+            db.select(db.func.sum(IncomeSource.amount)).where(
+                IncomeSource.budget_id == Budget.id
+            ).scalar_subquery(),
+            0
+        ),
+    }
+
+
+def refresh_budget_totals(budget_ids=None, period_ids=None, user_id=None, columns=BUDGET_TOTAL_COLUMNS):
+    """
+    Recompute denormalized budget totals from their source rows.
+    
+    One UPDATE with a correlated subquery per column, run inside the caller's
+    database transaction (pending changes are flushed first). Does not commit.
+    Budgets already loaded in the session have the columns expired so they read
+    the new values.
+    
+    Args:
+        budget_ids: Budget IDs to refresh
+        period_ids: Budget period IDs whose budgets to refresh
+        user_id: User ID whose budgets to refresh
+        columns: Subset of BUDGET_TOTAL_COLUMNS to recompute
+    """
+    conditions = []
+    if budget_ids is not None:
+        conditions.append(Budget.id.in_(list(budget_ids)))
+    if period_ids is not None:
+        conditions.append(Budget.period_id.in_(list(period_ids)))
+    if user_id is not None:
+        conditions.append(Budget.user_id == user_id)
+    if not conditions:
+        return
+    
+    db.session.flush()
+    expressions = _budget_total_expressions()
+    db.session.execute(Budget.__table__.update().where(db.or_(*conditions)).values({
+        column: expressions[column] for column in columns
+    }))
+    _expire_budget_totals(budget_ids, period_ids, columns, user_id)
+
+
+def add_budget_spent(deltas):
+    """
+    Add spending deltas onto the total_spent of budgets, by period.
+    
+    Used by the spending rollup so transaction writes adjust the budget in the
+    same database transaction. Does not commit.
+    
+    Args:
+        deltas: Dict of budget period ID -> change in spent total
+    """
+    deltas = {period_id: delta for period_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    table = Budget.__table__
+    db.session.execute(
+        table.update().where(table.c.period_id == db.bindparam('b_period_id')).values(
+            total_spent=table.c.total_spent + db.bindparam('b_delta')
+        ),
+        [{'b_period_id': period_id, 'b_delta': delta} for period_id, delta in deltas.items()]
+    )
+    _expire_budget_totals(None, list(deltas), ('total_spent',))
+
+
+def _expire_budget_totals(budget_ids, period_ids, columns, user_id=None):
+    budget_ids = set(budget_ids or ())
+    period_ids = set(period_ids or ())
+    for instance in list(db.session.identity_map.values()):
+        if isinstance(instance, Budget) and (
+                instance.id in budget_ids or instance.period_id in period_ids or instance.user_id == user_id):
+            db.session.expire(instance, list(columns))
+
+
+def check_budget_totals(user_id=None, fix=False, tolerance=0.005):
+    """
+    Compare every budget's denormalized totals with the rows they summarize.
+    
+    Args:
+        user_id: Optional user ID to restrict the check to
+        fix: Recompute the totals of the budgets that disagree, and commit
+        tolerance: Largest difference treated as equal (float rounding)
+    
+    Returns:
+        List of dicts with budget_id, user_id, column, stored and actual for each
+        mismatching total
+    """
+    expressions = _budget_total_expressions()
+    query = db.session.query(
+        Budget.id,
+        Budget.user_id,
+        *[getattr(Budget, column) for column in BUDGET_TOTAL_COLUMNS],
+        *[expressions[column] for column in BUDGET_TOTAL_COLUMNS]
+    ).order_by(Budget.id)
+    if user_id is not None:
+        query = query.filter(Budget.user_id == user_id)
+    
+    mismatches = []
+    count = len(BUDGET_TOTAL_COLUMNS)
+    for row in query:
+        stored, actual = row[2:2 + count], row[2 + count:]
+        for column, stored_value, actual_value in zip(BUDGET_TOTAL_COLUMNS, stored, actual):
+            if abs((stored_value or 0) - (actual_value or 0)) > tolerance:
+                mismatches.append({
+                    'budget_id': row[0],
+                    'user_id': row[1],
+                    'column': column,
+                    'stored': stored_value,
+                    'actual': actual_value
+                })
+    
+    if fix and mismatches:
+        refresh_budget_totals({mismatch['budget_id'] for mismatch in mismatches})
+        bump_data_versions({mismatch['user_id'] for mismatch in mismatches})
+        db.session.commit()
+    return mismatches
+
+
 def cleanup_duplicate_allocations(budget):
     """Remove duplicate allocations from a budget."""
     try:
@@ -79,6 +282,9 @@ def cleanup_duplicate_allocations(budget):
             else:
                 seen_subcategories.add(allocation.subcategory_id)
         
+        if duplicates_removed:
+            refresh_budget_totals([budget.id], columns=('total_allocated',))
+            bump_data_version(budget.user_id)
         db.session.commit()
         return duplicates_removed
         
@@ -0,0 +1,58 @@
+"""
+In-process, per-user cache for expensive read results.
+"""
+
+import threading
+import time
+
+
+class UserCache:
+    """
+    Small thread-safe cache keyed by (user ID, key).
+    
+    Entries expire after `ttl` seconds and every entry of a user can be dropped
+    at once with invalidate(), which services call whenever that user's data
+    changes. The cache lives in the worker process, so the TTL bounds how stale
+    another worker's copy can get.
+    """
+    
+    def __init__(self, ttl=300, max_entries_per_user=32):
+        self.ttl = ttl
+        self.max_entries_per_user = max_entries_per_user
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, user_id, key):
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id][key]
+                return None
+            return value
+    
+    def set(self, user_id, key, value):
+        """Store a value for a user, evicting the user's oldest entry when full."""
+        with self._lock:
+            entries = self._entries.setdefault(user_id, {})
+            entries.pop(key, None)
+            if len(entries) >= self.max_entries_per_user:
+                entries.pop(next(iter(entries)))
+            entries[key] = (time.monotonic() + self.ttl, value)
+    
+    def invalidate(self, user_id):
+        """Drop every cached entry of a user."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache for per-user analytics results
+user_cache = UserCache()
@@ -4,6 +4,7 @@ Category utility functions.
 
 from ..extensions import db
 from ..models import Category, Subcategory
+from .data_version import bump_data_version
 
 
 def create_default_categories(user_id):
@@ -52,4 +53,5 @@ def create_default_categories(user_id):
             subcategory = Subcategory(name=subcat_name, category_id=category.id)
             db.session.add(subcategory)
     
+    bump_data_version(user_id)
     db.session.commit()
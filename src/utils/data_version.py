@@ -0,0 +1,97 @@
+"""
+Per-user data version counter and conditional GET support.
+
+Every service method that changes a user's data calls bump_data_version()
+before committing, so User.data_version changes in the same database
+transaction as the data. GET endpoints wrapped in conditional_get derive their
+ETag from that counter and answer If-None-Match with 304 Not Modified without
+running the view at all.
+"""
+
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import request, make_response
+from ..extensions import db
+from .cache import user_cache
+
+
+def bump_data_version(user_id):
+    """
+    Increment a user's data version inside the current database transaction.
+    
+    Call before committing the change it accounts for.
+    """
+    from ..models import User
+    User.query.filter_by(id=user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+    user_cache.invalidate(user_id)
+
+
+def bump_data_versions(user_ids):
+    """
+    Increment the data version of many users with one UPDATE.
+    
+    For batch jobs touching many users at once; same contract as bump_data_version.
+    """
+    from ..models import User
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    User.query.filter(User.id.in_(user_ids)).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+
+
+def get_data_version(user_id):
+    """
+    Get a user's current data version.
+    
+    Uses the session identity map, so this is free for the authenticated user
+    already loaded by token_required.
+    """
+    from ..models import User
+    user = db.session.get(User, user_id)
+    return user.data_version if user else None
+
+
+def compute_etag(user):
+    """
+    Build the ETag for the current request and user.
+    
+    The date is included because some responses depend on it (active period,
+    days remaining), so cached copies are revalidated at least daily.
+    """
+    key = f'{user.id}:{user.data_version}:{request.full_path}:{date.today().isoformat()}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_get(f):
+    """
+    Decorator adding ETag / If-None-Match handling to a user-data GET endpoint.
+    
+    Must be applied below @token_required (and @subscription_required) since it
+    takes the authenticated user as its first argument.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        etag = compute_etag(current_user)
+        
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(current_user, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag, weak=True)
+        # Responses are per user: browsers must revalidate and shared caches must not store them
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        return response
+    return decorated
@@ -0,0 +1,36 @@
+"""
+Content fingerprints for duplicate transaction detection.
+"""
+
+import hashlib
+import re
+
+
+# Days either side of a transaction searched for duplicates
+DUPLICATE_WINDOW_DAYS = 3
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_description(description):
+    """
+    Reduce a description to the form compared for duplicates.
+
+    Lowercases and collapses punctuation and whitespace, so 'POS  Purchase - Spar'
+    and 'pos purchase spar' are treated as the same bank line.
+    """
+    if not description:
+        return ''
+    return _NON_WORD.sub(' ', description.lower()).strip()
+
+
+def transaction_fingerprint(user_id, amount, description):
+    """
+    Hash a transaction's user, amount and normalized description.
+
+    The date is deliberately left out: it is the trailing column of the
+    (user_id, fingerprint, transaction_date) index, so "same content within N days"
+    is a single index range scan.
+    """
+    key = f'{user_id}|{float(amount):.2f}|{normalize_description(description)}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
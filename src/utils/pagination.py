@@ -0,0 +1,31 @@
+"""
+Keyset (cursor) pagination helpers.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(transaction_date, row_id):
+    """Encode the sort key of the last row on a page into an opaque cursor string."""
+    payload = json.dumps([transaction_date.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple of (transaction_date, row_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return datetime.fromisoformat(date_value), int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
@@ -0,0 +1,107 @@
+"""
+Regular expression handling for categorization rule patterns.
+
+RuleMatcher joins every rule of a kind into one anchored alternation, so a
+pattern has to be valid inside that wrapper, not just on its own. The same
+helpers build the wrapper for the matcher and check patterns on input.
+"""
+
+import re
+
+
+# Flags of every compiled rule expression
+RULE_FLAGS = re.IGNORECASE | re.DOTALL
+
+# Inline global flags such as (?i), only allowed at the start of a whole expression
+_GLOBAL_FLAGS = re.compile(r'(?<!\\)(?:\\\\)*\(\?[aiLmsux]+\)')
+# {m}, {m,} or {m,n} repetition
+_REPETITION = re.compile(r'\{(\d*)(,?)(\d*)\}')
+
+
+def rule_alternative(pattern, index):
+    """One rule's branch of a combined expression, tagged with an empty group r<index>."""
+    return '.*?(?:{}){}'.format(pattern, f'(?P<r{index}>)')
+
+
+def compile_alternatives(alternatives):
+    """Compile rule branches into one expression matching from the start of the text."""
+    return re.compile('^(?:' + '|'.join(alternatives) + ')', RULE_FLAGS)
+
+
+def _repeats(pattern, position):
+    """Whether a quantifier repeating more than a fixed count starts at position."""
+    if position >= len(pattern):
+        return False
+    if pattern[position] in '*+':
+        return True
+    if pattern[position] == '{':
+        found = _REPETITION.match(pattern, position)
+        # {m} repeats a fixed number of times; a bare { is a literal
+        return bool(found) and bool(found.group(2))
+    return False
+
+
+def has_nested_quantifier(pattern):
+    """
+    Whether a pattern repeats a group that itself contains a repetition.
+
+    Shapes like (a+)+ or (a*b?)* backtrack exponentially on near-misses, so a
+    single rule could stall every request that categorizes a transaction.
+    """
+    # Per open group: whether it contains a repetition so far
+    groups = [False]
+    in_class = False
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if in_class:
+            if char == ']':
+                in_class = False
+            index += 1
+            continue
+        if char == '[':
+            in_class = True
+            index += 1
+            # A ] straight after [ or [^ is a literal
+            if pattern.startswith('^', index):
+                index += 1
+            if pattern.startswith(']', index):
+                index += 1
+            continue
+        if char == '(':
+            groups.append(False)
+        elif char == ')' and len(groups) > 1:
+            inner = groups.pop()
+            if inner and _repeats(pattern, index + 1):
+                return True
+            groups[-1] = groups[-1] or inner
+        elif _repeats(pattern, index):
+            groups[-1] = True
+        index += 1
+    return False
+
+
+def check_regex_pattern(pattern):
+    """
+    Check a regex rule pattern can be used by RuleMatcher.
+
+    Raises:
+        ValueError: If the pattern doesn't compile inside the combined
+            expression, uses inline global flags, groups or backreferences that
+            would clash with other rules, or nests repetitions
+    """
+    if _GLOBAL_FLAGS.search(pattern):
+        raise ValueError('Inline flags such as (?i) are not supported; matching is already case-insensitive')
+    try:
+        compiled = re.compile(pattern, RULE_FLAGS)
+        compile_alternatives([rule_alternative(pattern, 0), rule_alternative('x', 1)])
+    except re.error as e:
+        raise ValueError(f'Invalid regular expression: {e}')
+    # Rules are combined into one expression, so group references would point elsewhere
+    if compiled.groupindex or re.search(r'\\[1-9]|\(\?P=', pattern):
+        raise ValueError('Named groups and backreferences are not supported')
+    if has_nested_quantifier(pattern):
+        raise ValueError('Repeated groups containing repetitions, such as (a+)+, are not supported')
@@ -0,0 +1,208 @@
+"""
+Streaming parsers for bank statement files (CSV, OFX and QIF).
+
+Each parser reads a text stream incrementally and yields (line_number, row) pairs,
+where row is a dict with any of the keys 'amount', 'description', 'comment',
+'transaction_date' (ISO formatted when it could be parsed) and 'subcategory'.
+Nothing is buffered beyond the current record, so arbitrarily large statements
+can be processed in constant memory.
+"""
+
+import csv
+import re
+from datetime import datetime
+
+
+SUPPORTED_FORMATS = ('csv', 'ofx', 'qif')
+
+# Header aliases used by common bank CSV exports
+CSV_COLUMN_ALIASES = {
+    'transaction_date': ('date', 'transaction_date', 'transaction date', 'posted', 'posting date', 'value date'),
+    'amount': ('amount', 'value', 'transaction amount'),
+    'debit': ('debit', 'debit amount', 'withdrawal', 'money out'),
+    'credit': ('credit', 'credit amount', 'deposit', 'money in'),
+    'description': ('description', 'payee', 'narrative', 'details', 'name', 'reference'),
+    'comment': ('comment', 'memo', 'notes', 'note'),
+    'subcategory': ('subcategory', 'category'),
+}
+
+DEFAULT_DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%d/%m/%y', '%m/%d/%y')
+
+
+def detect_format(filename):
+    """Infer the statement format from a file name, or None if it is not recognised."""
+    if not filename or '.' not in filename:
+        return None
+    extension = filename.rsplit('.', 1)[1].lower()
+    return extension if extension in SUPPORTED_FORMATS else None
+
+
+def parse_statement(stream, file_format, date_format=None):
+    """Return a row iterator for the given statement format."""
+    parsers = {
+        'csv': parse_csv,
+        'ofx': parse_ofx,
+        'qif': parse_qif,
+    }
+    if file_format not in parsers:
+        raise ValueError(f"Unsupported statement format: {file_format}")
+    return parsers[file_format](stream, date_format=date_format)
+
+
+def normalize_date(value, date_format=None):
+    """
+    Convert a statement date string to YYYY-MM-DD.
+
+    Returns the original string unchanged when it cannot be parsed so that schema
+    validation reports it as an invalid date for that row.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    formats = (date_format,) if date_format else DEFAULT_DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return value
+
+
+def normalize_amount(value):
+    """Strip currency symbols, thousands separators and accounting parentheses."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    negative = value.startswith('(') and value.endswith(')')
+    cleaned = re.sub(r'[^0-9.\-+]', '', value)
+    if negative and cleaned and not cleaned.startswith('-'):
+        cleaned = '-' + cleaned
+    return cleaned or value
+
+
+def parse_csv(stream, date_format=None):
+    """Parse a CSV statement with a header row."""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if not header:
+        return
+
+    normalized_header = [column.strip().lower() for column in header]
+    columns = {}
+    for key, aliases in CSV_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized_header:
+                columns[key] = normalized_header.index(alias)
+                break
+
+    def cell(values, key):
+        index = columns.get(key)
+        if index is None or index >= len(values):
+            return None
+        return values[index].strip() or None
+
+    for line_number, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+
+        amount = normalize_amount(cell(values, 'amount'))
+        if amount is None and ('debit' in columns or 'credit' in columns):
+            try:
+                debit = float(normalize_amount(cell(values, 'debit')) or 0)
+                credit = float(normalize_amount(cell(values, 'credit')) or 0)
+                amount = str(credit - abs(debit))
+            except ValueError:
+                amount = cell(values, 'debit') or cell(values, 'credit')
+
+        yield line_number, {
+            'transaction_date': normalize_date(cell(values, 'transaction_date'), date_format),
+            'amount': amount,
+            'description': cell(values, 'description'),
+            'comment': cell(values, 'comment'),
+            'subcategory': cell(values, 'subcategory'),
+        }
+
+
+def _iter_ofx_tags(stream, chunk_size=65536):
+    """Yield (tag, value, line_number) tokens from an OFX (SGML or XML) stream."""
+    buffer = ''
+    line_number = 1
+    while True:
+        chunk = stream.read(chunk_size)
+        parts = (buffer + chunk).split('<')
+        # The last token may continue in the next chunk
+        buffer = parts.pop() if chunk else ''
+        for part in parts:
+            tag, separator, value = part.partition('>')
+            if separator:
+                yield tag.strip().upper(), value.strip(), line_number
+            line_number += part.count('\n')
+        if not chunk:
+            break
+
+
+def parse_ofx(stream, date_format=None):
+    """Parse the STMTTRN records of an OFX statement."""
+    record = None
+    record_line = None
+    for tag, value, line_number in _iter_ofx_tags(stream):
+        if tag == 'STMTTRN':
+            record = {}
+            record_line = line_number
+        elif tag == '/STMTTRN' and record is not None:
+            description = record.get('NAME') or record.get('PAYEE') or record.get('MEMO')
+            comment = record.get('MEMO') if record.get('MEMO') != description else None
+            posted = record.get('DTPOSTED') or record.get('DTUSER') or ''
+            yield record_line, {
+                'transaction_date': normalize_date(posted[:8], date_format or '%Y%m%d'),
+                'amount': normalize_amount(record.get('TRNAMT')),
+                'description': description,
+                'comment': comment,
+                'subcategory': None,
+            }
+            record = None
+        elif record is not None and not tag.startswith('/') and value:
+            record[tag] = value
+
+
+def parse_qif(stream, date_format=None):
+    """Parse the records of a QIF statement."""
+    record = {}
+    record_line = None
+    qif_date_formats = (date_format,) if date_format else ('%m/%d/%Y', '%m/%d/%y', '%d/%m/%Y', '%Y-%m-%d')
+
+    for line_number, raw_line in enumerate(stream, start=1):
+        line = raw_line.rstrip('\r\n')
+        if not line or line.startswith('!'):
+            continue
+
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if record:
+                date_value = None
+                if record.get('D'):
+                    # QIF writes dates like 1/ 5'24 - normalize separators first
+                    date_value = record['D'].replace("'", '/').replace(' ', '')
+                    for fmt in qif_date_formats:
+                        parsed = normalize_date(date_value, fmt)
+                        if parsed != date_value:
+                            date_value = parsed
+                            break
+                yield record_line, {
+                    'transaction_date': date_value,
+                    'amount': normalize_amount(record.get('T') or record.get('U')),
+                    'description': record.get('P') or record.get('M'),
+                    'comment': record.get('M') if record.get('P') else None,
+                    'subcategory': record.get('L'),
+                }
+            record = {}
+            record_line = None
+            continue
+
+        if record_line is None:
+            record_line = line_number
+        record.setdefault(code, value)
@@ -0,0 +1,75 @@
+"""
+Streaming JSON responses for large collections.
+
+Rows are read from a server-side cursor (Query.yield_per) and written to the
+response as they are serialized, so memory use is bounded by the batch size
+instead of the size of the result set and the first bytes go out as soon as
+the first batch has been fetched.
+"""
+
+from flask import Response, current_app, stream_with_context
+
+
+# Rows fetched per round trip and serialized items per response chunk
+STREAM_BATCH_SIZE = 500
+
+
+def iter_json_array(rows, serialize=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield a JSON array of serialized rows in chunks.
+
+    Args:
+        rows: Iterable of rows, typically a query with yield_per applied
+        serialize: Optional callable turning a row into a JSON-serializable value;
+            rows for which it returns None are skipped
+        batch_size: Number of items joined into each yielded chunk
+    """
+    dumps = current_app.json.dumps
+    buffer = []
+    separator = ''
+    yield '['
+    for row in rows:
+        item = serialize(row) if serialize else row
+        if item is None:
+            continue
+        buffer.append(dumps(item))
+        if len(buffer) >= batch_size:
+            yield separator + ','.join(buffer)
+            separator = ','
+            buffer = []
+    if buffer:
+        yield separator + ','.join(buffer)
+    yield ']'
+
+
+def stream_json_response(rows, serialize=None, key=None, trailer=None, status=200):
+    """
+    Build a streaming JSON response for a collection.
+
+    Without a key the body is a bare array. With a key it is an object holding the
+    array under that key, followed by the entries returned by trailer(), which is
+    called only once the array has been written; this lets summaries such as
+    per-status counts be accumulated by serialize() in the same pass.
+
+    Args:
+        rows: Iterable of rows, typically a query with yield_per applied
+        serialize: Optional callable turning a row into a JSON-serializable value (or None to skip it)
+        key: Optional object key for the array
+        trailer: Optional callable returning a dict of extra keys for the object
+        status: HTTP status code
+
+    Returns:
+        Flask Response streaming the JSON body
+    """
+    def generate():
+        dumps = current_app.json.dumps
+        if key is None:
+            yield from iter_json_array(rows, serialize)
+            return
+        yield '{' + dumps(key) + ':'
+        yield from iter_json_array(rows, serialize)
+        for name, value in (trailer() if trailer else {}).items():
+            yield ',' + dumps(name) + ':' + dumps(value)
+        yield '}'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
@@ -0,0 +1,181 @@
+"""
+Shared fixtures: an app on an in-memory database and a seeded user.
+"""
+
+import itertools
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from src import create_app
+from src.extensions import db, limiter
+from src.models import (
+    Budget, BudgetAllocation, BudgetPeriod, Category, SpendingRollup, Subcategory, Transaction, User
+)
+from src.services import SpendingRollupService
+from src.utils.budget import check_budget_totals
+from src.utils.cache import user_cache
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['SUBSCRIPTIONS_ENABLED'] = False
+    app.config['RATELIMIT_ENABLED'] = False
+    limiter.enabled = False
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    user_cache.clear()
+
+
+class HTTPSClient(FlaskClient):
+    """Test client sending every request over HTTPS (the app redirects plain HTTP)."""
+
+    def open(self, *args, **kwargs):
+        kwargs.setdefault('base_url', 'https://localhost')
+        return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def client(app):
+    app.test_client_class = HTTPSClient
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Factory for users with one category, two subcategories and an active period with a budget."""
+    created = itertools.count()
+
+    def make(start_date=None, end_date=None, period_type='monthly', total_income=1000):
+        today = date.today()
+        start_date = start_date or today - timedelta(days=15)
+        end_date = end_date or today + timedelta(days=15)
+        number = next(created)
+        username = f'tester{number}' if number else 'tester'
+        account = User(username=username, email=f'{username}@example.com', first_name='Test', last_name='User')
+        account.set_password('password')
+        db.session.add(account)
+        db.session.flush()
+
+        category = Category(name='Food', user_id=account.id)
+        db.session.add(category)
+        db.session.flush()
+        groceries = Subcategory(name='Groceries', category_id=category.id)
+        dining = Subcategory(name='Dining', category_id=category.id)
+        db.session.add_all([groceries, dining])
+
+        period = BudgetPeriod(
+            name='Current', period_type=period_type, user_id=account.id, is_active=True,
+            start_date=start_date, end_date=end_date
+        )
+        db.session.add(period)
+        db.session.flush()
+        budget = Budget(period_id=period.id, user_id=account.id, total_income=total_income)
+        db.session.add(budget)
+        db.session.commit()
+
+        token = jwt.encode({'user_id': account.id}, app.config['SECRET_KEY'], algorithm='HS256')
+        return SimpleNamespace(
+            id=account.id,
+            headers={'Authorization': f'Bearer {token}'},
+            category_id=category.id,
+            groceries_id=groceries.id,
+            dining_id=dining.id,
+            period_id=period.id,
+            budget_id=budget.id
+        )
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    """A user whose active monthly period runs from 15 days ago to 15 days ahead."""
+    return make_user()
+
+
+@pytest.fixture
+def add_transactions(user):
+    """Insert expenses for the user directly (bypassing the spending rollup)."""
+    def add(count, subcategory_id=None, when=None):
+        when = when or datetime.utcnow() - timedelta(hours=1)
+        rows = [
+            Transaction(
+                amount=-(index + 1), description=f'Purchase {index}', user_id=user.id,
+                subcategory_id=subcategory_id or user.groceries_id, transaction_date=when
+            )
+            for index in range(count)
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [row.id for row in rows]
+    return add
+
+
+@pytest.fixture
+def add_allocations(user):
+    """Give the user's budget allocations, each on a new subcategory."""
+    created = itertools.count()
+
+    def add(count, **kwargs):
+        subcategories = [
+            Subcategory(name=f'Extra {next(created)}', category_id=user.category_id) for _ in range(count)
+        ]
+        db.session.add_all(subcategories)
+        db.session.flush()
+        db.session.add_all([
+            BudgetAllocation(allocated_amount=10, subcategory_id=subcategory.id, budget_id=user.budget_id, **kwargs)
+            for subcategory in subcategories
+        ])
+        db.session.commit()
+        return [subcategory.id for subcategory in subcategories]
+    return add
+
+
+@pytest.fixture
+def assert_aggregates_consistent(app):
+    """Assert the spending rollup and budget totals match a full recomputation."""
+    def rollup():
+        columns = SpendingRollupService.TOTAL_COLUMNS
+        return {
+            (row.user_id, row.budget_period_id, row.subcategory_id): tuple(
+                round(getattr(row, column), 2) for column in columns
+            )
+            for row in SpendingRollup.query
+            # Rows emptied by deltas are kept; a rebuild doesn't create them
+            if any(getattr(row, column) for column in columns)
+        }
+
+    def check():
+        db.session.expire_all()
+        assert check_budget_totals() == []
+        maintained = rollup()
+        SpendingRollupService.rebuild_all()
+        assert rollup() == maintained
+    return check
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager counting the SQL statements run inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return counter
@@ -0,0 +1,93 @@
+"""
+Tests for the cached active budget context.
+"""
+
+from datetime import timedelta
+
+from flask import g
+
+from src.extensions import db
+from src.models import BudgetPeriod, User
+from src.utils.active_budget import ActiveBudgetContext
+
+
+def lookups(statements):
+    """Statements reading the budget_period table."""
+    return [statement for statement in statements if 'FROM budget_period' in statement]
+
+
+def active_period_id(client, user):
+    response = client.get('/api/budget/budget', headers=user.headers)
+    return response.get_json()['period']['id'] if response.status_code == 200 else None
+
+
+def create_period(client, user, offset):
+    current = db.session.get(BudgetPeriod, user.period_id)
+    start = current.end_date + timedelta(days=1 + offset * 31)
+    response = client.post('/api/budget/budget-periods', headers=user.headers, json={
+        'name': f'Later {offset}', 'period_type': 'monthly',
+        'start_date': start.isoformat(), 'end_date': (start + timedelta(days=30)).isoformat()
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def test_resolve_snapshots_the_active_period(app, user, make_user):
+    context = ActiveBudgetContext.resolve(user.id)
+    period = db.session.get(BudgetPeriod, user.period_id)
+    assert (context.period_id, context.budget_id, context.name, context.period_type) == (
+        user.period_id, user.budget_id, period.name, period.period_type
+    )
+    assert (context.start_date, context.end_date) == (period.start_date, period.end_date)
+    assert context.period() is period
+    assert context.budget().id == user.budget_id
+
+    idle = make_user()
+    db.session.get(BudgetPeriod, idle.period_id).is_active = False
+    db.session.commit()
+    ActiveBudgetContext.invalidate(idle.id)
+    assert ActiveBudgetContext.resolve(idle.id) is None
+
+
+def test_resolve_is_cached_within_and_across_requests(app, client, user, count_queries):
+    with app.app_context():
+        with count_queries() as statements:
+            first = ActiveBudgetContext.resolve(user.id)
+            again = ActiveBudgetContext.resolve(user.id)
+        assert again is first
+        assert len(lookups(statements)) == 1
+
+    client.get('/api/budget/budget', headers=user.headers)
+    # The test client shares one app context, so drop the per-request memo as a new request would
+    g.pop('_active_budget', None)
+    with count_queries() as statements:
+        response = client.get('/api/budget/budget', headers=user.headers)
+    assert response.status_code == 200
+    assert lookups(statements) == []
+
+
+def test_data_version_change_from_another_worker_misses_the_cache(app, user):
+    with app.app_context():
+        assert ActiveBudgetContext.resolve(user.id).period_id == user.period_id
+    # Another process deactivates the period and bumps the version without touching this process's cache
+    BudgetPeriod.query.filter_by(id=user.period_id).update({'is_active': False})
+    User.query.filter_by(id=user.id).update({User.data_version: User.data_version + 1})
+    db.session.commit()
+    with app.app_context():
+        assert ActiveBudgetContext.resolve(user.id) is None
+
+
+def test_period_changes_switch_the_context_immediately(client, user):
+    assert active_period_id(client, user) == user.period_id
+
+    later = create_period(client, user, 0)
+    assert active_period_id(client, user) == later
+
+    response = client.post(f'/api/budget/budget-periods/{user.period_id}/activate', headers=user.headers)
+    assert response.status_code == 200
+    assert active_period_id(client, user) == user.period_id
+
+    response = client.post(f'/api/budget/budget-periods/{later}/activate', headers=user.headers)
+    assert response.status_code == 200
+    assert client.delete(f'/api/budget/budget-periods/{later}', headers=user.headers).status_code == 200
+    assert active_period_id(client, user) is None
@@ -0,0 +1,67 @@
+"""
+Tests for reading the active budget.
+"""
+
+import pytest
+
+from src.extensions import db
+from src.models import BudgetAllocation, IncomeSource, RecurringBudgetAllocation
+from src.services import BudgetService
+from src.utils.active_budget import ActiveBudgetContext
+
+
+def add_recurring_allocations(user, subcategory_ids):
+    recurring = [
+        RecurringBudgetAllocation(allocated_amount=25, subcategory_id=subcategory_id, user_id=user.id)
+        for subcategory_id in subcategory_ids
+    ]
+    db.session.add_all(recurring)
+    db.session.flush()
+    db.session.add_all([
+        BudgetAllocation(
+            allocated_amount=25, subcategory_id=template.subcategory_id, budget_id=user.budget_id,
+            is_recurring_allocation=True, recurring_allocation_id=template.id
+        )
+        for template in recurring
+    ])
+    db.session.commit()
+
+
+def test_get_budget_runs_a_fixed_number_of_queries(user, add_allocations, count_queries):
+    def measure():
+        # Cache the active period first, then expire the session as a new request would
+        ActiveBudgetContext.resolve(user.id)
+        db.session.expire_all()
+        with count_queries() as statements:
+            budget = BudgetService.get_budget(user.id)
+        return budget, len(statements)
+
+    add_allocations(1)
+    small, small_count = measure()
+    assert len(small['allocations']) == 1
+
+    add_allocations(60)
+    add_recurring_allocations(user, [user.groceries_id, user.dining_id])
+    db.session.add_all([IncomeSource(name=f'Income {index}', amount=100, budget_id=user.budget_id) for index in range(20)])
+    db.session.commit()
+    large, large_count = measure()
+
+    assert len(large['allocations']) == 63
+    assert len(large['income_sources']) == 20
+    recurring = [allocation for allocation in large['allocations'] if allocation['is_recurring_allocation']]
+    assert len(recurring) == 2
+    assert all(allocation['recurring_period_type'] == 'monthly' for allocation in recurring)
+    # Data version check, budget row, income sources, allocations with their joins
+    assert small_count == large_count == 4
+
+
+def test_get_budget_errors_are_not_reported_as_missing_budget(client, user, monkeypatch):
+    def fail(user_id):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(ActiveBudgetContext, 'resolve', staticmethod(fail))
+
+    with pytest.raises(RuntimeError):
+        BudgetService.get_budget(user.id)
+
+    response = client.get('/api/budget/budget', headers=user.headers)
+    assert response.status_code == 500
@@ -0,0 +1,96 @@
+"""
+Tests for saving the active budget's allocations.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from src.extensions import db
+from src.models import Budget, BudgetAllocation, RecurringBudgetAllocation, User
+from src.utils.budget import refresh_budget_totals
+
+
+@contextmanager
+def allocation_writes():
+    """Collect (statement kind, parameter dicts) of every write to budget_allocation."""
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith(('INSERT INTO budget_allocation', 'UPDATE budget_allocation',
+                                 'DELETE FROM budget_allocation')):
+            writes.append((statement.split(None, 1)[0], context.compiled_parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield writes
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def save(client, user, amounts):
+    response = client.post('/api/budget/allocations', headers=user.headers, json={'allocations': [
+        {'subcategory_id': subcategory_id, 'allocated': amount} for subcategory_id, amount in amounts
+    ]})
+    assert response.status_code == 200
+    db.session.expire_all()
+
+
+def rows(budget_id):
+    return {
+        allocation.subcategory_id: (allocation.id, allocation.allocated_amount, allocation.recurring_allocation_id)
+        for allocation in BudgetAllocation.query.filter_by(budget_id=budget_id)
+    }
+
+
+def test_save_writes_only_the_difference(client, user, add_allocations):
+    recurring = RecurringBudgetAllocation(allocated_amount=100, subcategory_id=user.groceries_id, user_id=user.id)
+    db.session.add(recurring)
+    db.session.flush()
+    db.session.add_all([
+        BudgetAllocation(allocated_amount=100, subcategory_id=user.groceries_id, budget_id=user.budget_id,
+                         is_recurring_allocation=True, recurring_allocation_id=recurring.id),
+        BudgetAllocation(allocated_amount=50, subcategory_id=user.dining_id, budget_id=user.budget_id),
+    ])
+    db.session.commit()
+    removed, added = add_allocations(2)
+    refresh_budget_totals([user.budget_id])
+    db.session.commit()
+    before = rows(user.budget_id)
+
+    with allocation_writes() as writes:
+        save(client, user, [(user.groceries_id, 100), (user.dining_id, 75), (added, 20), (added, 25)])
+
+    after = rows(user.budget_id)
+    assert set(after) == {user.groceries_id, user.dining_id, added}
+    assert after[user.groceries_id] == before[user.groceries_id] == (before[user.groceries_id][0], 100, recurring.id)
+    assert after[user.dining_id] == (before[user.dining_id][0], 75, None)
+    # The last entry for a subcategory wins; the existing row is updated in place
+    assert after[added] == (before[added][0], 25, None)
+    assert db.session.get(Budget, user.budget_id).total_allocated == 200
+
+    # One DELETE for the removed row, one upsert of just the changed amounts
+    assert [kind for kind, _ in writes] == ['DELETE', 'INSERT']
+    assert list(writes[0][1][0].values()) == [before[removed][0]]
+    upserted = {row['subcategory_id']: row['allocated_amount'] for row in writes[1][1]}
+    assert upserted == {user.dining_id: 75, added: 25}
+
+
+def test_unchanged_save_writes_nothing(client, user):
+    save(client, user, [(user.groceries_id, 120), (user.dining_id, 30)])
+    before = rows(user.budget_id)
+    version = db.session.get(User, user.id).data_version
+
+    with allocation_writes() as writes:
+        save(client, user, [(user.dining_id, 30), (user.groceries_id, 120)])
+
+    assert writes == []
+    assert rows(user.budget_id) == before
+    assert db.session.get(User, user.id).data_version == version
+
+
+def test_saving_an_empty_list_removes_every_allocation(client, user):
+    save(client, user, [(user.groceries_id, 120)])
+    save(client, user, [])
+    assert rows(user.budget_id) == {}
+    assert db.session.get(Budget, user.budget_id).total_allocated == 0
@@ -0,0 +1,85 @@
+"""
+Tests for cloning a budget period.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.extensions import db
+from src.models import Budget, BudgetAllocation, BudgetPeriod, IncomeSource, RecurringIncomeSource
+from src.utils.budget import check_budget_totals, refresh_budget_totals
+
+
+def seed_budget(user):
+    recurring = RecurringIncomeSource(name='Salary', amount=1000, user_id=user.id)
+    db.session.add(recurring)
+    db.session.flush()
+    db.session.add_all([
+        IncomeSource(name='Salary', amount=1000, budget_id=user.budget_id, is_recurring_source=True,
+                     recurring_source_id=recurring.id),
+        IncomeSource(name='Side job', amount=250.5, budget_id=user.budget_id),
+        BudgetAllocation(allocated_amount=100.5, subcategory_id=user.groceries_id, budget_id=user.budget_id),
+        BudgetAllocation(allocated_amount=33.33, subcategory_id=user.dining_id, budget_id=user.budget_id),
+    ])
+    db.session.get(Budget, user.budget_id).total_income = 1250.5
+    refresh_budget_totals([user.budget_id])
+    db.session.commit()
+
+
+def clone(client, user, start, end, period_id=None, **data):
+    period_id = period_id or user.period_id
+    return client.post(f'/api/budget/budget-periods/{period_id}/clone', headers=user.headers, json={
+        'name': 'Next', 'start_date': start.isoformat(), 'end_date': end.isoformat(), **data
+    })
+
+
+def test_clone_copies_the_budget_with_scale(client, user):
+    seed_budget(user)
+    start = date.today() + timedelta(days=16)
+    response = clone(client, user, start, start + timedelta(days=29), scale=1.1)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['name'], body['period_type'], body['is_active']) == ('Next', 'monthly', True)
+
+    db.session.expire_all()
+    assert db.session.get(BudgetPeriod, user.period_id).is_active is False
+    budget = Budget.query.filter_by(period_id=body['id']).one()
+    assert budget.total_income == 1375.55
+    assert budget.total_allocated == pytest.approx(147.21)
+    assert budget.income_source_total == pytest.approx(1375.55)
+    assert {
+        allocation.subcategory_id: allocation.allocated_amount
+        for allocation in BudgetAllocation.query.filter_by(budget_id=budget.id)
+    } == {user.groceries_id: 110.55, user.dining_id: 36.66}
+    sources = {
+        source.name: (source.amount, source.is_recurring_source, source.recurring_source_id is not None)
+        for source in IncomeSource.query.filter_by(budget_id=budget.id)
+    }
+    assert sources == {'Salary': (1100, True, True), 'Side job': (275.55, False, False)}
+    # The source budget is left as it was
+    assert IncomeSource.query.filter_by(budget_id=user.budget_id).count() == 2
+    assert db.session.get(Budget, user.budget_id).total_allocated == pytest.approx(133.83)
+    assert check_budget_totals() == []
+
+
+def test_clone_rejects_overlapping_dates(client, user):
+    seed_budget(user)
+    response = clone(client, user, date.today() + timedelta(days=10), date.today() + timedelta(days=40))
+    assert response.status_code == 400
+    assert 'period_overlap' in response.get_json()['errors']
+    assert BudgetPeriod.query.filter_by(user_id=user.id).count() == 1
+    assert db.session.get(BudgetPeriod, user.period_id).is_active is True
+
+    # A different period type doesn't clash
+    response = clone(
+        client, user, date.today() + timedelta(days=10), date.today() + timedelta(days=40), period_type='custom'
+    )
+    assert response.status_code == 201
+
+
+def test_clone_of_another_users_period_is_not_found(client, user, make_user):
+    other = make_user()
+    start = date.today() + timedelta(days=16)
+    assert clone(client, user, start, start + timedelta(days=29), period_id=other.period_id).status_code == 404
+    assert BudgetPeriod.query.count() == 2
@@ -0,0 +1,97 @@
+"""
+Tests for budget period overlap checks.
+"""
+
+import random
+from datetime import date, timedelta
+
+from src.extensions import db
+from src.models import BudgetPeriod, User
+from src.services import BudgetService
+
+
+def add_period(user_id, start, end, period_type='monthly'):
+    period = BudgetPeriod(
+        name=f'{start} to {end}', period_type=period_type, user_id=user_id,
+        start_date=start, end_date=end, is_active=False
+    )
+    db.session.add(period)
+    db.session.commit()
+    return period
+
+
+def proposal(user_id, start, end, period_type='monthly', **kwargs):
+    return dict(user_id=user_id, period_type=period_type, start_date=start, end_date=end, **kwargs)
+
+
+def test_bulk_check_reports_existing_and_earlier_proposals(user):
+    base = date(2030, 1, 1)
+    existing = add_period(user.id, base + timedelta(days=10), base + timedelta(days=19))
+    conflicts = BudgetService._check_period_overlaps([
+        proposal(user.id, base, base + timedelta(days=4)),
+        # Existing period starts inside this one
+        proposal(user.id, base + timedelta(days=5), base + timedelta(days=12)),
+        # Only overlaps the rejected proposal above
+        proposal(user.id, base + timedelta(days=6), base + timedelta(days=7)),
+        proposal(user.id, base + timedelta(days=12), base + timedelta(days=14), period_type='custom'),
+        proposal(user.id, base + timedelta(days=20), base + timedelta(days=30)),
+    ])
+    assert conflicts == {1: existing, 2: 1}
+
+
+def test_bulk_check_keeps_users_apart_and_skips_excluded_periods(user):
+    other = User(username='other', email='other@example.com', first_name='O', last_name='Ther')
+    other.set_password('password')
+    db.session.add(other)
+    db.session.commit()
+    base = date(2030, 1, 1)
+    mine = add_period(user.id, base, base + timedelta(days=9))
+    add_period(other.id, base, base + timedelta(days=9))
+
+    assert BudgetService._check_period_overlaps([
+        proposal(user.id, base + timedelta(days=2), base + timedelta(days=5), id=mine.id),
+        proposal(other.id, base + timedelta(days=10), base + timedelta(days=19)),
+    ]) == {}
+    assert BudgetService._check_period_overlaps([
+        proposal(user.id, base + timedelta(days=9), base + timedelta(days=12)),
+        proposal(other.id, base + timedelta(days=10), base + timedelta(days=19)),
+    ]) == {0: mine}
+
+
+def test_bulk_check_matches_a_brute_force_scan(user):
+    rng = random.Random(7)
+    base = date(2030, 1, 1)
+
+    def interval():
+        start = base + timedelta(days=rng.randrange(200))
+        return start, start + timedelta(days=rng.randrange(20))
+
+    types = ('monthly', 'quarterly')
+    existing = [add_period(user.id, *interval(), period_type=rng.choice(types)) for _ in range(25)]
+    proposals = [proposal(user.id, *interval(), period_type=rng.choice(types)) for _ in range(60)]
+
+    def overlaps(a_start, a_end, b_start, b_end):
+        return a_start <= b_end and a_end >= b_start
+
+    order = sorted(range(len(proposals)), key=lambda index: (proposals[index]['start_date'], index))
+    expected = set()
+    for position, index in enumerate(order):
+        current = proposals[index]
+        against = [(period.period_type, period.start_date, period.end_date) for period in existing]
+        against += [
+            (proposals[earlier]['period_type'], proposals[earlier]['start_date'], proposals[earlier]['end_date'])
+            for earlier in order[:position]
+        ]
+        if any(
+            period_type == current['period_type'] and overlaps(start, end, current['start_date'], current['end_date'])
+            for period_type, start, end in against
+        ):
+            expected.add(index)
+
+    conflicts = BudgetService._check_period_overlaps(proposals)
+    assert set(conflicts) == expected
+    for index, other in conflicts.items():
+        if isinstance(other, int):
+            other = BudgetPeriod(**{key: proposals[other][key] for key in ('period_type', 'start_date', 'end_date')})
+        assert other.period_type == proposals[index]['period_type']
+        assert overlaps(other.start_date, other.end_date, proposals[index]['start_date'], proposals[index]['end_date'])
@@ -0,0 +1,71 @@
+"""
+Tests for the denormalized budget totals and the check-budget-totals command.
+"""
+
+from src.extensions import db
+from src.models import Budget
+from src.utils.budget import check_budget_totals
+
+
+def stored_totals(budget_id):
+    db.session.expire_all()
+    budget = db.session.get(Budget, budget_id)
+    return budget.total_allocated, budget.total_spent, budget.income_source_total, budget.total_income
+
+
+def test_budget_writes_keep_totals_exact(client, user):
+    def ok(response, status=200):
+        assert response.status_code == status, response.get_json()
+        assert check_budget_totals() == []
+        return response.get_json()
+
+    def allocate(amounts):
+        return ok(client.post('/api/budget/allocations', headers=user.headers, json={'allocations': [
+            {'subcategory_id': subcategory_id, 'allocated': amount} for subcategory_id, amount in amounts.items()
+        ]}))
+
+    allocate({user.groceries_id: 300, user.dining_id: 120})
+    assert stored_totals(user.budget_id)[0] == 420
+    allocate({user.groceries_id: 250})
+    assert stored_totals(user.budget_id)[0] == 250
+
+    salary = ok(client.post('/api/budget/income-sources', headers=user.headers, json={
+        'name': 'Salary', 'amount': 2000
+    }), 201)['id']
+    ok(client.post('/api/budget/income-sources', headers=user.headers, json={'name': 'Gift', 'amount': 150}), 201)
+    ok(client.put(f'/api/budget/income-sources/{salary}', headers=user.headers, json={'amount': 2100}))
+    assert stored_totals(user.budget_id)[2] == 2250
+    ok(client.delete(f'/api/budget/income-sources/{salary}', headers=user.headers))
+    ok(client.post('/api/budget/recalculate-income', headers=user.headers))
+    assert stored_totals(user.budget_id)[2:] == (150, 150)
+
+    ok(client.post('/api/recurring-allocations', headers=user.headers, json={
+        'allocated_amount': 80, 'subcategory_id': user.dining_id
+    }), 201)
+    ok(client.post('/api/recurring-income-sources', headers=user.headers, json={'name': 'Rent', 'amount': 500}), 201)
+    ok(client.post('/api/populate-current-budget', headers=user.headers))
+    assert stored_totals(user.budget_id)[0] == 330
+    assert stored_totals(user.budget_id)[2] == 650
+
+    ok(client.post('/api/transactions', headers=user.headers, json={
+        'amount': -45, 'description': 'Dinner', 'subcategory_id': user.dining_id
+    }), 201)
+    assert stored_totals(user.budget_id)[1] == 45
+    ok(client.delete(f'/api/categories/subcategories/{user.dining_id}', headers=user.headers))
+    assert stored_totals(user.budget_id)[:2] == (250, 0)
+
+
+def test_check_budget_totals_command_reports_and_fixes_drift(app, user, add_allocations):
+    # Inserted directly, so the stored totals are now stale
+    add_allocations(2)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['check-budget-totals'])
+    assert f'Budget {user.budget_id} (user {user.id}): total_allocated is 0.0, expected 20.0' in result.output
+    assert 'run with --fix' in result.output
+
+    result = runner.invoke(args=['check-budget-totals', '--fix'])
+    assert 'Fixed 1 totals in 1 budgets.' in result.output
+    assert check_budget_totals() == []
+    assert stored_totals(user.budget_id)[0] == 20
+    assert 'All budget totals are consistent.' in runner.invoke(args=['check-budget-totals']).output
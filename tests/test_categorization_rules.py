@@ -0,0 +1,108 @@
+"""
+Tests for categorization rule validation and the combined rule matcher.
+"""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from src.extensions import db
+from src.models import CategorizationRule
+from src.services.categorization_service import RuleMatcher
+from src.utils.rule_patterns import check_regex_pattern, has_nested_quantifier
+
+
+def make_rule(id, pattern, match_type='regex', priority=0, subcategory_id=1, min_amount=None, max_amount=None):
+    return SimpleNamespace(
+        id=id, pattern=pattern, match_type=match_type, priority=priority,
+        subcategory_id=subcategory_id, min_amount=min_amount, max_amount=max_amount
+    )
+
+
+@pytest.mark.parametrize('pattern', ['(?i)coffee', 'tea(?s)', r'\\(?i)x'])
+def test_inline_global_flags_are_rejected(pattern):
+    with pytest.raises(ValueError, match='Inline flags'):
+        check_regex_pattern(pattern)
+
+
+@pytest.mark.parametrize('pattern', ['(a+)+$', '(a*)*', '(?:ab|c+){2,}', '((x+)y)*', '(a{1,5})+'])
+def test_nested_quantifiers_are_rejected(pattern):
+    assert has_nested_quantifier(pattern)
+    with pytest.raises(ValueError, match='Repeated groups'):
+        check_regex_pattern(pattern)
+
+
+@pytest.mark.parametrize('pattern', [
+    r'^uber\s+trip', '(?i:coffee)', r'(\d{2})+', r'[(a+)]+', r'\(a+\)+', 'caf(e|é)s?', r'(ab)+c*', 'x{'
+])
+def test_safe_patterns_are_accepted(pattern):
+    assert not has_nested_quantifier(pattern)
+    check_regex_pattern(pattern)
+
+
+@pytest.mark.parametrize('pattern', ['(unclosed', '(?P<name>x)', r'(a)\1'])
+def test_invalid_or_clashing_patterns_are_rejected(pattern):
+    with pytest.raises(ValueError):
+        check_regex_pattern(pattern)
+
+
+def test_combined_matcher_picks_highest_precedence_rule():
+    matcher = RuleMatcher([
+        make_rule(1, 'coffee', match_type='contains', subcategory_id=10),
+        make_rule(2, r'^STARBUCKS\b', subcategory_id=20, priority=5),
+        make_rule(3, r'star', subcategory_id=30),
+    ])
+    assert matcher.match('Starbucks coffee #12').subcategory_id == 20
+    assert matcher.match('Morning coffee').subcategory_id == 10
+    assert matcher.match('Lone star bar').subcategory_id == 30
+    assert matcher.match('Groceries') is None
+
+
+def test_combined_matcher_respects_amount_bounds():
+    matcher = RuleMatcher([
+        make_rule(1, 'shell', match_type='contains', subcategory_id=10, priority=1, max_amount=-100),
+        make_rule(2, 'shell', match_type='contains', subcategory_id=20),
+    ])
+    assert matcher.match('Shell garage', -150).subcategory_id == 10
+    assert matcher.match('Shell garage', -20).subcategory_id == 20
+
+
+def test_matcher_falls_back_when_combined_expression_fails():
+    # Rules saved before validation covered the combined expression
+    matcher = RuleMatcher([
+        make_rule(1, '(?i)coffee', subcategory_id=10, priority=1),
+        make_rule(2, 'tea', subcategory_id=20),
+        make_rule(3, '(broken', subcategory_id=30),
+        make_rule(4, 'bakery', match_type='contains', subcategory_id=40),
+    ])
+    assert matcher.match('Coffee shop').subcategory_id == 10
+    assert matcher.match('Green tea').subcategory_id == 20
+    assert matcher.match('Corner bakery').subcategory_id == 40
+    assert matcher.match('(broken') is None
+
+
+def test_rejected_patterns_never_reach_the_matcher(client, user):
+    for pattern in ('(?i)coffee', '(a+)+$'):
+        response = client.post('/api/rules', headers=user.headers, json={
+            'subcategory_id': user.groceries_id, 'match_type': 'regex', 'pattern': pattern
+        })
+        assert response.status_code == 400
+        assert 'pattern' in response.get_json()['errors']
+    assert CategorizationRule.query.count() == 0
+
+
+def test_auto_categorization_survives_a_legacy_inline_flag_rule(client, user):
+    db.session.add_all([
+        CategorizationRule(user_id=user.id, subcategory_id=user.dining_id, match_type='regex', pattern='(?i)coffee'),
+        CategorizationRule(user_id=user.id, subcategory_id=user.groceries_id, match_type='regex', pattern='market'),
+    ])
+    db.session.commit()
+
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': -4.5, 'description': 'COFFEE bar', 'transaction_date': date.today().isoformat()
+    })
+    assert response.status_code == 201
+    assert response.get_json()['subcategory_id'] == user.dining_id
+    assert response.get_json()['auto_categorized'] is True
+
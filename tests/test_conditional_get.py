@@ -0,0 +1,125 @@
+"""
+Tests for ETag / If-None-Match handling backed by the per-user data version.
+"""
+
+import pytest
+
+from src.extensions import db
+from src.models import CategorizationRule, IncomeSource
+from src.services import TransactionService
+
+WATCHED = ('/api/dashboard', '/api/budget/budget', '/api/transactions', '/api/user/settings')
+
+
+def revalidate(client, user, path, etag):
+    return client.get(path, headers={**user.headers, 'If-None-Match': etag})
+
+
+def test_unchanged_data_answers_304(client, user):
+    response = client.get('/api/budget/budget', headers=user.headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    repeat = revalidate(client, user, '/api/budget/budget', etag)
+    assert repeat.status_code == 304
+    assert repeat.get_data() == b''
+    assert repeat.headers['ETag'] == etag
+    # The ETag is per URL
+    assert revalidate(client, user, '/api/budget/budget-periods', etag).status_code == 200
+
+
+def test_other_users_writes_keep_the_etag(client, user, make_user):
+    other = make_user()
+    etag = client.get('/api/budget/budget', headers=user.headers).headers['ETag']
+    TransactionService.create_transaction(other.id, -10, other.groceries_id, 'Theirs')
+    assert revalidate(client, user, '/api/budget/budget', etag).status_code == 304
+
+
+def existing_transaction(user):
+    return TransactionService.create_transaction(user.id, -10, user.groceries_id, 'Groceries').id
+
+
+def existing_income_source(user):
+    source = IncomeSource(name='Salary', amount=100, budget_id=user.budget_id)
+    db.session.add(source)
+    db.session.commit()
+    return source.id
+
+
+def existing_rule(user):
+    rule = CategorizationRule(user_id=user.id, subcategory_id=user.groceries_id, match_type='contains', pattern='shop')
+    db.session.add(rule)
+    db.session.commit()
+    return rule.id
+
+
+# (name, setup(user) -> state, request(client, user, state) -> response)
+MUTATIONS = [
+    ('create transaction', None, lambda client, user, _: client.post('/api/transactions', headers=user.headers, json={
+        'amount': -5, 'description': 'Tea', 'subcategory_id': user.dining_id
+    })),
+    ('update transaction', existing_transaction, lambda client, user, transaction_id: client.put(
+        f'/api/transactions/{transaction_id}', headers=user.headers, json={'amount': -11}
+    )),
+    ('delete transaction', existing_transaction, lambda client, user, transaction_id: client.delete(
+        f'/api/transactions/{transaction_id}', headers=user.headers
+    )),
+    ('batch', existing_transaction, lambda client, user, transaction_id: client.post(
+        '/api/transactions/batch', headers=user.headers,
+        json={'operations': [{'op': 'update', 'id': transaction_id, 'data': {'subcategory_id': user.dining_id}}]}
+    )),
+    ('update budget', None, lambda client, user, _: client.put('/api/budget/budget', headers=user.headers, json={
+        'balance_brought_forward': 25
+    })),
+    ('save allocations', None, lambda client, user, _: client.post('/api/budget/allocations', headers=user.headers, json={
+        'allocations': [{'subcategory_id': user.groceries_id, 'allocated': 200}]
+    })),
+    ('create income source', None, lambda client, user, _: client.post(
+        '/api/budget/income-sources', headers=user.headers, json={'name': 'Gift', 'amount': 50}
+    )),
+    ('update income source', existing_income_source, lambda client, user, source_id: client.put(
+        f'/api/budget/income-sources/{source_id}', headers=user.headers, json={'amount': 120}
+    )),
+    ('delete income source', existing_income_source, lambda client, user, source_id: client.delete(
+        f'/api/budget/income-sources/{source_id}', headers=user.headers
+    )),
+    ('create rule', None, lambda client, user, _: client.post('/api/rules', headers=user.headers, json={
+        'subcategory_id': user.groceries_id, 'match_type': 'contains', 'pattern': 'market'
+    })),
+    ('update rule', existing_rule, lambda client, user, rule_id: client.put(
+        f'/api/rules/{rule_id}', headers=user.headers, json={'pattern': 'store'}
+    )),
+    ('delete rule', existing_rule, lambda client, user, rule_id: client.delete(
+        f'/api/rules/{rule_id}', headers=user.headers
+    )),
+    ('update settings', None, lambda client, user, _: client.put('/api/user/settings', headers=user.headers, json={
+        'currency': 'EUR'
+    })),
+    ('create category', None, lambda client, user, _: client.post('/api/categories/categories', headers=user.headers, json={
+        'name': 'Travel'
+    })),
+    ('create recurring allocation', None, lambda client, user, _: client.post(
+        '/api/recurring-allocations', headers=user.headers, json={'allocated_amount': 40, 'subcategory_id': user.dining_id}
+    )),
+]
+
+
+@pytest.mark.parametrize('setup, mutate', [mutation[1:] for mutation in MUTATIONS], ids=[m[0] for m in MUTATIONS])
+def test_writes_invalidate_the_etag(client, user, setup, mutate):
+    state = setup(user) if setup else None
+    etags = {}
+    for path in WATCHED:
+        response = client.get(path, headers=user.headers)
+        assert response.status_code == 200
+        response.get_data()
+        etags[path] = response.headers['ETag']
+        assert revalidate(client, user, path, etags[path]).status_code == 304
+
+    response = mutate(client, user, state)
+    assert response.status_code in (200, 201), response.get_json()
+
+    for path in WATCHED:
+        response = revalidate(client, user, path, etags[path])
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etags[path]
@@ -0,0 +1,90 @@
+"""
+Tests for the composite dashboard endpoint.
+"""
+
+from datetime import date, timedelta
+
+from src.extensions import db
+from src.models import BudgetPeriod
+
+SECTIONS = {
+    'budget': '/api/budget/budget',
+    'categories': '/api/categories/categories',
+    'balance_check': '/api/budget/balance-check',
+    'overspending': '/api/budget/overspending-check',
+    'forecast': '/api/analytics/forecast',
+    'accounts_summary': '/api/accounts/balance-summary',
+    'settings': '/api/user/settings',
+}
+
+
+def get(client, user, path):
+    response = client.get(path, headers=user.headers)
+    return response.status_code, response.get_json()
+
+
+def seed(client, user):
+    responses = [
+        client.post('/api/budget/allocations', headers=user.headers, json={'allocations': [
+            {'subcategory_id': user.groceries_id, 'allocated': 300},
+            {'subcategory_id': user.dining_id, 'allocated': 40},
+        ]}),
+        client.post('/api/budget/income-sources', headers=user.headers, json={'name': 'Salary', 'amount': 1500}),
+        client.post('/api/accounts/', headers=user.headers, json={
+            'name': 'Cheque', 'account_type': 'checking', 'current_balance': 900
+        }),
+    ]
+    for amount, subcategory_id in ((-120, user.groceries_id), (-55, user.dining_id), (-10, user.dining_id)):
+        responses.append(client.post('/api/transactions', headers=user.headers, json={
+            'amount': amount, 'description': 'Spend', 'subcategory_id': subcategory_id
+        }))
+    assert all(response.status_code in (200, 201) for response in responses), [r.get_json() for r in responses]
+
+
+def test_dashboard_sections_match_their_endpoints(client, user):
+    seed(client, user)
+    status, dashboard = get(client, user, '/api/dashboard')
+    assert status == 200
+    assert set(dashboard) == set(SECTIONS)
+    for section, path in SECTIONS.items():
+        status, body = get(client, user, path)
+        assert status == 200, path
+        assert dashboard[section] == body, section
+
+    assert dashboard['budget']['total_spent'] == 185
+    assert [item['subcategory_name'] for item in dashboard['overspending']['overspent_categories']] == ['Dining']
+    assert dashboard['accounts_summary']['total_accounts_balance'] == 900
+
+
+def test_dashboard_without_an_active_budget(client, user):
+    period = db.session.get(BudgetPeriod, user.period_id)
+    period.is_active = False
+    db.session.commit()
+
+    status, dashboard = get(client, user, '/api/dashboard')
+    assert status == 200
+    assert (dashboard['budget'], dashboard['balance_check'], dashboard['overspending'], dashboard['forecast']) == (
+        None, None, None, None
+    )
+    assert dashboard['categories'] == get(client, user, '/api/categories/categories')[1]
+    assert dashboard['settings'] == get(client, user, '/api/user/settings')[1]
+    assert dashboard['accounts_summary'] == get(client, user, '/api/accounts/balance-summary')[1]
+
+
+def test_dashboard_query_count_does_not_grow_with_the_budget(client, user, add_allocations, count_queries):
+    def measure():
+        db.session.expire_all()
+        with count_queries() as statements:
+            assert client.get('/api/dashboard', headers=user.headers).status_code == 200
+        return len(statements)
+
+    seed(client, user)
+    measure()
+    small = measure()
+    add_allocations(40)
+    for day in range(10):
+        client.post('/api/transactions', headers=user.headers, json={
+            'amount': -day - 1, 'description': f'Extra {day}', 'subcategory_id': user.dining_id
+        })
+    measure()
+    assert measure() == small
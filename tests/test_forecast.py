@@ -0,0 +1,126 @@
+"""
+Tests for the end-of-period spending forecast.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.extensions import db
+from src.models import BudgetAllocation, BudgetPeriod, Transaction
+from src.services import ForecastService, TransactionArchiveService
+from src.utils.data_version import bump_data_version
+
+# A four week period starting on a Monday, forecast from the end of its second week
+START = date(2025, 3, 3)
+END = START + timedelta(days=27)
+TODAY = START + timedelta(days=13)
+
+
+@pytest.fixture
+def planner(make_user):
+    return make_user(start_date=START, end_date=END)
+
+
+def spend(user, subcategory_id, amount, day):
+    db.session.add(Transaction(
+        amount=-amount, description='Entry', user_id=user.id, subcategory_id=subcategory_id,
+        transaction_date=datetime.combine(day, time(12))
+    ))
+
+
+def allocate(user, allocations):
+    db.session.add_all([
+        BudgetAllocation(allocated_amount=amount, subcategory_id=subcategory_id, budget_id=user.budget_id)
+        for subcategory_id, amount in allocations.items()
+    ])
+
+
+def by_name(forecast):
+    return {entry['name']: entry for entry in forecast['subcategories']}
+
+
+def test_linear_projection_without_enough_history(planner):
+    allocate(planner, {planner.groceries_id: 200, planner.dining_id: 300})
+    for offset in range(10):
+        spend(planner, planner.groceries_id, 10, START + timedelta(days=offset))
+    db.session.commit()
+
+    forecast = ForecastService.get_period_forecast(planner.id, today=START + timedelta(days=9))
+    assert (forecast['period_days'], forecast['days_elapsed'], forecast['days_remaining']) == (28, 10, 18)
+
+    groceries = by_name(forecast)['Groceries']
+    assert groceries['spent'] == 100
+    assert groceries['projections'] == {'burn_rate': 280, 'linear': 280, 'seasonal': None}
+    assert (groceries['forecast'], groceries['projected_overspend'], groceries['at_risk']) == (280, 80, True)
+    dining = by_name(forecast)['Dining']
+    assert (dining['spent'], dining['forecast'], dining['at_risk']) == (0, 0, False)
+    assert forecast['at_risk_count'] == 1
+    assert [entry['name'] for entry in forecast['subcategories']] == ['Groceries', 'Dining']
+    assert forecast['totals'] == {
+        'allocated': 500, 'spent': 100,
+        'projections': {'burn_rate': 280, 'linear': 280, 'seasonal': None}, 'forecast': 280
+    }
+
+
+def test_seasonal_projection_follows_weekday_history(planner):
+    # Dining every Monday for eight weeks before the period and in its first two weeks
+    for week in range(-8, 2):
+        spend(planner, planner.dining_id, 7, START + timedelta(weeks=week))
+    for offset in range(14):
+        spend(planner, planner.groceries_id, 10, START + timedelta(days=offset))
+    db.session.commit()
+
+    forecast = ForecastService.get_period_forecast(planner.id, today=TODAY)
+    dining, groceries = by_name(forecast)['Dining'], by_name(forecast)['Groceries']
+    # Two Mondays remain, at the 7.00 averaged over the ten Mondays seen
+    assert dining['projections']['seasonal'] == 28
+    assert dining['forecast'] == 28
+    # Groceries only spent in two of the ten weeks: 2.00 per remaining day
+    assert groceries['projections']['seasonal'] == 168
+    assert groceries['projections']['burn_rate'] == 280
+    assert groceries['forecast'] == 168
+
+
+def test_forecast_includes_archived_spending(planner):
+    for offset in range(5):
+        spend(planner, planner.groceries_id, 4, START + timedelta(days=offset))
+    db.session.commit()
+    before = ForecastService.get_period_forecast(planner.id, today=TODAY)
+
+    assert TransactionArchiveService.archive_user(planner.id, START + timedelta(days=10)) == 5
+    db.session.commit()
+    after = ForecastService.get_period_forecast(planner.id, today=TODAY)
+    assert after['subcategories'] == before['subcategories']
+    assert after['totals']['spent'] == 20
+
+
+def test_forecast_before_the_period_starts(planner):
+    allocate(planner, {planner.groceries_id: 50})
+    db.session.commit()
+
+    forecast = ForecastService.get_period_forecast(planner.id, today=START - timedelta(days=3))
+    assert (forecast['days_elapsed'], forecast['days_remaining']) == (0, 28)
+    assert forecast['totals']['projections'] == {'burn_rate': None, 'linear': None, 'seasonal': None}
+    assert [(entry['name'], entry['forecast'], entry['at_risk']) for entry in forecast['subcategories']] == [
+        ('Groceries', 0, False)
+    ]
+
+
+def test_forecast_endpoint(client, user):
+    allocate(user, {user.groceries_id: 10})
+    db.session.commit()
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': -60, 'description': 'Shop', 'subcategory_id': user.groceries_id
+    })
+    assert response.status_code == 201
+
+    body = client.get('/api/analytics/forecast', headers=user.headers).get_json()
+    assert body == ForecastService.get_period_forecast(user.id)
+    assert body['as_of'] == date.today().isoformat()
+    assert by_name(body)['Groceries']['at_risk']
+
+    db.session.get(BudgetPeriod, user.period_id).is_active = False
+    bump_data_version(user.id)
+    db.session.commit()
+    assert client.get('/api/analytics/forecast', headers=user.headers).status_code == 404
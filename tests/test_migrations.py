@@ -0,0 +1,20 @@
+"""
+Tests for the Alembic migration scripts.
+"""
+
+from pathlib import Path
+
+from alembic.script import ScriptDirectory
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / 'migrations'
+
+
+def test_revision_ids_fit_the_version_column():
+    # alembic_version.version_num is VARCHAR(32); PostgreSQL rejects longer IDs
+    scripts = ScriptDirectory(str(MIGRATIONS))
+    too_long = [script.revision for script in scripts.walk_revisions() if len(script.revision) > 32]
+    assert too_long == []
+
+
+def test_migrations_form_a_single_chain():
+    assert len(ScriptDirectory(str(MIGRATIONS)).get_heads()) == 1
@@ -0,0 +1,108 @@
+"""
+Tests for the multi-period budget-vs-actual comparison report.
+"""
+
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from src.extensions import db
+from src.models import Budget, BudgetAllocation, BudgetPeriod, Transaction
+from src.services import SpendingRollupService
+
+
+def add_period(user, name, start_date, end_date, income=0):
+    period = BudgetPeriod(name=name, period_type='monthly', user_id=user.id, start_date=start_date, end_date=end_date)
+    db.session.add(period)
+    db.session.flush()
+    budget = Budget(period_id=period.id, user_id=user.id, total_income=income)
+    db.session.add(budget)
+    db.session.flush()
+    return period, budget
+
+
+def fill(user, period, budget_id, allocations, amounts):
+    db.session.add_all([
+        BudgetAllocation(allocated_amount=allocated, subcategory_id=subcategory_id, budget_id=budget_id)
+        for subcategory_id, allocated in allocations.items()
+    ])
+    db.session.add_all([
+        Transaction(amount=amount, description='Entry', user_id=user.id, subcategory_id=subcategory_id,
+                    transaction_date=datetime.combine(period.start_date + timedelta(days=1), time(12)))
+        for subcategory_id, amount in amounts
+    ])
+
+
+def compare(client, user, **params):
+    response = client.get('/api/analytics/periods', headers=user.headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def history(user):
+    """Two earlier periods, the current one and a future one."""
+    current = db.session.get(BudgetPeriod, user.period_id)
+    day = timedelta(days=1)
+    older, older_budget = add_period(user, 'Older', current.start_date - 60 * day, current.start_date - 31 * day, 900)
+    previous, previous_budget = add_period(user, 'Previous', current.start_date - 30 * day, current.start_date - day)
+    future, future_budget = add_period(user, 'Future', current.end_date + day, current.end_date + 30 * day)
+
+    fill(user, older, older_budget.id, {user.groceries_id: 100}, [(user.groceries_id, -40)])
+    fill(user, previous, previous_budget.id, {user.groceries_id: 120, user.dining_id: 30},
+         [(user.groceries_id, -130), (user.dining_id, -10), (user.dining_id, 25)])
+    fill(user, current, user.budget_id, {user.dining_id: 50}, [(user.groceries_id, -5)])
+    fill(user, future, future_budget.id, {user.dining_id: 999}, [])
+    db.session.commit()
+    SpendingRollupService.rebuild_all()
+    return [older.id, previous.id, current.id]
+
+
+def test_comparison_aligns_subcategories_with_started_periods(client, user, history):
+    body = compare(client, user)
+
+    assert [period['id'] for period in body['periods']] == history
+    assert [period['is_active'] for period in body['periods']] == [False, False, True]
+    assert body['periods'][0]['total_income'] == 900
+
+    by_name = {entry['name']: entry for entry in body['subcategories']}
+    assert [entry['name'] for entry in body['subcategories']] == ['Dining', 'Groceries']
+    assert by_name['Groceries']['allocated'] == [100, 120, 0]
+    assert by_name['Groceries']['spent'] == [40, 130, 5]
+    assert by_name['Dining']['allocated'] == [0, 30, 50]
+    assert by_name['Dining']['spent'] == [0, 10, 0]
+    assert by_name['Dining']['income'] == [0, 25, 0]
+    assert by_name['Dining']['category_name'] == 'Food'
+    assert body['totals'] == {'allocated': [100, 150, 50], 'spent': [40, 140, 5], 'income': [0, 25, 0]}
+
+
+def test_comparison_limits_to_the_last_n_periods(client, user, history):
+    body = compare(client, user, last=2)
+    assert [period['id'] for period in body['periods']] == history[1:]
+    assert body['totals']['allocated'] == [150, 50]
+
+
+def test_comparison_reflects_new_spending(client, user, history):
+    assert compare(client, user)['totals']['spent'][-1] == 5
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': -20, 'description': 'Lunch', 'subcategory_id': user.dining_id
+    })
+    assert response.status_code == 201
+    assert compare(client, user)['totals']['spent'][-1] == 25
+
+
+def test_comparison_query_count_does_not_grow_with_periods(client, user, history, count_queries):
+    def measure(last):
+        db.session.expire_all()
+        with count_queries() as statements:
+            compare(client, user, last=last)
+        return len(statements)
+
+    assert measure(1) == measure(3)
+
+
+def test_comparison_validates_last(client, user):
+    for last in (0, 37, 'all'):
+        response = client.get('/api/analytics/periods', headers=user.headers, query_string={'last': last})
+        assert response.status_code == 400, last
+    assert compare(client, user, last=36)['periods'][0]['id'] == user.period_id
@@ -0,0 +1,97 @@
+"""
+Tests for snapshotting the figures of closed budget periods.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.models import PeriodSnapshot, PeriodSnapshotLine
+
+
+@pytest.fixture
+def spent_period(client, user):
+    """The user's active period with allocations and some spending (groceries 30 of 200, dining 60 of 50)."""
+    client.post('/api/budget/allocations', headers=user.headers, json={'allocations': [
+        {'subcategory_id': user.groceries_id, 'allocated': 200},
+        {'subcategory_id': user.dining_id, 'allocated': 50},
+    ]})
+    ids = {}
+    for name, amount, subcategory_id in (('Market', -30, user.groceries_id), ('Dinner', -60, user.dining_id)):
+        response = client.post('/api/transactions', headers=user.headers, json={
+            'amount': amount, 'description': name, 'subcategory_id': subcategory_id
+        })
+        ids[name] = response.get_json()['id']
+    return ids
+
+
+def summary(client, user, period_id):
+    response = client.get(f'/api/budget/budget-periods/{period_id}/summary', headers=user.headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def figures(body):
+    return (
+        {key: body[key] for key in ('total_income', 'total_allocated', 'total_spent', 'carry_forward')},
+        {line['name']: (line['allocated'], line['spent'], line['remaining']) for line in body['subcategories']}
+    )
+
+
+def start_next_period(client, user):
+    start = date.today() + timedelta(days=16)
+    response = client.post('/api/budget/budget-periods', headers=user.headers, json={
+        'name': 'Next', 'period_type': 'monthly',
+        'start_date': start.isoformat(), 'end_date': (start + timedelta(days=29)).isoformat()
+    })
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+EXPECTED = (
+    {'total_income': 1000, 'total_allocated': 250, 'total_spent': 90, 'carry_forward': 910},
+    {'Dining': (50, 60, -10), 'Groceries': (200, 30, 170)},
+)
+
+
+def test_closing_a_period_snapshots_its_figures(client, user, spent_period):
+    live = summary(client, user, user.period_id)
+    assert live['closed'] is False and live['closed_at'] is None
+    assert figures(live) == EXPECTED
+    assert PeriodSnapshot.query.count() == 0
+
+    next_id = start_next_period(client, user)
+    closed = summary(client, user, user.period_id)
+    assert closed['closed'] is True and closed['closed_at']
+    assert figures(closed) == EXPECTED
+    assert PeriodSnapshotLine.query.filter_by(budget_period_id=user.period_id).count() == 2
+    assert summary(client, user, next_id)['closed'] is False
+
+    # A late edit in the closed period rebuilds its snapshot
+    response = client.put(f'/api/transactions/{spent_period["Dinner"]}', headers=user.headers, json={'amount': -20})
+    assert response.status_code == 200
+    totals, lines = figures(summary(client, user, user.period_id))
+    assert (totals['total_spent'], totals['carry_forward']) == (50, 950)
+    assert lines['Dining'] == (50, 20, 30)
+
+    # Re-opening the period discards its snapshot and closes the other one
+    response = client.post(f'/api/budget/budget-periods/{user.period_id}/activate', headers=user.headers)
+    assert response.status_code == 200
+    reopened = summary(client, user, user.period_id)
+    assert reopened['closed'] is False
+    assert PeriodSnapshot.query.filter_by(budget_period_id=user.period_id).count() == 0
+    assert PeriodSnapshotLine.query.filter_by(budget_period_id=user.period_id).count() == 0
+    assert summary(client, user, next_id)['closed'] is True
+
+
+def test_reset_discards_snapshots(client, user, make_user, spent_period):
+    other = make_user()
+    start_next_period(client, user)
+    start_next_period(client, other)
+    assert PeriodSnapshot.query.count() == 2
+
+    assert client.post('/api/user/reset-data', headers=user.headers).status_code == 200
+    assert PeriodSnapshot.query.filter_by(user_id=user.id).count() == 0
+    assert PeriodSnapshotLine.query.filter_by(budget_period_id=user.period_id).count() == 0
+    assert PeriodSnapshot.query.filter_by(user_id=other.id).count() == 1
+    assert client.get(f'/api/budget/budget-periods/{user.period_id}/summary', headers=user.headers).status_code == 404
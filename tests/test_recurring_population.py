@@ -0,0 +1,125 @@
+"""
+Tests for populating budgets from recurring income sources and allocations.
+"""
+
+from datetime import date, timedelta
+
+from src.extensions import db
+from src.models import (
+    Budget, BudgetAllocation, BudgetPeriod, IncomeSource, RecurringBudgetAllocation, RecurringIncomeSource, User
+)
+from src.utils.budget import populate_budgets_from_recurring
+
+
+def add_templates(user, subcategory_ids=(), period_type='monthly', amount=50, is_active=True):
+    sources = [
+        RecurringIncomeSource(name=f'Salary {period_type}', amount=amount * 10, user_id=user.id,
+                              period_type=period_type, is_active=is_active)
+    ]
+    allocations = [
+        RecurringBudgetAllocation(allocated_amount=amount, subcategory_id=subcategory_id, user_id=user.id,
+                                  period_type=period_type, is_active=is_active)
+        for subcategory_id in subcategory_ids
+    ]
+    db.session.add_all(sources + allocations)
+    db.session.commit()
+    return [source.id for source in sources], [allocation.id for allocation in allocations]
+
+
+def populate(client, user):
+    return client.post('/api/populate-current-budget', headers=user.headers)
+
+
+def budget_rows(budget_id):
+    return (
+        sorted((row.name, row.amount, row.recurring_source_id) for row in IncomeSource.query.filter_by(budget_id=budget_id)),
+        sorted((row.subcategory_id, row.allocated_amount, row.recurring_allocation_id)
+               for row in BudgetAllocation.query.filter_by(budget_id=budget_id)),
+    )
+
+
+def test_population_copies_matching_active_templates(client, user, assert_aggregates_consistent):
+    [salary], [groceries, dining] = add_templates(user, [user.groceries_id, user.dining_id])
+    add_templates(user, [user.groceries_id], period_type='yearly', amount=999)
+    add_templates(user, [user.dining_id], amount=7, is_active=False)
+
+    assert populate(client, user).status_code == 200
+
+    sources, allocations = budget_rows(user.budget_id)
+    assert sources == [('Salary monthly', 500, salary)]
+    assert allocations == sorted([(user.groceries_id, 50, groceries), (user.dining_id, 50, dining)])
+    budget = db.session.get(Budget, user.budget_id)
+    assert (budget.total_income, budget.total_allocated) == (500, 100)
+    assert all(row.is_recurring_source for row in IncomeSource.query.filter_by(budget_id=user.budget_id))
+    assert all(row.is_recurring_allocation for row in BudgetAllocation.query.filter_by(budget_id=user.budget_id))
+    assert_aggregates_consistent()
+
+
+def test_population_is_idempotent(client, user, count_queries):
+    add_templates(user, [user.groceries_id, user.dining_id])
+    assert populate(client, user).status_code == 200
+    before = budget_rows(user.budget_id)
+    version = db.session.get(User, user.id).data_version
+
+    with count_queries() as statements:
+        assert populate(client, user).status_code == 200
+    assert budget_rows(user.budget_id) == before
+    db.session.expire_all()
+    assert db.session.get(User, user.id).data_version == version
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith(('UPDATE', 'DELETE'))]
+    assert populate_budgets_from_recurring([user.budget_id]) == 0
+
+
+def test_population_fills_in_missing_items_and_keeps_existing_amounts(client, user):
+    db.session.add(BudgetAllocation(allocated_amount=80, subcategory_id=user.groceries_id, budget_id=user.budget_id))
+    db.session.commit()
+    # Two templates for one subcategory: the lowest ID wins
+    _, [first_dining, groceries] = add_templates(user, [user.dining_id, user.groceries_id], amount=30)
+    add_templates(user, [user.dining_id], amount=60)
+
+    assert populate(client, user).status_code == 200
+
+    _, allocations = budget_rows(user.budget_id)
+    assert allocations == sorted([(user.groceries_id, 80, None), (user.dining_id, 30, first_dining)])
+    assert groceries not in [allocation[2] for allocation in allocations]
+
+
+def test_population_runs_a_fixed_number_of_statements(user, make_user, count_queries):
+    def measure(target, count):
+        add_templates(target, [])
+        extra = [
+            RecurringBudgetAllocation(allocated_amount=5, subcategory_id=subcategory_id, user_id=target.id)
+            for subcategory_id in [target.groceries_id, target.dining_id][:count]
+        ]
+        db.session.add_all(extra)
+        db.session.commit()
+        with count_queries() as statements:
+            added = populate_budgets_from_recurring([target.budget_id])
+        db.session.commit()
+        return added, len(statements)
+
+    assert measure(user, 1)[0] == 2
+    other = make_user()
+    added, count = measure(other, 2)
+    assert added == 3
+    assert count == measure(make_user(), 1)[1]
+
+
+def test_bulk_population_honours_each_budgets_period_type(user, make_user):
+    today = date.today()
+    yearly = make_user(start_date=today - timedelta(days=100), end_date=today + timedelta(days=264), period_type='yearly')
+    add_templates(user, [user.groceries_id])
+    add_templates(yearly, [yearly.groceries_id])
+    add_templates(yearly, [yearly.dining_id], period_type='yearly')
+
+    assert populate_budgets_from_recurring([user.budget_id, yearly.budget_id]) == 4
+    db.session.commit()
+    assert [row[0] for row in budget_rows(user.budget_id)[1]] == [user.groceries_id]
+    assert [row[0] for row in budget_rows(yearly.budget_id)[1]] == [yearly.dining_id]
+    assert populate_budgets_from_recurring([]) == 0
+
+
+def test_population_without_an_active_budget(client, user):
+    db.session.get(BudgetPeriod, user.period_id).is_active = False
+    db.session.commit()
+    assert populate(client, user).status_code == 404
@@ -0,0 +1,140 @@
+"""
+Tests for the scheduled budget period rollover job.
+"""
+
+from datetime import date, datetime, time
+
+import pytest
+
+from src.extensions import db
+from src.models import (
+    Budget, BudgetAllocation, BudgetPeriod, IncomeSource, RecurringBudgetAllocation, RecurringIncomeSource
+)
+from src.services import BudgetRolloverService, TransactionService
+from src.utils.budget import check_budget_totals, refresh_budget_totals
+
+TODAY = date(2030, 4, 10)
+
+
+def allocate(user, amounts):
+    db.session.add_all([
+        BudgetAllocation(allocated_amount=amount, subcategory_id=subcategory_id, budget_id=user.budget_id)
+        for subcategory_id, amount in amounts.items()
+    ])
+    refresh_budget_totals([user.budget_id])
+    db.session.commit()
+
+
+def spend(user, subcategory_id, amount, day):
+    TransactionService.create_transaction(
+        user.id, -amount, subcategory_id, 'Shop', transaction_date=datetime.combine(day, time.min)
+    )
+
+
+def budgets_by_period(user_id):
+    return db.session.query(BudgetPeriod, Budget).join(
+        Budget, Budget.period_id == BudgetPeriod.id
+    ).filter(BudgetPeriod.user_id == user_id).order_by(BudgetPeriod.start_date).all()
+
+
+def allocations(budget_id):
+    return {
+        allocation.subcategory_id: allocation
+        for allocation in BudgetAllocation.query.filter_by(budget_id=budget_id)
+    }
+
+
+@pytest.fixture
+def behind(make_user):
+    """A user last active in January, with recurring salary and groceries, and spending in January and February."""
+    account = make_user(date(2030, 1, 1), date(2030, 1, 31))
+    allocate(account, {account.groceries_id: 300, account.dining_id: 100})
+    db.session.add_all([
+        RecurringIncomeSource(name='Salary', amount=1200, user_id=account.id, period_type='monthly'),
+        RecurringIncomeSource(name='Bonus', amount=5000, user_id=account.id, period_type='yearly'),
+        RecurringBudgetAllocation(allocated_amount=250, subcategory_id=account.groceries_id, user_id=account.id),
+    ])
+    db.session.commit()
+    spend(account, account.groceries_id, 200, date(2030, 1, 15))
+    spend(account, account.dining_id, 150, date(2030, 1, 20))
+    # Already recorded when the job runs, dated inside the February period it creates
+    spend(account, account.groceries_id, 50, date(2030, 2, 5))
+    return account
+
+
+def test_rollover_catches_up_and_carries_envelopes(make_user, behind):
+    one_behind = make_user(date(2030, 3, 1), date(2030, 3, 31), total_income=500)
+    spend(one_behind, one_behind.dining_id, 120, date(2030, 3, 3))
+    # Its next period would collide with an existing monthly period
+    blocked = make_user(date(2030, 3, 1), date(2030, 3, 31))
+    db.session.add(BudgetPeriod(
+        name='Holiday', period_type='monthly', user_id=blocked.id,
+        start_date=date(2030, 4, 5), end_date=date(2030, 4, 20)
+    ))
+    db.session.commit()
+    current = make_user(date(2030, 4, 1), date(2030, 4, 30))
+
+    result = BudgetRolloverService.rollover_all(today=TODAY, carry_envelopes=True)
+    assert result == {'periods': 4, 'skipped': 1}
+
+    rows = budgets_by_period(behind.id)
+    assert [period.name for period, _ in rows] == ['Current', 'February 2030', 'March 2030', 'April 2030']
+    assert [(period.start_date, period.end_date) for period, _ in rows[1:]] == [
+        (date(2030, 2, 1), date(2030, 2, 28)),
+        (date(2030, 3, 1), date(2030, 3, 31)),
+        (date(2030, 4, 1), date(2030, 4, 30)),
+    ]
+    # January: 1000 - 350 spent; February: 1200 + 650 - 50; March: 1200 + 1800
+    assert [budget.balance_brought_forward for _, budget in rows[1:]] == [650, 1800, 3000]
+    assert [budget.total_spent for _, budget in rows] == [350, 50, 0, 0]
+    for _, budget in rows[1:]:
+        sources = IncomeSource.query.filter_by(budget_id=budget.id).all()
+        assert [(source.name, source.amount, source.is_recurring_source) for source in sources] == [
+            ('Salary', 1200, True)
+        ]
+        assert budget.total_income == 1200
+    # Groceries: recurring 250 plus the unspent envelope (January 100, February 300, March 550);
+    # the overspent dining envelope is not carried
+    groceries = [allocations(budget.id)[behind.groceries_id] for _, budget in rows[1:]]
+    assert [allocation.allocated_amount for allocation in groceries] == [350, 550, 800]
+    assert all(allocation.is_recurring_allocation for allocation in groceries)
+    assert all(behind.dining_id not in allocations(budget.id) for _, budget in rows[1:])
+
+    rows = budgets_by_period(one_behind.id)
+    assert [period.name for period, _ in rows] == ['Current', 'April 2030']
+    assert rows[1][1].balance_brought_forward == 380
+    assert allocations(rows[1][1].id) == {}
+
+    rows = budgets_by_period(blocked.id)
+    assert [(period.name, period.is_active) for period, _ in rows] == [('Current', True)]
+    assert BudgetPeriod.query.filter_by(user_id=blocked.id).count() == 2
+
+    for account in (behind, one_behind, blocked, current):
+        active = BudgetPeriod.query.filter_by(user_id=account.id, is_active=True).all()
+        assert len(active) == 1
+    assert BudgetPeriod.query.filter_by(user_id=current.id).count() == 1
+    assert check_budget_totals() == []
+
+    # Nothing left to roll over
+    assert BudgetRolloverService.rollover_all(today=TODAY) == {'periods': 0, 'skipped': 1}
+
+
+def test_rollover_without_envelopes_uses_recurring_amounts(behind):
+    assert BudgetRolloverService.rollover_all(today=TODAY, user_id=behind.id) == {'periods': 3, 'skipped': 0}
+    for _, budget in budgets_by_period(behind.id)[1:]:
+        assert {
+            subcategory_id: allocation.allocated_amount
+            for subcategory_id, allocation in allocations(budget.id).items()
+        } == {behind.groceries_id: 250}
+    assert check_budget_totals() == []
+
+
+def test_rollover_chunks_users(make_user, monkeypatch):
+    monkeypatch.setattr(BudgetRolloverService, 'CHUNK_SIZE', 2)
+    accounts = [make_user(date(2030, 2, 1), date(2030, 2, 28), total_income=100 * index) for index in range(1, 6)]
+    assert BudgetRolloverService.rollover_all(today=TODAY) == {'periods': 10, 'skipped': 0}
+    for index, account in enumerate(accounts, start=1):
+        rows = budgets_by_period(account.id)
+        assert [period.name for period, _ in rows] == ['Current', 'March 2030', 'April 2030']
+        assert [budget.balance_brought_forward for _, budget in rows[1:]] == [100 * index] * 2
+        assert [period.is_active for period, _ in rows] == [False, False, True]
@@ -0,0 +1,95 @@
+"""
+Tests for the shared spending aggregator.
+"""
+
+import io
+from datetime import datetime, time, timedelta
+
+import pytest
+from openpyxl import load_workbook
+
+from src.extensions import db
+from src.models import BudgetPeriod, Transaction, User
+from src.services import SpendingAggregator, SpendingRollupService
+from src.utils.currency import get_currency_symbol
+
+
+@pytest.fixture
+def period(user):
+    return db.session.get(BudgetPeriod, user.period_id)
+
+
+def add(user, amount, when, subcategory_id=None):
+    db.session.add(Transaction(
+        amount=amount, description='Entry', user_id=user.id,
+        subcategory_id=subcategory_id or user.groceries_id, transaction_date=when
+    ))
+    db.session.commit()
+
+
+def test_split_amount():
+    assert SpendingAggregator.split_amount(-12.5) == (12.5, 0, 1, 0)
+    assert SpendingAggregator.split_amount(40) == (0, 40, 0, 1)
+    assert SpendingAggregator.split_amount(0) == (0, 0, 0, 0)
+
+
+def test_range_totals_separates_spent_from_income(user, period):
+    midday = datetime.combine(period.start_date, time(12))
+    add(user, -30, midday)
+    add(user, -20, midday)
+    add(user, 100, midday)
+    add(user, -5, midday, subcategory_id=user.dining_id)
+    add(user, 0, midday, subcategory_id=user.dining_id)
+
+    totals = SpendingAggregator.range_totals(user.id)
+    assert totals[user.groceries_id] == {
+        'spent_total': 50, 'income_total': 100, 'spent_count': 2, 'income_count': 1, 'net_total': 50
+    }
+    assert totals[user.dining_id]['spent_total'] == 5
+    assert totals[user.dining_id]['spent_count'] == 1
+
+    assert SpendingAggregator.range_totals(user.id, sign='expense')[user.groceries_id]['income_total'] == 0
+    assert set(SpendingAggregator.range_totals(user.id, sign='income')) == {user.groceries_id}
+    assert SpendingAggregator.summarize(totals) == {
+        'spent_total': 55, 'income_total': 100, 'spent_count': 3, 'income_count': 1, 'net_total': 45
+    }
+
+
+def test_range_totals_includes_the_whole_last_day(user, period):
+    add(user, -1, datetime.combine(period.start_date, time.min) - timedelta(seconds=1))
+    add(user, -2, datetime.combine(period.start_date, time.min))
+    add(user, -4, datetime.combine(period.end_date, time(23, 59, 59)))
+    add(user, -8, datetime.combine(period.end_date + timedelta(days=1), time.min))
+
+    totals = SpendingAggregator.range_totals(user.id, period.start_date, period.end_date)
+    assert totals[user.groceries_id]['spent_total'] == 6
+
+
+def test_period_totals_agree_with_range_totals(user, period, make_user):
+    other = make_user()
+    for day, amount in ((0, -10), (3, -15), (3, 60)):
+        add(user, amount, datetime.combine(period.start_date + timedelta(days=day), time(23, 30)))
+    add(user, -99, datetime.combine(period.end_date + timedelta(days=1), time(0, 30)))
+    add(other, -7, datetime.combine(period.start_date, time(12)))
+    SpendingRollupService.rebuild_all()
+
+    period_totals = SpendingAggregator.period_totals(user.id, period.id)
+    assert period_totals == SpendingAggregator.range_totals(user.id, period.start_date, period.end_date)
+    assert SpendingAggregator.period_summary(user.id, period.id) == SpendingAggregator.summarize(period_totals)
+    assert SpendingAggregator.period_summary(user.id, period.id)['spent_total'] == 25
+
+
+def test_export_reports_spending_as_a_positive_amount(client, user, period):
+    client.post('/api/budget/income-sources', headers=user.headers, json={'name': 'Salary', 'amount': 500})
+    midday = datetime.combine(period.start_date, time(12))
+    for amount in (-40, -35, 200):
+        add(user, amount, midday)
+    SpendingRollupService.rebuild_all()
+
+    response = client.get('/api/user/export-data', headers=user.headers)
+    assert response.status_code == 200
+    symbol = get_currency_symbol(db.session.get(User, user.id).currency)
+    summary = [row[0] for row in load_workbook(io.BytesIO(response.data))['Summary'].iter_rows(values_only=True)]
+    for line in ('Total Spent: ', 'Total Spent (All Time): ', 'Spent This Period: '):
+        assert f'{line}{symbol}75.00' in summary, line
+    assert 'Transactions This Period: 3' in summary
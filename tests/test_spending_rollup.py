@@ -0,0 +1,111 @@
+"""
+Tests for the incrementally maintained spending rollup and budget totals.
+"""
+
+import io
+from datetime import date, timedelta
+
+from src.extensions import db
+from src.models import Budget, BudgetPeriod, SpendingRollup
+from src.services import BudgetRolloverService, TransactionArchiveService
+
+
+def add_previous_period(user):
+    """An inactive period ending the day before the user's active one starts."""
+    current = db.session.get(BudgetPeriod, user.period_id)
+    previous = BudgetPeriod(
+        name='Previous', period_type='monthly', user_id=user.id,
+        start_date=current.start_date - timedelta(days=30), end_date=current.start_date - timedelta(days=1)
+    )
+    db.session.add(previous)
+    db.session.flush()
+    db.session.add(Budget(period_id=previous.id, user_id=user.id))
+    db.session.commit()
+    return previous.id, previous.start_date
+
+
+def test_every_write_path_keeps_rollup_and_totals_exact(client, user, make_user, assert_aggregates_consistent):
+    other = make_user()
+    previous_id, previous_start = add_previous_period(user)
+    last_month = (previous_start + timedelta(days=5)).isoformat()
+    today = date.today().isoformat()
+
+    def create(amount, subcategory_id):
+        response = client.post('/api/transactions', headers=user.headers, json={
+            'amount': amount, 'description': f'Item {amount}', 'subcategory_id': subcategory_id
+        })
+        assert response.status_code == 201
+        return response.get_json()['id']
+
+    def update(transaction_id, **data):
+        assert client.put(f'/api/transactions/{transaction_id}', headers=user.headers, json=data).status_code == 200
+
+    first = create(-25, user.groceries_id)
+    second = create(-40, user.dining_id)
+    third = create(-15, user.groceries_id)
+    client.post('/api/transactions', headers=other.headers, json={
+        'amount': -99, 'description': 'Theirs', 'subcategory_id': other.groceries_id
+    })
+    assert_aggregates_consistent()
+
+    update(first, subcategory_id=user.dining_id)
+    assert_aggregates_consistent()
+    update(second, transaction_date=last_month)
+    assert_aggregates_consistent()
+    update(third, amount=-18, subcategory_id=user.dining_id, transaction_date=last_month)
+    assert_aggregates_consistent()
+    update(second, transaction_date=today, amount=-41)
+    assert_aggregates_consistent()
+
+    assert client.delete(f'/api/transactions/{first}', headers=user.headers).status_code == 200
+    assert_aggregates_consistent()
+
+    response = client.post('/api/transactions/batch', headers=user.headers, json={'operations': [
+        {'op': 'create', 'data': {'amount': -12, 'subcategory_id': user.groceries_id, 'transaction_date': last_month}},
+        {'op': 'update', 'id': second, 'data': {'subcategory_id': user.groceries_id}},
+        {'op': 'delete', 'id': third},
+    ]})
+    assert response.status_code == 200
+    assert_aggregates_consistent()
+
+    future = (date.today() + timedelta(days=20)).isoformat()
+    statement = '\n'.join([
+        'Date,Description,Amount,Category',
+        f'{today},Salary,2500,Groceries',
+        f'{today},Market,-30.5,Groceries',
+        f'{last_month},Cafe,-8.25,Dining',
+        f'{future},Concert,-100,Dining',
+    ])
+    response = client.post('/api/transactions/import', headers=user.headers, data={
+        'file': (io.BytesIO(statement.encode()), 'statement.csv')
+    })
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == 4
+    assert_aggregates_consistent()
+
+    # Shrinking a period's dates moves transactions out of it
+    response = client.put(f'/api/budget/budget-periods/{previous_id}', headers=user.headers, json={
+        'end_date': (previous_start + timedelta(days=5)).isoformat()
+    })
+    assert response.status_code == 200
+    assert_aggregates_consistent()
+
+    # Archived transactions keep counting
+    assert TransactionArchiveService.archive_user(user.id, date.today()) > 0
+    assert_aggregates_consistent()
+
+    # The rolled-over period picks up the future-dated import
+    result = BudgetRolloverService.rollover_all(today=date.today() + timedelta(days=17), user_id=user.id)
+    assert result['periods'] == 1
+    assert_aggregates_consistent()
+    new_period_id = BudgetPeriod.query.filter_by(user_id=user.id, is_active=True).one().id
+    assert db.session.query(db.func.sum(SpendingRollup.spent_total)).filter_by(
+        budget_period_id=new_period_id
+    ).scalar() == 100
+
+    assert client.delete(f'/api/budget/budget-periods/{previous_id}', headers=user.headers).status_code == 200
+    assert_aggregates_consistent()
+
+    spent = dict(db.session.query(Budget.period_id, Budget.total_spent).filter(Budget.user_id == user.id))
+    # Active period before rollover: 41 (moved back) + 30.5 (import); the salary is income
+    assert spent[user.period_id] == 71.5
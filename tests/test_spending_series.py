@@ -0,0 +1,112 @@
+"""
+Tests for the time-bucketed spending series endpoint.
+"""
+
+from datetime import date, datetime, time
+
+import pytest
+
+from src.extensions import db
+from src.models import ArchivedTransaction, Category, Subcategory, Transaction
+from src.services import TransactionArchiveService
+
+
+@pytest.fixture
+def transport(user):
+    category = Category(name='Transport', user_id=user.id)
+    db.session.add(category)
+    db.session.flush()
+    subcategory = Subcategory(name='Fuel', category_id=category.id)
+    db.session.add(subcategory)
+    db.session.commit()
+    return category.id, subcategory.id
+
+
+def add(user, amount, day, subcategory_id, hour=12):
+    db.session.add(Transaction(
+        amount=amount, description='Entry', user_id=user.id,
+        subcategory_id=subcategory_id, transaction_date=datetime.combine(day, time(hour))
+    ))
+    db.session.commit()
+
+
+def series(client, user, **params):
+    response = client.get('/api/analytics/spending-series', headers=user.headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def ledger(user, transport):
+    # Monday 2025-03-03 through Wednesday 2025-03-12
+    add(user, -10, date(2025, 3, 3), user.groceries_id)
+    add(user, -5, date(2025, 3, 3), user.dining_id, hour=23)
+    add(user, 200, date(2025, 3, 5), user.groceries_id)
+    add(user, -30, date(2025, 3, 12), transport[1])
+    add(user, -7, date(2025, 4, 1), user.groceries_id)
+    add(user, -99, date(2025, 3, 2), user.groceries_id)
+
+
+def test_daily_buckets_are_dense(client, user, transport, ledger):
+    body = series(client, user, bucket='day', **{'from': '2025-03-03', 'to': '2025-03-12'})
+    assert body['buckets'] == [f'2025-03-{day:02d}' for day in range(3, 13)]
+    assert body['totals']['spent'] == [15, 0, 0, 0, 0, 0, 0, 0, 0, 30]
+    assert body['totals']['income'] == [0, 0, 200, 0, 0, 0, 0, 0, 0, 0]
+
+    fuel, food = body['series']
+    assert (fuel['id'], fuel['name'], fuel['spent'][-1]) == (transport[0], 'Transport', 30)
+    assert (food['name'], food['spent'][0], food['income'][2]) == ('Food', 15, 200)
+
+
+def test_weekly_and_monthly_buckets(client, user, ledger):
+    weekly = series(client, user, bucket='week', **{'from': '2025-03-05', 'to': '2025-03-16'})
+    # Weeks start on Monday, so the first bucket starts before the range does
+    assert weekly['buckets'] == ['2025-03-03', '2025-03-10']
+    assert weekly['totals']['spent'] == [0, 30]
+    assert weekly['totals']['income'] == [200, 0]
+
+    monthly = series(client, user, bucket='month', **{'from': '2025-03-01', 'to': '2025-04-30'})
+    assert monthly['buckets'] == ['2025-03-01', '2025-04-01']
+    assert monthly['totals']['spent'] == [144, 7]
+
+
+def test_group_by_subcategory(client, user, transport, ledger):
+    body = series(client, user, bucket='month', group_by='subcategory', **{'from': '2025-03-03', 'to': '2025-03-31'})
+    spent = {entry['name']: entry['spent'] for entry in body['series']}
+    assert spent == {'Fuel': [30], 'Groceries': [10], 'Dining': [5]}
+    assert [entry['name'] for entry in body['series']] == ['Fuel', 'Groceries', 'Dining']
+
+
+def test_series_includes_archived_transactions(client, user, ledger):
+    params = {'bucket': 'month', 'from': '2025-03-01', 'to': '2025-04-30'}
+    before = series(client, user, **params)
+    assert TransactionArchiveService.archive_user(user.id, date(2025, 3, 31)) > 0
+    assert ArchivedTransaction.query.count() > 0
+    assert series(client, user, **params)['totals'] == before['totals']
+
+
+def test_series_reflects_new_transactions(client, user, ledger):
+    params = {'bucket': 'day', 'from': date.today().isoformat(), 'to': date.today().isoformat()}
+    assert series(client, user, **params)['totals']['spent'] == [0]
+
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': -12, 'description': 'Lunch', 'subcategory_id': user.dining_id
+    })
+    assert response.status_code == 201
+    assert series(client, user, **params)['totals']['spent'] == [12]
+
+
+def test_series_defaults_and_validation(client, user):
+    body = series(client, user)
+    assert (body['bucket'], body['group_by'], body['to']) == ('day', 'category', date.today().isoformat())
+    assert len(body['buckets']) == 365
+
+    for params in (
+        {'bucket': 'year'},
+        {'group_by': 'account'},
+        {'from': '2025-03-10', 'to': '2025-03-01'},
+        {'from': '2015-01-01', 'to': '2025-01-01'},
+        {'from': 'yesterday'},
+    ):
+        response = client.get('/api/analytics/spending-series', headers=user.headers, query_string=params)
+        assert response.status_code == 400, params
@@ -0,0 +1,94 @@
+"""
+Tests for streamed JSON responses.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from src.extensions import db
+from src.models import Payment, Subscription, SubscriptionPlan
+from src.utils.streaming import iter_json_array, stream_json_response
+
+
+@pytest.fixture
+def admin_headers(app):
+    token = jwt.encode({'admin': True}, app.config['SECRET_KEY'], algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_json_array_chunks_and_skips(app):
+    chunks = list(iter_json_array(range(7), lambda n: None if n == 3 else {'n': n}, batch_size=2))
+    assert chunks[0] == '[' and chunks[-1] == ']'
+    assert len(chunks) == 5
+    assert json.loads(''.join(chunks)) == [{'n': n} for n in (0, 1, 2, 4, 5, 6)]
+    assert ''.join(iter_json_array([])) == '[]'
+
+
+def test_trailer_is_built_after_the_array(app):
+    seen = []
+    with app.test_request_context():
+        response = stream_json_response(
+            iter(range(3)), lambda n: seen.append(n) or n, key='items', trailer=lambda: {'count': len(seen)}
+        )
+        assert response.is_streamed
+        assert json.loads(response.get_data()) == {'items': [0, 1, 2], 'count': 3}
+        empty = stream_json_response([], key='items', trailer=lambda: {'stats': {}})
+        assert json.loads(empty.get_data()) == {'items': [], 'stats': {}}
+        assert json.loads(stream_json_response([1, 2]).get_data()) == [1, 2]
+
+
+def test_admin_subscriptions_stream_with_stats(client, user, admin_headers):
+    db.session.add(SubscriptionPlan(code='monthly', name='Monthly', price_cents=9900, interval='month'))
+    start = datetime(2030, 1, 1)
+    statuses = ['active', 'trial', 'cancelled']
+    db.session.add_all([
+        Subscription(user_id=user.id, plan_code='monthly', status=statuses[index % 3],
+                     created_at=start + timedelta(minutes=index))
+        for index in range(1203)
+    ])
+    db.session.commit()
+
+    response = client.get('/api/subscriptions/admin/subscriptions', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    body = json.loads(response.get_data())
+    assert list(body) == ['subscriptions', 'stats']
+    assert len(body['subscriptions']) == 1203
+    assert body['subscriptions'][0]['created_at'] == (start + timedelta(minutes=1202)).isoformat()
+    assert body['subscriptions'][0]['user_email'] == 'tester@example.com'
+    assert body['stats'] == {
+        'total': 1203, 'by_status': {'active': 401, 'trial': 401, 'cancelled': 401}, 'by_plan': {'monthly': 1203}
+    }
+
+
+def test_admin_payments_stream_the_latest_500(client, user, admin_headers):
+    start = datetime(2030, 1, 1)
+    db.session.add_all([
+        Payment(user_id=user.id, amount_cents=1000 + index, currency='ZAR' if index % 2 else 'USD',
+                status='paid' if index % 4 else 'failed', created_at=start + timedelta(minutes=index))
+        for index in range(600)
+    ])
+    db.session.commit()
+
+    body = json.loads(client.get('/api/subscriptions/admin/payments', headers=admin_headers).get_data())
+    payments = body['payments']
+    assert len(payments) == 500
+    assert payments[0]['amount_cents'] == 1599 and payments[-1]['amount_cents'] == 1100
+    paid = [payment for payment in payments if payment['status'] == 'paid']
+    stats = body['stats']
+    assert stats['total'] == 500
+    assert stats['by_status'] == {'paid': len(paid), 'failed': 500 - len(paid)}
+    assert stats['total_revenue_cents'] == sum(payment['amount_cents'] for payment in paid)
+    assert stats['total_revenue_by_currency'] == {
+        currency: sum(payment['amount_cents'] for payment in paid if payment['currency'] == currency)
+        for currency in ('ZAR', 'USD')
+    }
+    assert stats['by_gateway'] == {'payfast': 500}
+
+
+def test_admin_streams_require_an_admin(client, user):
+    for path in ('/api/subscriptions/admin/subscriptions', '/api/subscriptions/admin/payments'):
+        assert client.get(path, headers=user.headers).status_code == 403
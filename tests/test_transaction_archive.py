@@ -0,0 +1,33 @@
+"""
+Tests for moving transactions into the archive table.
+"""
+
+from datetime import date, datetime, timedelta
+
+from src.models import ArchivedTransaction, Transaction
+from src.services import TransactionArchiveService
+
+
+def test_archived_ids_are_never_reused(client, user, add_transactions):
+    old_ids = add_transactions(2, when=datetime.utcnow() - timedelta(days=100))
+    [newest_id] = add_transactions(1)
+
+    archived = TransactionArchiveService.archive_user(user.id, date.today() - timedelta(days=30))
+    assert archived == 2
+    assert sorted(row.id for row in ArchivedTransaction.query) == old_ids
+
+    # With the newest live row gone, SQLite without AUTOINCREMENT would hand out ID 1 again
+    assert client.delete(f'/api/transactions/{newest_id}', headers=user.headers).status_code == 200
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': -12.5, 'description': 'Lunch', 'subcategory_id': user.dining_id,
+        'transaction_date': date.today().isoformat()
+    })
+    assert response.status_code == 201
+    assert response.get_json()['id'] > newest_id
+
+    listing = client.get('/api/transactions', headers=user.headers, query_string={
+        'from': (date.today() - timedelta(days=365)).isoformat(), 'limit': 100
+    }).get_json()['transactions']
+    ids = [transaction['id'] for transaction in listing]
+    assert len(ids) == len(set(ids)) == 3
+    assert Transaction.query.count() == 1
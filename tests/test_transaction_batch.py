@@ -0,0 +1,129 @@
+"""
+Tests for the transaction batch mutation endpoint.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from src.extensions import db
+from src.models import Budget, BudgetPeriod, Transaction, User
+from src.services import TransactionService
+
+
+def post_batch(client, user, operations):
+    return client.post('/api/transactions/batch', headers=user.headers, json={'operations': operations})
+
+
+def ledger(user_id):
+    return sorted(
+        (row.id, row.amount, row.subcategory_id, row.description, row.transaction_date)
+        for row in Transaction.query.filter_by(user_id=user_id)
+    )
+
+
+def data_version(user_id):
+    return db.session.get(User, user_id).data_version
+
+
+def spend(user, amount, subcategory_id=None, when=None):
+    return TransactionService.create_transaction(
+        user.id, -amount, subcategory_id or user.groceries_id, f'Spend {amount}',
+        transaction_date=when or datetime.utcnow() - timedelta(hours=1)
+    ).id
+
+
+def test_invalid_operation_rejects_the_whole_batch(client, user):
+    first, second = spend(user, 10), spend(user, 20)
+    before, version = ledger(user.id), data_version(user.id)
+
+    response = post_batch(client, user, [
+        {'op': 'create', 'data': {'amount': -5, 'subcategory_id': user.dining_id, 'description': 'Tea'}},
+        {'op': 'update', 'id': first, 'data': {'amount': -15}},
+        {'op': 'update', 'id': second, 'data': {'subcategory_id': 999999}},
+        {'op': 'delete', 'id': first},
+        {'op': 'update', 'id': second, 'data': {'amount': 'lots'}},
+    ])
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['applied'] is False
+    assert [result['status'] for result in body['results']] == [
+        'not_applied', 'not_applied', 'invalid', 'invalid', 'invalid'
+    ]
+    assert body['results'][2]['errors'] == {'subcategory_id': ['Subcategory not found']}
+    assert body['results'][3]['errors'] == {'id': ['Transaction is referenced by more than one operation']}
+    assert 'amount' in body['results'][4]['errors']
+    db.session.expire_all()
+    assert ledger(user.id) == before
+    assert data_version(user.id) == version
+
+
+def test_other_users_ids_are_refused(client, user, make_user):
+    other = make_user()
+    theirs = spend(other, 30)
+    mine = spend(user, 10)
+    before = ledger(other.id)
+
+    response = post_batch(client, user, [
+        {'op': 'update', 'id': theirs, 'data': {'amount': -1}},
+        {'op': 'delete', 'id': theirs},
+        {'op': 'create', 'data': {'amount': -5, 'subcategory_id': other.groceries_id}},
+        {'op': 'update', 'id': mine, 'data': {'subcategory_id': other.dining_id}},
+    ])
+
+    assert response.status_code == 400
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['invalid'] * 4
+    assert results[0]['errors'] == results[1]['errors'] == {'id': ['Transaction not found']}
+    assert results[2]['errors'] == results[3]['errors'] == {'subcategory_id': ['Subcategory not found']}
+    db.session.expire_all()
+    assert ledger(other.id) == before
+    assert db.session.get(Transaction, mine).subcategory_id == user.groceries_id
+
+
+def test_mixed_batch_keeps_rollup_and_budget_totals_in_step(client, user, assert_aggregates_consistent):
+    current = db.session.get(BudgetPeriod, user.period_id)
+    previous = BudgetPeriod(
+        name='Previous', period_type='monthly', user_id=user.id,
+        start_date=current.start_date - timedelta(days=30), end_date=current.start_date - timedelta(days=1)
+    )
+    db.session.add(previous)
+    db.session.flush()
+    db.session.add(Budget(period_id=previous.id, user_id=user.id))
+    db.session.commit()
+    previous_id, last_month = previous.id, previous.start_date + timedelta(days=3)
+
+    ids = [spend(user, amount) for amount in (10, 20, 30, 40, 50)]
+    old = spend(user, 60, when=datetime.combine(last_month, time.min))
+    assert_aggregates_consistent()
+    version = data_version(user.id)
+
+    response = post_batch(client, user, [
+        {'op': 'create', 'data': {'amount': -7, 'subcategory_id': user.dining_id, 'description': 'Tea'}},
+        {'op': 'create', 'data': {
+            'amount': -100, 'subcategory_id': user.groceries_id, 'transaction_date': last_month.isoformat()
+        }},
+        # Two rows recategorised with the same values share one UPDATE
+        {'op': 'update', 'id': ids[0], 'data': {'subcategory_id': user.dining_id}},
+        {'op': 'update', 'id': ids[1], 'data': {'subcategory_id': user.dining_id}},
+        {'op': 'update', 'id': ids[2], 'data': {'amount': -35, 'description': 'Bigger'}},
+        # Moves into the previous period, and back out of it
+        {'op': 'update', 'id': ids[3], 'data': {'transaction_date': last_month.isoformat()}},
+        {'op': 'update', 'id': old, 'data': {'transaction_date': date.today().isoformat(), 'amount': -65}},
+        {'op': 'delete', 'id': ids[4]},
+    ])
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['created'] * 2 + ['updated'] * 5 + ['deleted']
+    assert data_version(user.id) == version + 1
+    db.session.expire_all()
+    assert db.session.get(Transaction, ids[4]) is None
+    assert db.session.get(Transaction, results[0]['id']).description == 'Tea'
+
+    spent = {
+        budget.period_id: budget.total_spent
+        for budget in Budget.query.filter(Budget.period_id.in_([user.period_id, previous_id]))
+    }
+    # Current: 7 + 10 + 20 + 35 + 65; previous: 100 + 40
+    assert spent == {user.period_id: 137, previous_id: 140}
+    assert_aggregates_consistent()
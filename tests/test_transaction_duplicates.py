@@ -0,0 +1,88 @@
+"""
+Tests for duplicate transaction detection.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from src.extensions import db
+from src.models import Transaction
+from src.services import TransactionArchiveService, TransactionService
+from src.utils.fingerprint import normalize_description, transaction_fingerprint
+
+
+def add(user, amount, description, when):
+    return TransactionService.create_transaction(
+        user.id, amount, user.groceries_id, description, transaction_date=when
+    ).id
+
+
+def create(client, user, amount, description):
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': amount, 'description': description, 'subcategory_id': user.groceries_id
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def test_fingerprint_normalizes_descriptions():
+    assert normalize_description('POS  Purchase - Spar!') == 'pos purchase spar'
+    assert normalize_description(None) == ''
+    assert transaction_fingerprint(1, -10, 'POS  Purchase - Spar') == transaction_fingerprint(1, -10.0, 'pos purchase spar')
+    assert transaction_fingerprint(1, -10, 'Spar') != transaction_fingerprint(2, -10, 'Spar')
+    assert transaction_fingerprint(1, -10, 'Spar') != transaction_fingerprint(1, -10.01, 'Spar')
+
+
+def test_find_duplicates_searches_the_window_closest_first(user, make_user):
+    today = datetime.combine(date.today(), time(12))
+    far = add(user, -20, 'Coffee', today - timedelta(days=4))
+    edge = add(user, -20, 'Coffee', today - timedelta(days=3))
+    near = add(user, -20, 'COFFEE.', today + timedelta(days=1, hours=11))
+    add(user, -21, 'Coffee', today)
+    add(user, -20, 'Tea', today)
+    add(make_user(), -20, 'Coffee', today)
+
+    assert TransactionService.find_duplicates(user.id, -20, 'coffee', today) == [near, edge]
+    assert far not in TransactionService.find_duplicates(user.id, -20, 'coffee', today, window_days=3)
+    assert TransactionService.find_duplicates(user.id, -20, 'coffee', today.date(), window_days=4) == [near, edge, far]
+    assert TransactionService.find_duplicates(user.id, -20, 'coffee', today, exclude_id=near) == [edge]
+
+
+def test_find_duplicates_includes_archived_transactions(user):
+    long_ago = datetime.combine(date.today() - timedelta(days=200), time(9))
+    archived = add(user, -45, 'Gym', long_ago)
+    assert TransactionArchiveService.archive_user(user.id, date.today() - timedelta(days=30)) == 1
+    assert db.session.get(Transaction, archived) is None
+
+    assert TransactionService.find_duplicates(user.id, -45, 'gym', long_ago) == [archived]
+
+
+def test_create_flags_but_keeps_possible_duplicates(client, user):
+    first = create(client, user, -12.5, 'Lunch at Cafe')
+    assert first['possible_duplicates'] == []
+
+    second = create(client, user, 12.5, 'lunch at cafe')
+    assert second['possible_duplicates'] == [first['id']]
+    assert create(client, user, -13, 'Lunch at Cafe')['possible_duplicates'] == []
+    assert Transaction.query.filter_by(user_id=user.id).count() == 3
+
+
+def test_updates_refresh_the_fingerprint(client, user):
+    when = datetime.combine(date.today(), time(12))
+    transaction_id = add(user, -8, 'Parking', when)
+
+    response = client.put(f'/api/transactions/{transaction_id}', headers=user.headers, json={'description': 'Toll'})
+    assert response.status_code == 200
+    assert TransactionService.find_duplicates(user.id, -8, 'parking', when) == []
+    assert TransactionService.find_duplicates(user.id, -8, 'toll', when) == [transaction_id]
+
+    response = client.post('/api/transactions/batch', headers=user.headers, json={'operations': [
+        {'op': 'update', 'id': transaction_id, 'data': {'amount': -9}},
+        {'op': 'create', 'data': {'amount': -3, 'description': 'Bus', 'subcategory_id': user.groceries_id}},
+    ]})
+    assert response.status_code == 200, response.get_json()
+    assert TransactionService.find_duplicates(user.id, -9, 'toll', when) == [transaction_id]
+    assert len(TransactionService.find_duplicates(user.id, -3, 'bus', when)) == 1
+    assert all(
+        row.fingerprint == transaction_fingerprint(user.id, row.amount, row.description)
+        for row in Transaction.query.filter_by(user_id=user.id)
+    )
@@ -0,0 +1,140 @@
+"""
+Tests for importing bank statements.
+"""
+
+import io
+from datetime import date, timedelta
+
+import pytest
+
+from src.extensions import db
+from src.models import Budget, Transaction
+from src.services import TransactionImportService
+
+
+@pytest.fixture
+def upload(client, user):
+    def post(text, filename='statement.csv', **form):
+        return client.post('/api/transactions/import', headers=user.headers, data={
+            'file': (io.BytesIO(text.encode()), filename), **form
+        })
+    return post
+
+
+def imported(user_id):
+    return sorted(
+        (row.transaction_date.date(), row.amount, row.description, row.subcategory_id)
+        for row in Transaction.query.filter_by(user_id=user_id)
+    )
+
+
+def total_spent(budget_id):
+    db.session.expire_all()
+    return db.session.get(Budget, budget_id).total_spent
+
+
+def test_csv_import_reports_bad_rows_and_updates_the_rollup(user, upload, assert_aggregates_consistent):
+    today = date.today()
+    statement = '\n'.join([
+        'Date,Description,Amount,Category',
+        f'{today},Market,-42.50,Groceries',
+        f'{today},Bistro,-18,Food:Dining',
+        f'{today},Broken,abc,Groceries',
+        'not a date,Mystery,-5,Groceries',
+        f'{today},Cinema,-12,Entertainment',
+        '',
+        f'{today},Refund,15,Groceries',
+        f'{today},Uncategorised,-7,',
+    ])
+    response = upload(statement)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['imported'] == 3
+    assert report['failed'] == 4
+    assert [error['row'] for error in report['errors']] == [4, 5, 6, 9]
+    assert list(report['errors'][0]['errors']) == ['amount']
+    assert list(report['errors'][1]['errors']) == ['transaction_date']
+    assert report['errors'][2]['errors'] == {'subcategory_id': ['Unknown subcategory "Entertainment"']}
+    assert report['errors'][3]['errors'] == {'subcategory_id': ['Subcategory could not be determined']}
+
+    assert imported(user.id) == [
+        (today, -42.5, 'Market', user.groceries_id),
+        (today, -18, 'Bistro', user.dining_id),
+        (today, 15, 'Refund', user.groceries_id),
+    ]
+    assert total_spent(user.budget_id) == 60.5
+    assert_aggregates_consistent()
+
+
+def test_default_subcategory_fills_rows_without_a_category(user, upload):
+    statement = f'Date,Description,Debit,Credit\n{date.today()},Bakery,3.20,\n{date.today()},Pay,,900\n'
+    report = upload(statement, default_subcategory_id=str(user.dining_id)).get_json()
+    assert report['imported'] == 2
+    assert [(row[1], row[3]) for row in imported(user.id)] == [(-3.2, user.dining_id), (900, user.dining_id)]
+
+
+def test_default_subcategory_must_belong_to_the_user(user, make_user, upload):
+    other = make_user()
+    response = upload('Date,Description,Amount\n2030-01-01,Shop,-1\n', default_subcategory_id=str(other.groceries_id))
+    assert response.status_code == 400
+    assert Transaction.query.count() == 0
+
+
+def test_ofx_and_qif_statements(user, upload, assert_aggregates_consistent):
+    today = date.today()
+    ofx = f'''OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{today:%Y%m%d}120000<TRNAMT>-25.10<NAME>Fuel station<MEMO>Pump 4</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{today:%Y%m%d}<TRNAMT>100.00<NAME>Transfer</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{today:%Y%m%d}<TRNAMT>oops<NAME>Bad</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+'''
+    report = upload(ofx, 'statement.ofx', default_subcategory_id=str(user.groceries_id)).get_json()
+    assert (report['imported'], report['failed']) == (2, 1)
+    assert report['errors'][0]['row'] == 5
+
+    qif = '\n'.join([
+        '!Type:Bank',
+        f"D{today:%m/%d/%Y}", 'T-9.99', 'PNoodle bar', 'MLunch', 'LDining', '^',
+        f"D{today.month}/{today.day:2d}'{today:%y}", 'T-4.00', 'PKiosk', 'LGroceries', '^',
+    ])
+    report = upload(qif, 'statement.qif').get_json()
+    assert (report['imported'], report['failed']) == (2, 0)
+
+    rows = Transaction.query.filter_by(user_id=user.id).order_by(Transaction.id).all()
+    assert [(row.amount, row.description, row.comment, row.subcategory_id) for row in rows] == [
+        (-25.1, 'Fuel station', 'Pump 4', user.groceries_id),
+        (100, 'Transfer', None, user.groceries_id),
+        (-9.99, 'Noodle bar', 'Lunch', user.dining_id),
+        (-4, 'Kiosk', None, user.groceries_id),
+    ]
+    assert all(row.transaction_date.date() == today for row in rows)
+    assert total_spent(user.budget_id) == pytest.approx(39.09)
+    assert_aggregates_consistent()
+
+
+def test_reimporting_a_statement_skips_duplicates(user, upload, assert_aggregates_consistent, monkeypatch):
+    monkeypatch.setattr(TransactionImportService, 'CHUNK_SIZE', 2)
+    today, yesterday = date.today(), date.today() - timedelta(days=1)
+    first = '\n'.join([
+        'Date,Description,Amount,Category',
+        f'{today},Coffee,-3,Dining',
+        f'{today},Coffee,-3,Dining',
+        f'{yesterday},Market,-20,Groceries',
+    ])
+    assert upload(first).get_json()['imported'] == 3
+
+    # Same lines again, then one more coffee and market visit: each existing
+    # transaction accounts for one row only, even across chunks
+    second = first + f'\n{today},Coffee,-3,Dining\n{today},Market,-20,Groceries\n{today},Books,-11,Groceries'
+    report = upload(second).get_json()
+    assert report['duplicates'] == 3
+    assert report['duplicate_rows'] == [2, 3, 4]
+    assert report['imported'] == 3
+    assert sorted(row[2] for row in imported(user.id)) == ['Books', 'Coffee', 'Coffee', 'Coffee', 'Market', 'Market']
+
+    report = upload(first, skip_duplicates='false').get_json()
+    assert (report['imported'], report['duplicates']) == (3, 0)
+    assert Transaction.query.filter_by(user_id=user.id).count() == 9
+    assert total_spent(user.budget_id) == 5 * 3 + 3 * 20 + 11
+    assert_aggregates_consistent()
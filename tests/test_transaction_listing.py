@@ -0,0 +1,49 @@
+"""
+Tests for the transaction listing endpoints.
+"""
+
+from datetime import datetime, time, timedelta
+
+from src.extensions import db
+from src.models import BudgetPeriod
+
+
+def test_active_period_includes_the_whole_last_day(client, user, add_transactions):
+    period = db.session.get(BudgetPeriod, user.period_id)
+    [late_id] = add_transactions(1, when=datetime.combine(period.end_date, time(18, 30)))
+    [after_id] = add_transactions(1, when=datetime.combine(period.end_date + timedelta(days=1), time.min))
+
+    streamed = client.get('/api/transactions', headers=user.headers).get_json()
+    streamed_ids = [transaction['id'] for transaction in streamed]
+    assert late_id in streamed_ids
+    assert after_id not in streamed_ids
+
+    paged = client.get('/api/transactions', headers=user.headers, query_string={'limit': 50}).get_json()
+    paged_ids = [transaction['id'] for transaction in paged['transactions']]
+    assert late_id in paged_ids
+    assert after_id not in paged_ids
+
+
+def test_listing_query_count_does_not_grow_with_rows(client, user, add_transactions, count_queries):
+    add_transactions(1)
+    requests = [{}, {'limit': 500}]
+    # Warm the per-user caches so both measured runs start from the same state
+    for query_string in requests:
+        client.get('/api/transactions', headers=user.headers, query_string=query_string)
+
+    def measure():
+        counts = []
+        for query_string in requests:
+            with count_queries() as statements:
+                response = client.get('/api/transactions', headers=user.headers, query_string=query_string)
+                assert response.status_code == 200
+                # The plain listing is streamed: read it all while counting
+                response.get_data()
+            counts.append(len(statements))
+        return counts
+
+    one_row = measure()
+    add_transactions(200, subcategory_id=user.dining_id)
+    add_transactions(200)
+    many_rows = measure()
+    assert many_rows == one_row
@@ -0,0 +1,96 @@
+"""
+Tests for full-text transaction search.
+"""
+
+import pytest
+
+from src.services import TransactionService
+
+
+def create(client, user, description, comment=None):
+    response = client.post('/api/transactions', headers=user.headers, json={
+        'amount': -10, 'description': description, 'comment': comment, 'subcategory_id': user.groceries_id
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def search(client, user, q, **params):
+    response = client.get('/api/transactions/search', headers=user.headers, query_string={'q': q, **params})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def ids(body):
+    return [result['id'] for result in body['results']]
+
+
+@pytest.fixture(params=['index', 'like'])
+def backend(request, monkeypatch):
+    """Run each search test against the FTS index and against the LIKE fallback."""
+    if request.param == 'like':
+        monkeypatch.setattr(TransactionService, '_sqlite_search_index_exists', staticmethod(lambda: False))
+    return request.param
+
+
+def test_search_matches_prefixes_and_requires_every_term(client, user, backend):
+    coffee = create(client, user, 'Coffee at Bean Bar')
+    groceries = create(client, user, 'Weekly groceries', comment='coffee beans included')
+    create(client, user, 'Petrol')
+
+    assert sorted(ids(search(client, user, 'coff'))) == sorted([coffee, groceries])
+    assert ids(search(client, user, 'coffee weekly')) == [groceries]
+    assert ids(search(client, user, 'petrol coffee')) == []
+    assert ids(search(client, user, 'PETROL')) != []
+
+
+def test_search_ranks_description_matches_above_comment_matches(client, user):
+    in_comment = create(client, user, 'Market', comment='bakery bread')
+    in_description = create(client, user, 'Bakery bread')
+
+    results = search(client, user, 'bakery')['results']
+    assert [result['id'] for result in results] == [in_description, in_comment]
+    assert results[0]['rank'] > results[1]['rank']
+
+
+def test_search_only_returns_the_users_own_transactions(client, make_user, backend):
+    first, second = make_user(), make_user()
+    own = create(client, first, 'Shared rent')
+    create(client, second, 'Shared rent')
+
+    assert ids(search(client, first, 'rent')) == [own]
+
+
+def test_search_index_follows_updates_and_deletes(client, user, backend):
+    transaction_id = create(client, user, 'Gym membership')
+    assert ids(search(client, user, 'gym')) == [transaction_id]
+
+    response = client.put(f'/api/transactions/{transaction_id}', headers=user.headers, json={
+        'description': 'Swimming pool'
+    })
+    assert response.status_code == 200, response.get_json()
+    assert ids(search(client, user, 'gym')) == []
+    assert ids(search(client, user, 'swim')) == [transaction_id]
+
+    assert client.delete(f'/api/transactions/{transaction_id}', headers=user.headers).status_code == 200
+    assert ids(search(client, user, 'swim')) == []
+
+
+def test_search_pages_through_results(client, user, backend):
+    created = {create(client, user, f'Parking {index}') for index in range(5)}
+
+    first = search(client, user, 'parking', per_page=3)
+    second = search(client, user, 'parking', per_page=3, page=2)
+    assert first['has_more'] and not second['has_more']
+    assert len(first['results']) == 3 and len(second['results']) == 2
+    assert set(ids(first)) | set(ids(second)) == created
+
+
+def test_search_ignores_query_syntax_and_validates_input(client, user):
+    create(client, user, 'Taxi "airport" run')
+
+    assert search(client, user, '"airport* OR NOT')['results'] == []
+    assert len(search(client, user, 'airport*')['results']) == 1
+    assert search(client, user, '!!!') == {'results': [], 'page': 1, 'per_page': 25, 'has_more': False}
+    response = client.get('/api/transactions/search', headers=user.headers)
+    assert response.status_code == 400